@@ -1,5 +1,7 @@
 import os
 
+import pytest
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 root_dir_content = os.listdir(BASE_DIR)
 PROJECT_DIR_NAME = 'yatube'
@@ -37,3 +39,15 @@ pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True)
+def n_plus_one(settings):
+    # Запросы с N+1 падают с core.nplusone.NPlusOneError.
+    settings.NPLUSONE_RAISE = True
+
+
+@pytest.fixture(autouse=True)
+def eager_jobs(settings):
+    # Фоновые задачи (core.jobs) выполняются сразу, без воркеров.
+    settings.JOBS_EAGER = True
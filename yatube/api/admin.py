@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from .models import Token
+
+
+class TokenAdmin(admin.ModelAdmin):
+    list_display = ('user', 'created')
+    list_select_related = ('user',)
+    readonly_fields = ('key',)
+
+
+admin.site.register(Token, TokenAdmin)
@@ -0,0 +1,21 @@
+"""Аутентификация по токену: Authorization: Token <ключ>."""
+from http import HTTPStatus
+
+from .errors import ApiError
+from .models import Token
+
+KEYWORD = 'Token'
+
+
+def authenticate(request):
+    """Владелец токена из заголовка или None, если заголовка нет."""
+    header = request.META.get('HTTP_AUTHORIZATION')
+    if not header:
+        return None
+    keyword, _, key = header.partition(' ')
+    token = keyword == KEYWORD and key and Token.objects.select_related(
+        'user',
+    ).filter(key=key.strip()).first()
+    if not token or not token.user.is_active:
+        raise ApiError(HTTPStatus.UNAUTHORIZED, 'Неверный токен.')
+    return token.user
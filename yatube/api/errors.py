@@ -0,0 +1,15 @@
+from http import HTTPStatus
+
+
+class ApiError(Exception):
+    """Ошибка запроса к API: статус ответа, сообщение и подробности."""
+
+    def __init__(self, status, detail, **extra):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+        self.extra = extra
+
+
+def not_found():
+    return ApiError(HTTPStatus.NOT_FOUND, 'Не найдено.')
@@ -0,0 +1,55 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core import serializers
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from api import views
+from api.serializers import POST, Serializer
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет, сколько строк в секунду отдаёт страница постов API, '
+        'в сравнении с django.core.serializers.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, default=100,
+            help='Строк на странице.',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=50,
+            help='Сколько раз собрать страницу.',
+        )
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        request = RequestFactory().get('/', {'limit': rows})
+        request.user = AnonymousUser()
+        serializer = Serializer(POST)
+        posts = Post.objects.order_by('-pub_date', '-id')
+        count = min(rows, posts.count())
+        if not count:
+            self.stderr.write('Нет постов: сначала заполните базу.')
+            return
+        cases = [
+            ['api', lambda: views.page(
+                request, Post.objects.all(), serializer, ('pub_date', 'id'),
+            )],
+            ['django.core.serializers', lambda: serializers.serialize(
+                'json', posts[:rows],
+            )],
+        ]
+        for name, build in cases:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                build()
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'{name}: {count * repeat / elapsed:.0f} строк/с '
+                f'({count} строк x {repeat})'
+            )
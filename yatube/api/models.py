@@ -0,0 +1,37 @@
+import secrets
+
+from django.contrib.auth import get_user_model
+from django.db import models
+
+User = get_user_model()
+
+
+def new_key():
+    return secrets.token_hex(20)
+
+
+class Token(models.Model):
+    key = models.CharField(
+        max_length=40,
+        unique=True,
+        default=new_key,
+        editable=False,
+        verbose_name='Ключ',
+    )
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='api_token',
+        verbose_name='Пользователь',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания',
+    )
+
+    class Meta:
+        verbose_name = 'Токен API'
+        verbose_name_plural = 'Токены API'
+
+    def __str__(self):
+        return self.key[:8]
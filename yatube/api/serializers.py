@@ -0,0 +1,84 @@
+"""Сериализация ответов API без отражения по полям моделей.
+
+Ресурс описан словарём «поле API -> путь ORM». Выборка берёт только
+запрошенные в ?fields= поля одним queryset.values(): связанные объекты
+(автор, группа) приходят в той же строке через join, а не отдельным
+запросом на каждую строку. Строка ответа собирается из уже готовых
+значений, преобразуются только поля из CONVERTERS.
+"""
+from http import HTTPStatus
+
+from django import conf
+
+from .errors import ApiError
+
+POST = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'comments': 'comment_count',
+}
+COMMENT = {
+    'id': 'id',
+    'post': 'post_id',
+    'author': 'author__username',
+    'text': 'text',
+    'created': 'created',
+}
+GROUP = {
+    'id': 'id',
+    'title': 'title',
+    'slug': 'slug',
+    'description': 'description',
+    'posts': 'post_count',
+}
+FOLLOW = {
+    'id': 'id',
+    'user': 'user__username',
+    'author': 'author__username',
+}
+
+
+def media_url(name):
+    return f'{conf.settings.MEDIA_URL}{name}' if name else None
+
+
+CONVERTERS = {'image': media_url}
+
+
+class Serializer:
+    def __init__(self, resource, names=None):
+        names = names or list(resource)
+        unknown = [name for name in names if name not in resource]
+        if unknown:
+            raise ApiError(
+                HTTPStatus.BAD_REQUEST,
+                f'Неизвестные поля: {", ".join(unknown)}.',
+            )
+        self.columns = [
+            (name, resource[name], CONVERTERS.get(name)) for name in names
+        ]
+
+    @classmethod
+    def for_request(cls, request, resource):
+        """Сериализатор полей из ?fields=a,b (по умолчанию - всех)."""
+        fields = request.GET.get('fields', '')
+        return cls(resource, [
+            name.strip() for name in fields.split(',') if name.strip()
+        ])
+
+    @property
+    def paths(self):
+        return [path for _, path, _ in self.columns]
+
+    def row(self, values):
+        return {
+            name: convert(values[path]) if convert else values[path]
+            for name, path, convert in self.columns
+        }
+
+    def rows(self, rows):
+        return [self.row(values) for values in rows]
@@ -0,0 +1,3 @@
+API_PAGE_SIZE = 30
+# Больше строк на страницу клиент не получит, сколько бы ни запросил.
+API_MAX_PAGE_SIZE = 100
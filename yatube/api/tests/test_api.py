@@ -0,0 +1,211 @@
+from http import HTTPStatus
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+from ..models import Token
+
+GROUP_SLUG = 'group_slug_1'
+USER_NAME = 'user_1'
+USER_NAME_2 = 'user_2'
+PASSWORD = 'password_1'
+
+POSTS_URL = reverse('api:posts')
+GROUPS_URL = reverse('api:groups')
+FOLLOWS_URL = reverse('api:follows')
+FOLLOW_URL = reverse('api:follow', args=[USER_NAME])
+TOKEN_URL = reverse('api:token')
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username=USER_NAME, password=PASSWORD,
+        )
+        cls.user_2 = User.objects.create(username=USER_NAME_2)
+        cls.group = Group.objects.create(
+            slug=GROUP_SLUG,
+            title='group_1',
+            description='Тестовая группа 1',
+        )
+        cls.post = Post.objects.create(
+            text='post', author=cls.user, group=cls.group,
+        )
+        cls.POST_URL = reverse('api:post', args=[cls.post.id])
+        cls.COMMENTS_URL = reverse('api:comments', args=[cls.post.id])
+        cls.token = Token.objects.create(user=cls.user_2)
+        cls.guest_client = Client()
+        cls.token_client = Client(
+            HTTP_AUTHORIZATION=f'Token {cls.token.key}',
+        )
+
+    def add_posts(self, count):
+        for i in range(count):
+            Post.objects.create(
+                text=f'post {i}', author=self.user, group=self.group,
+            )
+
+    def post_json(self, client, url, data):
+        return client.post(url, data, content_type='application/json')
+
+    def test_post_detail(self):
+        data = self.guest_client.get(self.POST_URL).json()
+        self.assertEqual(data, {
+            'id': self.post.id,
+            'text': 'post',
+            'pub_date': data['pub_date'],
+            'author': USER_NAME,
+            'group': GROUP_SLUG,
+            'image': None,
+            'comments': 0,
+        })
+
+    def test_sparse_fieldsets(self):
+        data = self.guest_client.get(
+            f'{self.POST_URL}?fields=id,author',
+        ).json()
+        self.assertEqual(data, {'id': self.post.id, 'author': USER_NAME})
+        response = self.guest_client.get(f'{POSTS_URL}?fields=id,secret')
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_cursor_pages_cover_list(self):
+        self.add_posts(4)
+        ids, url = [], f'{POSTS_URL}?limit=2&fields=id'
+        while url:
+            data = self.guest_client.get(url).json()
+            ids += [row['id'] for row in data['results']]
+            url = data['next'] and (
+                f'{POSTS_URL}?limit=2&fields=id&after={data["next"]}'
+            )
+        self.assertEqual(
+            ids, list(Post.objects.order_by('-pub_date', '-id').values_list(
+                'id', flat=True,
+            )),
+        )
+
+    def test_list_queries_do_not_depend_on_rows(self):
+        with CaptureQueriesContext(connection) as before:
+            self.guest_client.get(POSTS_URL)
+        self.add_posts(20)
+        with CaptureQueriesContext(connection) as after:
+            data = self.guest_client.get(POSTS_URL).json()
+        self.assertEqual(len(data['results']), 21)
+        self.assertEqual(len(after), len(before))
+
+    def test_filters(self):
+        Post.objects.create(text='other', author=self.user_2)
+        for query, count in [
+            [f'group={GROUP_SLUG}', 1],
+            [f'author={USER_NAME_2}', 1],
+            ['', 2],
+        ]:
+            with self.subTest(query=query):
+                data = self.guest_client.get(f'{POSTS_URL}?{query}').json()
+                self.assertEqual(len(data['results']), count)
+
+    def test_writes_need_token(self):
+        self.guest_client.force_login(self.user_2)
+        for client, status in [
+            [self.guest_client, HTTPStatus.UNAUTHORIZED],
+            [
+                Client(HTTP_AUTHORIZATION='Token wrong'),
+                HTTPStatus.UNAUTHORIZED,
+            ],
+            [self.token_client, HTTPStatus.CREATED],
+        ]:
+            with self.subTest(client=client):
+                response = self.post_json(client, POSTS_URL, {'text': 'new'})
+                self.assertEqual(response.status_code, status)
+        self.guest_client.logout()
+
+    def test_create_post(self):
+        response = self.post_json(
+            self.token_client, POSTS_URL,
+            {'text': 'new', 'group': GROUP_SLUG},
+        )
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        post = Post.objects.get(pk=response.json()['id'])
+        self.assertEqual(post.author, self.user_2)
+        self.assertEqual(post.group, self.group)
+        response = self.post_json(self.token_client, POSTS_URL, {})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertIn('text', response.json()['errors'])
+
+    def test_comments(self):
+        response = self.post_json(
+            self.token_client, self.COMMENTS_URL, {'text': 'comment'},
+        )
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        comment = Comment.objects.get()
+        self.assertEqual(comment.author, self.user_2)
+        data = self.guest_client.get(self.COMMENTS_URL).json()
+        self.assertEqual(
+            [row['text'] for row in data['results']], ['comment'],
+        )
+        response = self.guest_client.get(
+            reverse('api:comments', args=[self.post.id + 1]),
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_groups(self):
+        data = self.guest_client.get(
+            reverse('api:group', args=[GROUP_SLUG]),
+        ).json()
+        self.assertEqual(data['posts'], 1)
+        new_group = {'title': 'new', 'slug': 'new', 'description': 'new'}
+        response = self.post_json(self.token_client, GROUPS_URL, new_group)
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        User.objects.filter(pk=self.user_2.pk).update(is_staff=True)
+        response = self.post_json(self.token_client, GROUPS_URL, new_group)
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        self.assertTrue(Group.objects.filter(slug='new').exists())
+
+    def test_follows(self):
+        self.assertEqual(
+            self.guest_client.get(FOLLOWS_URL).status_code,
+            HTTPStatus.UNAUTHORIZED,
+        )
+        for status in [HTTPStatus.CREATED, HTTPStatus.OK]:
+            response = self.post_json(
+                self.token_client, FOLLOWS_URL, {'author': USER_NAME},
+            )
+            self.assertEqual(response.status_code, status)
+        self.assertEqual(Follow.objects.filter(user=self.user_2).count(), 1)
+        data = self.token_client.get(FOLLOWS_URL).json()
+        self.assertEqual(
+            [row['author'] for row in data['results']], [USER_NAME],
+        )
+        response = self.post_json(
+            self.token_client, FOLLOWS_URL, {'author': USER_NAME_2},
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        for status in [HTTPStatus.NO_CONTENT, HTTPStatus.NOT_FOUND]:
+            response = self.token_client.delete(FOLLOW_URL)
+            self.assertEqual(response.status_code, status)
+
+    def test_token(self):
+        response = self.post_json(
+            self.guest_client, TOKEN_URL,
+            {'username': USER_NAME, 'password': PASSWORD},
+        )
+        self.assertEqual(
+            response.json()['token'], Token.objects.get(user=self.user).key,
+        )
+        response = self.post_json(
+            self.guest_client, TOKEN_URL,
+            {'username': USER_NAME, 'password': 'wrong'},
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_api', rows=10, repeat=2, stdout=out)
+        self.assertIn('api: ', out.getvalue())
+        self.assertIn('строк/с', out.getvalue())
@@ -0,0 +1,24 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('v1/token/', views.token, name='token'),
+    path('v1/posts/', views.posts, name='posts'),
+    path('v1/posts/<int:post_id>/', views.post, name='post'),
+    path(
+        'v1/posts/<int:post_id>/comments/',
+        views.comments,
+        name='comments',
+    ),
+    path('v1/groups/', views.groups, name='groups'),
+    path('v1/groups/<slug:slug>/', views.group, name='group'),
+    path('v1/follows/', views.follow_list, name='follows'),
+    path(
+        'v1/follows/<str:username>/',
+        views.follow_detail,
+        name='follow',
+    ),
+]
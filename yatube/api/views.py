@@ -0,0 +1,241 @@
+import functools
+import json
+from http import HTTPStatus
+
+from django.contrib import auth
+from django.forms import modelform_factory
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+
+from api import settings
+from posts import follows, uploads
+from posts.forms import CommentForm, PostForm
+from posts.models import Comment, Follow, Group, Post, User
+from posts.paginator import CursorPaginator
+from .auth import authenticate
+from .errors import ApiError, not_found
+from .models import Token
+from .serializers import COMMENT, FOLLOW, GROUP, POST, Serializer
+
+SAFE_METHODS = ('GET',)
+
+GroupForm = modelform_factory(Group, fields=('title', 'slug', 'description'))
+
+
+def endpoint(*methods, login_required=False, token_required=True):
+    """Представление API: методы, аутентификация и ошибки в JSON.
+
+    Изменяющие запросы принимаются только с токеном: сессионная cookie
+    без CSRF-проверки их не авторизует.
+    """
+    def decorator(view):
+        @csrf_exempt
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            try:
+                if request.method not in methods:
+                    raise ApiError(
+                        HTTPStatus.METHOD_NOT_ALLOWED,
+                        'Метод не поддерживается.',
+                    )
+                user = authenticate(request)
+                if user:
+                    request.user = user
+                elif (
+                    token_required and request.method not in SAFE_METHODS
+                    or login_required and not request.user.is_authenticated
+                ):
+                    raise ApiError(
+                        HTTPStatus.UNAUTHORIZED, 'Нужна аутентификация.',
+                    )
+                return view(request, *args, **kwargs)
+            except ApiError as error:
+                return JsonResponse(
+                    {'detail': error.detail, **error.extra},
+                    status=error.status,
+                )
+        return wrapper
+    return decorator
+
+
+def request_data(request):
+    if request.content_type != 'application/json':
+        return request.POST.copy()
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        raise ApiError(HTTPStatus.BAD_REQUEST, 'Ожидается JSON-объект.')
+    return data
+
+
+def validate(form):
+    if not form.is_valid():
+        raise ApiError(
+            HTTPStatus.BAD_REQUEST, 'Ошибка в данных.', errors=form.errors,
+        )
+    return form
+
+
+def page_size(request):
+    try:
+        size = int(request.GET.get('limit', settings.API_PAGE_SIZE))
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, 'limit должен быть числом.')
+    return min(max(size, 1), settings.API_MAX_PAGE_SIZE)
+
+
+def page(request, queryset, serializer, keys):
+    """Страница по курсору after/before в порядке убывания ключей."""
+    paths = dict.fromkeys([*serializer.paths, *keys])
+    rows = CursorPaginator(
+        queryset.values(*paths), page_size(request), keys,
+    ).get_page(request.GET.get('after'), request.GET.get('before'))
+    return JsonResponse({
+        'results': serializer.rows(rows),
+        'next': rows.next_cursor,
+        'previous': rows.previous_cursor,
+    })
+
+
+def detail(queryset, serializer, status=HTTPStatus.OK, **lookup):
+    values = queryset.filter(**lookup).values(*serializer.paths).first()
+    if values is None:
+        raise not_found()
+    return JsonResponse(serializer.row(values), status=status)
+
+
+def user_id(username):
+    found = User.objects.filter(username=username).values_list(
+        'id', flat=True,
+    ).first()
+    if found is None:
+        raise not_found()
+    return found
+
+
+@endpoint('POST', token_required=False)
+def token(request):
+    data = request_data(request)
+    user = auth.authenticate(
+        request,
+        username=data.get('username'),
+        password=data.get('password'),
+    )
+    if user is None:
+        raise ApiError(
+            HTTPStatus.BAD_REQUEST, 'Неверное имя пользователя или пароль.',
+        )
+    token, _ = Token.objects.get_or_create(user=user)
+    return JsonResponse({'token': token.key})
+
+
+@endpoint('GET', 'POST')
+def posts(request):
+    serializer = Serializer.for_request(request, POST)
+    if request.method == 'POST':
+        data = request_data(request)
+        if data.get('group'):
+            # Группа в API - это slug, форма ждёт первичный ключ.
+            data['group'] = Group.objects.filter(
+                slug=data['group'],
+            ).values_list('id', flat=True).first() or data['group']
+        post = validate(
+            PostForm(data, files=uploads.files(request)),
+        ).save(commit=False)
+        post.author = request.user
+        post.save()
+        return detail(
+            Post.objects.all(), serializer, HTTPStatus.CREATED, pk=post.pk,
+        )
+    queryset = Post.objects.all()
+    if request.GET.get('group'):
+        queryset = queryset.filter(group__slug=request.GET['group'])
+    if request.GET.get('author'):
+        queryset = queryset.filter(author__username=request.GET['author'])
+    return page(request, queryset, serializer, ('pub_date', 'id'))
+
+
+@endpoint('GET')
+def post(request, post_id):
+    return detail(
+        Post.objects.all(), Serializer.for_request(request, POST), pk=post_id,
+    )
+
+
+@endpoint('GET', 'POST')
+def comments(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        raise not_found()
+    serializer = Serializer.for_request(request, COMMENT)
+    if request.method == 'POST':
+        comment = validate(
+            CommentForm(request_data(request)),
+        ).save(commit=False)
+        comment.author = request.user
+        comment.post_id = post_id
+        comment.save()
+        return detail(
+            Comment.objects.all(), serializer, HTTPStatus.CREATED,
+            pk=comment.pk,
+        )
+    return page(
+        request, Comment.objects.filter(post_id=post_id), serializer,
+        ('created', 'id'),
+    )
+
+
+@endpoint('GET', 'POST')
+def groups(request):
+    serializer = Serializer.for_request(request, GROUP)
+    if request.method == 'POST':
+        if not request.user.is_staff:
+            raise ApiError(
+                HTTPStatus.FORBIDDEN, 'Группы создают администраторы.',
+            )
+        group = validate(GroupForm(request_data(request))).save()
+        return detail(
+            Group.objects.all(), serializer, HTTPStatus.CREATED, pk=group.pk,
+        )
+    return page(request, Group.objects.all(), serializer, ('id',))
+
+
+@endpoint('GET')
+def group(request, slug):
+    return detail(
+        Group.objects.all(), Serializer.for_request(request, GROUP),
+        slug=slug,
+    )
+
+
+@endpoint('GET', 'POST', login_required=True)
+def follow_list(request):
+    serializer = Serializer.for_request(request, FOLLOW)
+    queryset = Follow.objects.filter(user=request.user)
+    if request.method == 'POST':
+        author_id = user_id(request_data(request).get('author'))
+        if author_id == request.user.id:
+            raise ApiError(
+                HTTPStatus.BAD_REQUEST, 'Нельзя подписаться на себя.',
+            )
+        created = follows.follow(request.user.id, [author_id])
+        return detail(
+            queryset, serializer,
+            HTTPStatus.CREATED if created else HTTPStatus.OK,
+            author_id=author_id,
+        )
+    return page(request, queryset, serializer, ('id',))
+
+
+@endpoint('GET', 'DELETE', login_required=True)
+def follow_detail(request, username):
+    if request.method == 'DELETE':
+        if not follows.unfollow(request.user.id, [user_id(username)]):
+            raise not_found()
+        return HttpResponse(status=HTTPStatus.NO_CONTENT)
+    return detail(
+        Follow.objects.filter(user=request.user),
+        Serializer.for_request(request, FOLLOW),
+        author__username=username,
+    )
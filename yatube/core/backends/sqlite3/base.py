@@ -0,0 +1,141 @@
+"""SQLite для продакшена на одном сервере.
+
+Обёртка над штатным бэкендом django.db.backends.sqlite3:
+
+* при подключении включает WAL и остальные PRAGMA из OPTIONS['pragmas'],
+  так что читатели не ждут писателя;
+* транзакции начинает с BEGIN IMMEDIATE - блокировка на запись берётся
+  сразу, и два писателя не упираются в «database is locked» при попытке
+  повысить блокировку посреди транзакции;
+* все записи процесса в один файл БД проходят через общую очередь
+  (блокировку) с ограниченным ожиданием OPTIONS['write_timeout'] секунд,
+  а между процессами их упорядочивает busy timeout самого SQLite
+  (OPTIONS['timeout']).
+
+Соединения переиспользуются штатным механизмом CONN_MAX_AGE.
+"""
+import contextlib
+import functools
+import re
+import threading
+
+from django.db import utils
+from django.db.backends.sqlite3 import base
+
+PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'cache_size': -64000,
+    'mmap_size': 256 * 2 ** 20,
+    'temp_store': 'memory',
+}
+WRITE_TIMEOUT = 10
+WRITE_STATEMENT = re.compile(
+    r'^\s*(INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER)\b', re.IGNORECASE,
+)
+
+_write_locks = {}
+_write_locks_guard = threading.Lock()
+
+
+def write_lock(name):
+    """Очередь писателей одного файла БД внутри процесса."""
+    with _write_locks_guard:
+        return _write_locks.setdefault(name, threading.RLock())
+
+
+class CursorWrapper(base.SQLiteCursorWrapper):
+    """Вне транзакции каждая запись встаёт в очередь писателей."""
+
+    def __init__(self, connection, wrapper):
+        super().__init__(connection)
+        self.wrapper = wrapper
+
+    def execute(self, query, params=None):
+        if self.connection.in_transaction or not WRITE_STATEMENT.match(query):
+            return super().execute(query, params)
+        with self.wrapper.writing():
+            return super().execute(query, params)
+
+    def executemany(self, query, param_list):
+        if self.connection.in_transaction or not WRITE_STATEMENT.match(query):
+            return super().executemany(query, param_list)
+        with self.wrapper.writing():
+            return super().executemany(query, param_list)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        options = self.settings_dict['OPTIONS']
+        self.pragmas = {**PRAGMAS, **options.get('pragmas', {})}
+        self.write_timeout = options.get('write_timeout', WRITE_TIMEOUT)
+        self._holds_write_lock = False
+
+    @property
+    def write_lock(self):
+        # Имя читается каждый раз: тесты подменяют NAME на тестовую БД.
+        return write_lock(self.settings_dict['NAME'])
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        params.pop('write_timeout', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def acquire_write_lock(self):
+        if not self.write_lock.acquire(timeout=self.write_timeout):
+            raise utils.OperationalError(
+                f'database is locked: no write slot within '
+                f'{self.write_timeout} s'
+            )
+
+    @contextlib.contextmanager
+    def writing(self):
+        self.acquire_write_lock()
+        try:
+            yield
+        finally:
+            self.write_lock.release()
+
+    def create_cursor(self, name=None):
+        return self.connection.cursor(
+            factory=functools.partial(CursorWrapper, wrapper=self),
+        )
+
+    def _start_transaction_under_autocommit(self):
+        self.acquire_write_lock()
+        self._holds_write_lock = True
+        try:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        except Exception:
+            self._release_write_lock()
+            raise
+
+    def _release_write_lock(self):
+        if self._holds_write_lock:
+            self._holds_write_lock = False
+            self.write_lock.release()
+
+    def _commit(self):
+        # Если COMMIT не прошёл, блокировку отпустит следующий ROLLBACK.
+        super()._commit()
+        self._release_write_lock()
+
+    def _rollback(self):
+        try:
+            super()._rollback()
+        finally:
+            self._release_write_lock()
+
+    def _close(self):
+        try:
+            super()._close()
+        finally:
+            self._release_write_lock()
@@ -0,0 +1,237 @@
+"""Прогон всех страниц posts, users и about с замером задержек.
+
+run() обходит маршруты URLCONFS, подставляя в параметры объекты из базы
+(самый обсуждаемый пост, самого популярного автора, самую большую группу,
+ссылку сброса пароля пользователя), и запрашивает каждую страницу
+анонимно и от имени пользователя: тестовым клиентом в этом процессе или
+по HTTP у запущенного сервера. Для страницы считаются p50/p95/p99
+задержки, статусы ответов, SQL на запрос и пик памяти одного запроса -
+последние два только в процессе (память - отдельным проходом под
+tracemalloc, чтобы не искажать задержки). Результат - словарь для JSON;
+два таких результата сравнивает compare().
+"""
+import collections
+import datetime
+import http.cookiejar
+import importlib
+import platform
+import re
+import statistics
+import subprocess
+import time
+import tracemalloc
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from django import conf
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from posts import seed
+from posts.models import Comment, Follow, Group, Post, User
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+URLCONFS = ('posts.urls', 'users.urls', 'about.urls')
+# Поток событий не заканчивается сам, а выход разлогинивает клиента.
+SKIPPED = ('posts:live', 'users:logout')
+CSRF_INPUT = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def parameters(user):
+    """Значения параметров маршрутов: самые нагруженные объекты базы."""
+    post = Post.objects.order_by('-comment_count', '-pk').first()
+    group = Group.objects.order_by('-post_count', '-pk').first()
+    author = User.objects.filter(counters__isnull=False).order_by(
+        '-counters__followers', 'pk',
+    ).first()
+    values = {
+        'post_id': post and post.pk,
+        'slug': group and group.slug,
+        'username': author and author.username,
+    }
+    if user is not None:
+        values['uidb64'] = urlsafe_base64_encode(force_bytes(user.pk))
+        values['token'] = default_token_generator.make_token(user)
+    return values
+
+
+def urls(values):
+    """(имя маршрута, адрес) для всех маршрутов URLCONFS."""
+    for urlconf in URLCONFS:
+        module = importlib.import_module(urlconf)
+        for pattern in module.urlpatterns:
+            name = f'{module.app_name}:{pattern.name}'
+            kwargs = {
+                key: values.get(key) for key in pattern.pattern.converters
+            }
+            if name in SKIPPED or None in kwargs.values():
+                continue
+            yield name, reverse(name, kwargs=kwargs)
+
+
+class LocalClient:
+    """Тестовый клиент в этом процессе: считает SQL и память."""
+
+    def __init__(self, user=None):
+        self.client = Client()
+        if user is not None:
+            self.client.force_login(user)
+
+    def get(self, url):
+        queries = 0
+
+        def count(execute, *args):
+            nonlocal queries
+            queries += 1
+            return execute(*args)
+
+        for connection in connections.all():
+            connection.execute_wrappers.append(count)
+        try:
+            response = self.client.get(url)
+        finally:
+            for connection in connections.all():
+                connection.execute_wrappers.remove(count)
+        return response.status_code, queries
+
+    def memory(self, url):
+        tracemalloc.start()
+        try:
+            self.client.get(url)
+            return tracemalloc.get_traced_memory()[1] // 1024
+        finally:
+            tracemalloc.stop()
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class ServerClient:
+    """HTTP к запущенному серверу; входит формой логина."""
+
+    def __init__(self, base_url, user=None):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+            _NoRedirect,
+        )
+        if user is not None:
+            self.login(user)
+
+    def open(self, url, data=None):
+        try:
+            with self.opener.open(self.base_url + url, data) as response:
+                return response.status, response.read().decode()
+        except urllib.error.HTTPError as error:
+            return error.code, ''
+
+    def login(self, user):
+        url = reverse('users:login')
+        _, page = self.open(url)
+        self.open(url, urllib.parse.urlencode({
+            'csrfmiddlewaretoken': CSRF_INPUT.search(page).group(1),
+            'username': user.username,
+            'password': seed.PASSWORD,
+        }).encode())
+
+    def get(self, url):
+        return self.open(url)[0], None
+
+    def memory(self, url):
+        return None
+
+
+def measure(client, url, requests, warmup):
+    for _ in range(warmup):
+        client.get(url)
+    latencies, queries = [], []
+    statuses = collections.Counter()
+    for _ in range(requests):
+        start = time.perf_counter()
+        status, count = client.get(url)
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses[str(status)] += 1
+        queries.append(count)
+    return {
+        'url': url,
+        'p50_ms': round(percentile(latencies, 0.5), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'mean_ms': round(statistics.mean(latencies), 3),
+        'queries': None if None in queries else statistics.mean(queries),
+        'memory_kb': client.memory(url),
+        'statuses': dict(statuses),
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=conf.settings.BASE_DIR, capture_output=True, text=True,
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(user=None, server=None, requests=50, warmup=5):
+    """Замеры всех страниц: {'meta': ..., 'pages': {имя: {роль: ...}}}."""
+    values = parameters(user)
+    roles = {'anonymous': None}
+    if user is not None:
+        roles['user'] = user
+    pages = collections.defaultdict(dict)
+    for role, role_user in roles.items():
+        for name, url in urls(values):
+            # Свой клиент на страницу: подписка и отписка не влияют на
+            # следующие страницы.
+            if server:
+                client = ServerClient(server, role_user)
+            else:
+                client = LocalClient(role_user)
+            pages[name][role] = measure(client, url, requests, warmup)
+    return {
+        'meta': {
+            'commit': _commit(),
+            'date': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'target': server or 'test client',
+            'user': user and user.username,
+            'requests': requests,
+            'rows': {
+                model._meta.model_name: model.objects.count()
+                for model in (User, Group, Post, Comment, Follow)
+            },
+            'max_rss_kb': resource and resource.getrusage(
+                resource.RUSAGE_SELF,
+            ).ru_maxrss,
+        },
+        'pages': dict(pages),
+    }
+
+
+def compare(old, new, field='p95_ms'):
+    """(страница, роль, было, стало, изменение в %) по общим страницам."""
+    for name, roles in new['pages'].items():
+        for role, result in roles.items():
+            before = old['pages'].get(name, {}).get(role)
+            if before is None or not before[field]:
+                continue
+            change = (result[field] / before[field] - 1) * 100
+            yield name, role, before[field], result[field], change
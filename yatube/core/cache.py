@@ -0,0 +1,175 @@
+import itertools
+import os
+import pickle
+import re
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+class SQLiteCache(BaseCache):
+    """Кэш в файле SQLite, общий для всех процессов одной машины.
+
+    Замена Redis/memcached для тестов и установок на одном сервере: все
+    воркеры видят одни и те же записи, а incr() атомарен между процессами,
+    поэтому на нём работают счётчики поколений (posts.generations).
+
+    Каждый KEY_PREFIX (пространство имён из settings.CACHES) хранится в
+    своей таблице: MAX_ENTRIES, вытеснение и clear() касаются только его.
+    Размер таблицы проверяется раз в CULL_EVERY записей процесса, а не
+    при каждой.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+        self._table = 'cache_' + re.sub(
+            r'[^0-9A-Za-z_]', '_', self.key_prefix or 'default',
+        )
+        options = params.get('OPTIONS') or {}
+        self._cull_every = int(options.get('CULL_EVERY', 100))
+        self._writes = itertools.count()
+
+    def _connection(self):
+        # Соединение своё у каждого потока и у каждого процесса после fork.
+        pid, connection = getattr(self._local, 'connection', (None, None))
+        if pid != os.getpid():
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(
+                self._path, timeout=30, isolation_level=None,
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                f'CREATE TABLE IF NOT EXISTS {self._table} ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)'
+            )
+            connection.execute(
+                f'CREATE INDEX IF NOT EXISTS {self._table}_expires '
+                f'ON {self._table} (expires)'
+            )
+            self._local.connection = os.getpid(), connection
+        return connection
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _live(self, connection, key):
+        row = connection.execute(
+            f'SELECT value, expires FROM {self._table} WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] is not None and row[1] <= time.time():
+            connection.execute(
+                f'DELETE FROM {self._table} WHERE key = ?', (key,),
+            )
+            return None
+        return row
+
+    def _cull(self, connection):
+        if next(self._writes) % self._cull_every:
+            return
+        count, = connection.execute(
+            f'SELECT COUNT(*) FROM {self._table}'
+        ).fetchone()
+        if count < self._max_entries:
+            return
+        connection.execute(
+            f'DELETE FROM {self._table} WHERE expires <= ?', (time.time(),)
+        )
+        if self._cull_frequency:
+            connection.execute(
+                f'DELETE FROM {self._table} WHERE key IN (SELECT key '
+                f'FROM {self._table} ORDER BY expires IS NULL, expires '
+                'LIMIT ?)',
+                (count // self._cull_frequency,),
+            )
+
+    def get(self, key, default=None, version=None):
+        row = self._live(self._connection(), self._key(key, version))
+        return default if row is None else pickle.loads(row[0])
+
+    def get_many(self, keys, version=None):
+        mapping = {self._key(key, version): key for key in keys}
+        if not mapping:
+            return {}
+        rows = self._connection().execute(
+            f'SELECT key, value FROM {self._table} WHERE key IN (%s) '
+            'AND (expires IS NULL OR expires > ?)'
+            % ', '.join('?' * len(mapping)),
+            (*mapping, time.time()),
+        )
+        return {mapping[key]: pickle.loads(value) for key, value in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        connection = self._connection()
+        with connection:
+            self._cull(connection)
+            connection.execute(
+                f'INSERT OR REPLACE INTO {self._table} VALUES (?, ?, ?)',
+                (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                 self.get_backend_timeout(timeout)),
+            )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        with connection:
+            if self._live(connection, key) is not None:
+                return False
+            self._cull(connection)
+            connection.execute(
+                f'INSERT INTO {self._table} VALUES (?, ?, ?)',
+                (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                 self.get_backend_timeout(timeout)),
+            )
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        cursor = self._connection().execute(
+            f'UPDATE {self._table} SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), self._key(key, version),
+             time.time()),
+        )
+        return bool(cursor.rowcount)
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        with connection:
+            row = self._live(connection, key)
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            connection.execute(
+                f'UPDATE {self._table} SET value = ? WHERE key = ?',
+                (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), key),
+            )
+        return value
+
+    def has_key(self, key, version=None):
+        return self._live(
+            self._connection(), self._key(key, version)
+        ) is not None
+
+    def delete(self, key, version=None):
+        cursor = self._connection().execute(
+            f'DELETE FROM {self._table} WHERE key = ?',
+            (self._key(key, version),),
+        )
+        return bool(cursor.rowcount)
+
+    def clear(self):
+        self._connection().execute(f'DELETE FROM {self._table}')
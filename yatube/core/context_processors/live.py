@@ -0,0 +1,8 @@
+from django import conf
+
+
+def live(request):
+    """Включена ли живая лента новых постов (LIVE_UPDATES)."""
+    return {
+        'live_updates': conf.settings.LIVE_UPDATES,
+    }
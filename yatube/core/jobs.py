@@ -0,0 +1,204 @@
+"""Фоновые задачи в очереди на основной БД, без внешнего брокера.
+
+enqueue() сохраняет задачу строкой Job в той же транзакции, что и
+данные, поэтому задача не теряется при падении процесса и не выполнится
+для отменённой транзакции. Задача - функция уровня модуля с аргументами,
+которые сериализуются в JSON; воркер находит её по пути вида
+'posts.thumbnails.generate'.
+
+Воркеры (команда run_workers) забирают задачи условным UPDATE, который
+проходит только у одного из них, и держат их JOBS_TIMEOUT секунд: задачу
+упавшего воркера потом заберёт другой. Упавшая задача повторяется с
+экспоненциальной задержкой до max_attempts раз. Задача с ключом key
+ставится один раз, пока её строка не удалена purge(). Периодические
+задачи из JOBS_SCHEDULE ставятся воркерами с ключом по интервалу, так
+что каждая выполняется раз в интервал при любом числе воркеров.
+
+С JOBS_EAGER (его включают тесты) задачи выполняются сразу при
+постановке, и их исключения получает вызывающий код.
+"""
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django import conf
+from django.core.mail import EmailMultiAlternatives
+from django.db import close_old_connections, router
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_scheduled = {}
+
+
+def name_of(task):
+    if isinstance(task, str):
+        return task
+    return f'{task.__module__}.{task.__qualname__}'
+
+
+def _jobs():
+    # Очередь читается и пишется только на основной БД: реплика отстаёт.
+    return Job.objects.db_manager(router.db_for_write(Job))
+
+
+def enqueue(task, *args, key=None, run_at=None, delay=None,
+            max_attempts=None):
+    """Ставит task(*args) в очередь и возвращает Job.
+
+    run_at или delay (секунды) откладывают запуск. Если задача с таким
+    key уже есть, новая не ставится и возвращается существующая.
+    """
+    name = name_of(task)
+    if conf.settings.JOBS_EAGER:
+        import_string(name)(*args)
+        return None
+    if run_at is None:
+        run_at = timezone.now() + timedelta(seconds=delay or 0)
+    fields = {
+        'task': name,
+        'args': json.dumps(args),
+        'run_at': run_at,
+        'max_attempts': max_attempts or conf.settings.JOBS_MAX_ATTEMPTS,
+    }
+    if key is None:
+        return _jobs().create(**fields)
+    return _jobs().get_or_create(key=key, defaults=fields)[0]
+
+
+def backoff(attempt):
+    """Задержка перед повтором после attempt-й неудачи, в секундах."""
+    delay = min(
+        conf.settings.JOBS_RETRY_DELAY * 2 ** (attempt - 1),
+        conf.settings.JOBS_RETRY_MAX_DELAY,
+    )
+    # Разброс, чтобы задачи, упавшие вместе, не повторялись вместе.
+    return delay * random.uniform(1, 1.25)
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+
+def claim(worker):
+    """Забирает следующую готовую задачу или возвращает None."""
+    now = timezone.now()
+    ready = Q(status=Job.QUEUED, run_at__lte=now) | Q(
+        status=Job.RUNNING, locked_until__lt=now,
+    )
+    candidates = list(
+        _jobs().filter(ready).order_by('run_at').values_list(
+            'pk', flat=True,
+        )[:conf.settings.JOBS_CLAIM_BATCH]
+    )
+    for pk in candidates:
+        # Кто-то мог забрать задачу после выборки - тогда строк 0.
+        if _jobs().filter(ready, pk=pk).update(
+            status=Job.RUNNING,
+            locked_by=worker,
+            locked_until=now + timedelta(seconds=conf.settings.JOBS_TIMEOUT),
+            attempts=F('attempts') + 1,
+        ):
+            return _jobs().get(pk=pk)
+    return None
+
+
+def _finish(job, worker, **fields):
+    return _jobs().filter(
+        pk=job.pk, status=Job.RUNNING, locked_by=worker,
+    ).update(locked_until=None, **fields)
+
+
+def execute(job, worker):
+    """Выполняет забранную задачу и записывает результат."""
+    if job.attempts > job.max_attempts:
+        # Задача исчерпала попытки, роняя или подвешивая воркеры.
+        _finish(
+            job, worker, status=Job.FAILED, finished=timezone.now(),
+            error=job.error or 'Превышено время выполнения',
+        )
+        return
+    try:
+        import_string(job.task)(*json.loads(job.args))
+    except Exception:
+        logger.exception(
+            'Задача %s (попытка %s) не выполнена', job.task, job.attempts,
+        )
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            _finish(
+                job, worker, status=Job.FAILED, finished=timezone.now(),
+                error=error,
+            )
+        else:
+            _finish(
+                job, worker, status=Job.QUEUED, error=error,
+                run_at=timezone.now() + timedelta(
+                    seconds=backoff(job.attempts),
+                ),
+            )
+        return
+    _finish(job, worker, status=Job.DONE, finished=timezone.now())
+
+
+def schedule(now=None):
+    """Ставит периодические задачи JOBS_SCHEDULE, чей интервал наступил."""
+    now = now or timezone.now()
+    for task, interval in conf.settings.JOBS_SCHEDULE.items():
+        slot = int(now.timestamp() // interval)
+        # Процесс ставит задачу на интервал один раз, остальные отсеет ключ.
+        if _scheduled.get(task) == slot:
+            continue
+        enqueue(task, key=f'schedule:{task}:{slot}', run_at=now)
+        _scheduled[task] = slot
+
+
+def work(worker=None, stop=None, burst=False):
+    """Цикл воркера: выполняет задачи, пока не установлен stop.
+
+    С burst возвращается, как только готовых задач не осталось.
+    Отдаёт число выполненных задач.
+    """
+    worker = worker or worker_name()
+    stop = stop or threading.Event()
+    done = 0
+    while not stop.is_set():
+        close_old_connections()
+        schedule()
+        job = claim(worker)
+        if job is None:
+            if burst:
+                break
+            stop.wait(conf.settings.JOBS_POLL_SECONDS)
+            continue
+        execute(job, worker)
+        done += 1
+    close_old_connections()
+    return done
+
+
+def purge():
+    """Удаляет завершённые задачи старше JOBS_KEEP_SECONDS."""
+    _jobs().filter(
+        status__in=[Job.DONE, Job.FAILED],
+        finished__lt=timezone.now() - timedelta(
+            seconds=conf.settings.JOBS_KEEP_SECONDS,
+        ),
+    ).delete()
+
+
+def send_email(subject, body, from_email, to, html=None):
+    """Отправляет письмо через EMAIL_BACKEND."""
+    message = EmailMultiAlternatives(subject, body, from_email, to)
+    if html:
+        message.attach_alternative(html, 'text/html')
+    message.send()
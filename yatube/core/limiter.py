@@ -0,0 +1,134 @@
+"""Адаптивный лимит одновременных запросов и сброс лишней нагрузки.
+
+Запросы делятся на классы (LOAD_LIMITS): анонимное чтение, чтение
+авторизованных, записи и админка. У каждого класса свой лимит
+одновременных запросов, который подстраивается по AIMD: запрос, уложившийся
+в целевую задержку класса, поднимает лимит на 1/limit (примерно +1 за
+окно), медленный - умножает его на BACKOFF. Так лимит держится у той
+параллельности, которую база выдерживает без очереди.
+
+Запрос сверх лимита не ждёт: анонимному чтению отдаётся сохранённая
+(пусть и устаревшая) страница из LOAD_STALE_RESPONSE, остальным - быстрый
+503 с Retry-After. Лимиты разных классов не делят бюджет, поэтому наплыв
+анонимов не вытесняет записи и админку.
+"""
+import collections
+import threading
+import time
+
+from django import conf
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+BACKOFF = 0.9
+LATENCY_WINDOW = 500
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_limits = None
+_limits_lock = threading.Lock()
+
+
+class AdaptiveLimit:
+    def __init__(self, initial, minimum, maximum, target):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target = target
+        self.in_flight = 0
+        self.admitted = 0
+        self.shed = 0
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self.in_flight >= int(self.limit):
+                self.shed += 1
+                return False
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+
+    def release(self, latency):
+        with self._lock:
+            self.in_flight -= 1
+            self.latencies.append(latency)
+            if latency <= self.target:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            else:
+                self.limit = max(self.minimum, self.limit * BACKOFF)
+
+    def state(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+            return {
+                'limit': int(self.limit),
+                'in_flight': self.in_flight,
+                'admitted': self.admitted,
+                'shed': self.shed,
+                'p99': latencies[int(len(latencies) * 0.99)]
+                if latencies else None,
+            }
+
+
+def limits():
+    """Лимиты классов запросов процесса, создаются из LOAD_LIMITS."""
+    global _limits
+    with _limits_lock:
+        if _limits is None:
+            _limits = {
+                name: AdaptiveLimit(**options)
+                for name, options in conf.settings.LOAD_LIMITS.items()
+            }
+        return _limits
+
+
+def state():
+    return {name: limit.state() for name, limit in limits().items()}
+
+
+def classify(request):
+    if request.path.startswith(reverse('admin:index')):
+        return 'admin'
+    if request.method not in READ_METHODS:
+        return 'write'
+    if request.user.is_authenticated:
+        return 'authenticated'
+    return 'anonymous'
+
+
+def overloaded(request):
+    stale = import_string(conf.settings.LOAD_STALE_RESPONSE)(request)
+    if stale is not None:
+        stale['Warning'] = '110 - "Response is Stale"'
+        return stale
+    response = HttpResponse(
+        'Сервер перегружен, повторите запрос позже.',
+        status=503,
+        content_type='text/plain; charset=utf-8',
+    )
+    response['Retry-After'] = conf.settings.LOAD_RETRY_AFTER
+    return response
+
+
+class LoadSheddingMiddleware:
+    def __init__(self, get_response, limits=None):
+        self.get_response = get_response
+        self._limits = limits
+
+    @property
+    def limits(self):
+        return limits() if self._limits is None else self._limits
+
+    def __call__(self, request):
+        limit = self.limits.get(classify(request))
+        if limit is None:
+            return self.get_response(request)
+        if not limit.acquire():
+            return overloaded(request)
+        start = time.monotonic()
+        try:
+            return self.get_response(request)
+        finally:
+            limit.release(time.monotonic() - start)
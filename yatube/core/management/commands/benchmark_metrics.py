@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import (
+    modify_settings, override_settings, setup_test_environment,
+)
+
+from core import metrics
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет накладные расходы core.metrics: запросов в секунду к '
+        'странице с MetricsMiddleware и без неё.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/', help='Адрес страницы.')
+        parser.add_argument(
+            '--user', help='Имя пользователя, от которого идут запросы.',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=500,
+            help='Сколько раз запросить страницу за раунд.',
+        )
+        parser.add_argument(
+            '--rounds', type=int, default=5,
+            help='Раундов каждого варианта; берётся лучший.',
+        )
+
+    def client(self, user):
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        return client
+
+    def measure(self, client, url, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            client.get(url)
+        return repeat / (time.perf_counter() - start)
+
+    @override_settings(DEBUG=False)
+    def handle(self, *args, **options):
+        setup_test_environment()
+        url, repeat = options['url'], options['repeat']
+        user = options['user'] and User.objects.get(username=options['user'])
+        with modify_settings(MIDDLEWARE={
+            'remove': 'core.metrics.MetricsMiddleware',
+        }):
+            bare_client = self.client(user)
+            bare_client.get(url)
+        measured_client = self.client(user)
+        measured_client.get(url)
+        bare = measured = 0
+        # Раунды чередуются, чтобы прогрев и фоновые помехи делились поровну.
+        for _ in range(options['rounds']):
+            bare = max(bare, self.measure(bare_client, url, repeat))
+            measured = max(
+                measured, self.measure(measured_client, url, repeat),
+            )
+        metrics.reset()
+        self.stdout.write(
+            f'без метрик: {bare:.0f} запросов/с\n'
+            f'с метриками: {measured:.0f} запросов/с\n'
+            f'накладные расходы: {(bare / measured - 1) * 100:.1f}%'
+        )
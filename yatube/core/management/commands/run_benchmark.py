@@ -0,0 +1,81 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings, setup_test_environment
+
+from core import benchmark
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Запрашивает все страницы posts, users и about и печатает '
+        'p50/p95/p99 задержки, SQL на запрос и память.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', default='bench_0',
+            help='От чьего имени запрашивать страницы ("" - только аноним).',
+        )
+        parser.add_argument(
+            '--server',
+            help='Адрес запущенного сервера вместо тестового клиента.',
+        )
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Запросов к каждой странице.',
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=5,
+            help='Запросов для прогрева перед замером.',
+        )
+        parser.add_argument('--output', help='Записать результат в JSON.')
+        parser.add_argument(
+            '--compare', help='JSON прошлого прогона для сравнения p95.',
+        )
+
+    @override_settings(DEBUG=False)
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(
+                    f'Нет пользователя {options["user"]}: заполните базу '
+                    'командой seed_benchmark или укажите --user.'
+                )
+        if not options['server']:
+            setup_test_environment()
+        result = benchmark.run(
+            user=user,
+            server=options['server'],
+            requests=options['requests'],
+            warmup=options['warmup'],
+        )
+        for name, roles in result['pages'].items():
+            for role, page in roles.items():
+                # По HTTP SQL и память сервера не видны.
+                queries, memory = (
+                    '-' if page[key] is None else page[key]
+                    for key in ('queries', 'memory_kb')
+                )
+                self.stdout.write(
+                    f'{name:32} {role:9} '
+                    f'p50 {page["p50_ms"]:8.2f} p95 {page["p95_ms"]:8.2f} '
+                    f'p99 {page["p99_ms"]:8.2f} мс  '
+                    f'SQL {queries}  память {memory} КБ  {page["statuses"]}'
+                )
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(result, file, ensure_ascii=False, indent=2)
+        if options['compare']:
+            with open(options['compare']) as file:
+                old = json.load(file)
+            for name, role, before, after, change in benchmark.compare(
+                old, result,
+            ):
+                self.stdout.write(
+                    f'{name:32} {role:9} p95 {before:8.2f} -> {after:8.2f} мс '
+                    f'({change:+.1f}%)'
+                )
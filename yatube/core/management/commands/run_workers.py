@@ -0,0 +1,105 @@
+import multiprocessing
+import signal
+import time
+
+from django import conf
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core import jobs
+
+
+class _Stop:
+    """Флаг остановки, который безопасно ставить из обработчика сигнала.
+
+    threading.Event и Event из multiprocessing для этого не годятся: их
+    блокировки может держать основной поток, прерванный сигналом.
+    """
+
+    def __init__(self):
+        self.stopped = False
+
+    def set(self, *args):
+        self.stopped = True
+
+    def is_set(self):
+        return self.stopped
+
+    def wait(self, timeout):
+        time.sleep(timeout)
+
+
+def _process(burst):
+    # Ctrl+C получает вся группа процессов, но воркеры останавливает
+    # родитель, посылая SIGTERM: текущая задача доработает до конца.
+    stop = _Stop()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, stop.set)
+    jobs.work(stop=stop, burst=burst)
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает воркеры фоновых задач (core.jobs) и ставит '
+        'периодические задачи из JOBS_SCHEDULE.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int,
+            default=conf.settings.JOBS_CONCURRENCY,
+            help='Число процессов-воркеров (1 - в этом процессе).',
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Выйти, когда готовых задач не останется.',
+        )
+
+    def handle(self, *args, **options):
+        if conf.settings.JOBS_EAGER:
+            raise CommandError(
+                'JOBS_EAGER включён: задачи выполняются при постановке, '
+                'воркерам нечего делать. Запустите с JOBS_EAGER=0.'
+            )
+        concurrency = options['concurrency']
+        if concurrency < 1:
+            raise CommandError('--concurrency должен быть не меньше 1.')
+        stopping = _Stop()
+        handlers = {
+            signum: signal.signal(signum, stopping.set)
+            for signum in (signal.SIGINT, signal.SIGTERM)
+        }
+        try:
+            if concurrency == 1:
+                done = jobs.work(stop=stopping, burst=options['burst'])
+                self.stdout.write(f'Выполнено задач: {done}')
+            else:
+                self.pool(stopping, concurrency, options['burst'])
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+
+    def pool(self, stopping, concurrency, burst):
+        context = multiprocessing.get_context('fork')
+        # Соединения родителя не должны достаться дочерним процессам.
+        connections.close_all()
+
+        def start():
+            worker = context.Process(
+                target=_process, args=(burst,), daemon=True,
+            )
+            worker.start()
+            return worker
+
+        workers = [start() for _ in range(concurrency)]
+        while workers and not stopping.is_set():
+            time.sleep(1)
+            alive = [worker for worker in workers if worker.is_alive()]
+            if not burst and not stopping.is_set():
+                # Упавший воркер заменяется новым.
+                alive += [start() for _ in range(len(workers) - len(alive))]
+            workers = alive
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.join()
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core import replicas
+
+
+class Command(BaseCommand):
+    help = 'Копирует основную SQLite-БД в файлы реплик.'
+
+    def handle(self, *args, **options):
+        for alias in replicas.sync_all():
+            self.stdout.write(f'{alias}: синхронизирована')
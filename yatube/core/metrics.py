@@ -0,0 +1,365 @@
+"""Метрики запросов для продакшена: задержка, SQL, шаблоны, кэш.
+
+MetricsMiddleware стоит первым в MIDDLEWARE и для каждого запроса
+собирает по имени представления (posts:index, api:posts, ...) время
+ответа, число и время SQL-запросов, время рендеринга шаблонов, попадания
+и промахи кэша. Всё складывается в гистограммы и счётчики процесса,
+которые /status/metrics/ отдаёт в текстовом формате Prometheus. Ответ
+из кэша страниц (posts.pagecache) ниже ничего не запускал и попадает
+только в гистограмму page_cache_seconds, без представления. Запрос
+дольше METRICS_SLOW_SECONDS с вероятностью METRICS_SLOW_SAMPLE попадает
+в лог core.metrics вместе с самыми медленными SQL.
+
+SQL замеряет обёртка выполнения на каждом соединении, рендеринг - шаблонный
+бэкенд DjangoTemplates этого модуля, кэш - обёртки get()/get_many()
+у экземпляров, которые создаёт django.core.cache.caches (всё подключает
+install()); классы бэкендов не меняются.
+Время рендеринга миниатюр пишется в thumbnail_seconds без представления.
+Миниатюры рисуют воркеры фоновых задач, у которых нет /status/metrics/,
+поэтому такие замеры (shared=True) копятся в БД, в SharedHistogram, и
+веб-процесс отдаёт их вместе со своими.
+"""
+import bisect
+import contextlib
+import functools
+import json
+import logging
+import random
+import threading
+import time
+
+from django import conf
+from django.core import cache as django_cache
+from django.core.cache.backends.base import BaseCache
+from django.db import router, transaction
+from django.db.backends.signals import connection_created
+from django.template.backends import django as django_backend
+from django.urls import Resolver404, resolve
+
+from . import limiter
+from .models import SharedHistogram
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'yatube_'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SLOW_QUERIES = 5
+RESOLVED_PATHS = 1024
+
+_local = threading.local()
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+_missing = object()
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # Последняя корзина - +Inf.
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class RequestStats:
+    """Что набралось за один запрос."""
+
+    def __init__(self):
+        self.queries = []
+        self.template_seconds = 0
+        self.rendering = False
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+def current():
+    return getattr(_local, 'stats', None)
+
+
+def _observe(name, labels, value, buckets):
+    histogram = _histograms.get((name, labels))
+    if histogram is None:
+        histogram = _histograms[name, labels] = Histogram(buckets)
+    histogram.observe(value)
+
+
+def _increment(name, labels, value=1):
+    _counters[name, labels] = _counters.get((name, labels), 0) + value
+
+
+def observe(name, value, buckets=TIME_BUCKETS, **labels):
+    with _lock:
+        _observe(name, tuple(sorted(labels.items())), value, buckets)
+
+
+def observe_shared(name, value, buckets=TIME_BUCKETS):
+    """Замер в гистограмму SharedHistogram, общую для всех процессов."""
+    database = router.db_for_write(SharedHistogram)
+    with transaction.atomic(using=database):
+        histogram, _ = SharedHistogram.objects.using(
+            database,
+        ).select_for_update().get_or_create(name=name, defaults={
+            'buckets': json.dumps(buckets),
+            'counts': json.dumps([0] * (len(buckets) + 1)),
+        })
+        counts = json.loads(histogram.counts)
+        counts[bisect.bisect_left(json.loads(histogram.buckets), value)] += 1
+        histogram.counts = json.dumps(counts)
+        histogram.sum += value
+        histogram.save(update_fields=['counts', 'sum'])
+
+
+@contextlib.contextmanager
+def timer(name, shared=False, **labels):
+    """Замеряет время блока; shared пишет его в SharedHistogram."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if shared:
+            observe_shared(name, time.perf_counter() - start)
+        else:
+            observe(name, time.perf_counter() - start, **labels)
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def _execute(execute, sql, params, many, context):
+    stats = current()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries.append((time.perf_counter() - start, sql))
+
+
+def _instrument(sender, connection, **kwargs):
+    # Обёртка остаётся на соединении и срабатывает только внутри запроса.
+    if _execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute)
+
+
+class Template(django_backend.Template):
+    def render(self, context=None, request=None):
+        stats = current()
+        # Вложенный рендеринг уже входит во время внешнего.
+        if stats is None or stats.rendering:
+            return super().render(context, request)
+        stats.rendering = True
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.template_seconds += time.perf_counter() - start
+            stats.rendering = False
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """Обычный бэкенд Django, шаблоны которого замеряют рендеринг."""
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return Template(super().get_template(template_name).template, self)
+
+
+def _count(cache):
+    """Обёртывает get()/get_many() экземпляра кэша счётом попаданий."""
+    if getattr(cache, '_metrics_counted', False):
+        return cache
+    get = cache.get
+
+    def counting_get(key, default=None, version=None, **kwargs):
+        value = get(key, _missing, version, **kwargs)
+        stats = current()
+        if stats is not None:
+            if value is _missing:
+                stats.cache_misses += 1
+            else:
+                stats.cache_hits += 1
+        return default if value is _missing else value
+
+    cache.get = counting_get
+    # BaseCache.get_many сам вызывает get() - не считаем дважды.
+    if type(cache).get_many is not BaseCache.get_many:
+        get_many = cache.get_many
+
+        def counting_get_many(keys, *args, **kwargs):
+            keys = list(keys)
+            found = get_many(keys, *args, **kwargs)
+            stats = current()
+            if stats is not None:
+                stats.cache_hits += len(found)
+                stats.cache_misses += len(keys) - len(found)
+            return found
+
+        cache.get_many = counting_get_many
+    cache._metrics_counted = True
+    return cache
+
+
+class CacheHandler(django_cache.CacheHandler):
+    """caches[...], отдающий экземпляры кэшей со счётом попаданий."""
+
+    def __getitem__(self, alias):
+        return _count(super().__getitem__(alias))
+
+
+def install():
+    """Подключает замер SQL и счёт попаданий у кэшей из caches[...]."""
+    connection_created.connect(_instrument)
+    # Модули держат ссылку на сам объект caches, поэтому меняется его
+    # класс, а не атрибут модуля.
+    handler = django_cache.caches
+    if not isinstance(handler, CacheHandler):
+        handler.__class__ = CacheHandler
+    for cache in handler.all():
+        _count(cache)
+
+
+@functools.lru_cache(maxsize=RESOLVED_PATHS)
+def _resolve_view(path):
+    try:
+        return resolve(path).view_name
+    except Resolver404:
+        return 'unresolved'
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        # Сброс нагрузки - до URL-резолвера.
+        return _resolve_view(request.path_info)
+    return match.view_name
+
+
+def record_page_cache(seconds):
+    with _lock:
+        _observe('page_cache_seconds', (), seconds, TIME_BUCKETS)
+
+
+def record(view, seconds, stats, status):
+    db_seconds = sum(duration for duration, _ in stats.queries)
+    labels = (('view', view),)
+    with _lock:
+        _observe('request_seconds', labels, seconds, TIME_BUCKETS)
+        _observe('db_queries', labels, len(stats.queries), COUNT_BUCKETS)
+        _observe('db_seconds', labels, db_seconds, TIME_BUCKETS)
+        _observe(
+            'template_seconds', labels, stats.template_seconds, TIME_BUCKETS,
+        )
+        _increment('requests_total', labels + (('status', str(status)),))
+        _increment('cache_hits_total', labels, stats.cache_hits)
+        _increment('cache_misses_total', labels, stats.cache_misses)
+    if (
+        seconds >= conf.settings.METRICS_SLOW_SECONDS
+        and random.random() < conf.settings.METRICS_SLOW_SAMPLE
+    ):
+        slowest = sorted(stats.queries, reverse=True)[:SLOW_QUERIES]
+        logger.warning(
+            'Медленный запрос %s: %.3f с, SQL: %d за %.3f с, шаблоны %.3f с%s',
+            view, seconds, len(stats.queries), db_seconds,
+            stats.template_seconds,
+            ''.join(
+                f'\n  {duration:.3f} с: {sql}' for duration, sql in slowest
+            ),
+        )
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = _local.stats = RequestStats()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _local.stats = None
+        if getattr(request, 'page_cache_hit', False):
+            # Ниже кэша страниц ничего не работало: разбивка не нужна.
+            record_page_cache(time.perf_counter() - start)
+            return response
+        record(
+            view_name(request), time.perf_counter() - start, stats,
+            response.status_code,
+        )
+        return response
+
+
+def _labels(labels):
+    return ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\')
+                         .replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+
+
+def _sample(name, labels, value):
+    if labels:
+        return f'{PREFIX}{name}{{{_labels(labels)}}} {value}'
+    return f'{PREFIX}{name} {value}'
+
+
+def exposition():
+    """Метрики процесса и общие гистограммы в текстовом формате Prometheus."""
+    with _lock:
+        histograms = [
+            (key, histogram.buckets, list(histogram.counts), histogram.sum)
+            for key, histogram in _histograms.items()
+        ]
+        counters = list(_counters.items())
+    shared = SharedHistogram.objects.values_list(
+        'name', 'buckets', 'counts', 'sum',
+    )
+    histograms += [
+        ((name, ()), tuple(json.loads(buckets)), json.loads(counts), total)
+        for name, buckets, counts, total in shared
+    ]
+    lines = []
+    typed = set()
+    for (name, labels), buckets, counts, total in sorted(histograms):
+        if name not in typed:
+            typed.add(name)
+            lines.append(f'# TYPE {PREFIX}{name} histogram')
+        cumulative = 0
+        for bound, count in zip(buckets + ('+Inf',), counts):
+            cumulative += count
+            lines.append(_sample(
+                f'{name}_bucket', labels + (('le', bound),), cumulative,
+            ))
+        lines.append(_sample(f'{name}_sum', labels, total))
+        lines.append(_sample(f'{name}_count', labels, cumulative))
+    for (name, labels), value in sorted(counters):
+        if name not in typed:
+            typed.add(name)
+            lines.append(f'# TYPE {PREFIX}{name} counter')
+        lines.append(_sample(name, labels, value))
+    load = limiter.state()
+    for name, kind in [
+        ['limit', 'gauge'],
+        ['in_flight', 'gauge'],
+        ['admitted', 'counter'],
+        ['shed', 'counter'],
+    ]:
+        metric = f'load_{name}_total' if kind == 'counter' else f'load_{name}'
+        lines.append(f'# TYPE {PREFIX}{metric} {kind}')
+        for request_class, values in sorted(load.items()):
+            lines.append(_sample(
+                metric, (('class', request_class),), values[name],
+            ))
+    return '\n'.join(lines) + '\n'
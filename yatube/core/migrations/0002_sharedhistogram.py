@@ -0,0 +1,27 @@
+# Generated by Django 2.2.19 on 2026-10-18 07:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SharedHistogram',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Метрика')),
+                ('buckets', models.TextField(verbose_name='Границы корзин (JSON)')),
+                ('counts', models.TextField(verbose_name='Счётчики корзин (JSON)')),
+                ('sum', models.FloatField(default=0, verbose_name='Сумма')),
+            ],
+            options={
+                'verbose_name': 'Общая гистограмма',
+                'verbose_name_plural': 'Общие гистограммы',
+            },
+        ),
+    ]
@@ -0,0 +1,117 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Задача фоновой очереди (см. core.jobs)."""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = [
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Не выполнена'),
+    ]
+
+    task = models.CharField(
+        max_length=200,
+        verbose_name='Задача',
+    )
+    args = models.TextField(
+        default='[]',
+        verbose_name='Аргументы (JSON)',
+    )
+    key = models.CharField(
+        max_length=200,
+        unique=True,
+        null=True,
+        blank=True,
+        verbose_name='Ключ идемпотентности',
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED,
+        verbose_name='Состояние',
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Запуск не раньше',
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Попыток',
+    )
+    max_attempts = models.PositiveIntegerField(
+        verbose_name='Попыток не больше',
+    )
+    locked_by = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name='Воркер',
+    )
+    locked_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Занята до',
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создана',
+    )
+    finished = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Завершена',
+    )
+
+    class Meta:
+        ordering = ('run_at',)
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = [
+            models.Index(
+                name='job_status_run_at_idx',
+                fields=['status', 'run_at'],
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.task} ({self.get_status_display()})'
+
+
+class SharedHistogram(models.Model):
+    """Гистограмма, общая для процессов (см. core.metrics.observe_shared).
+
+    Её пишут воркеры фоновых задач, а отдаёт /status/metrics/ веб-процесса.
+    """
+
+    name = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name='Метрика',
+    )
+    buckets = models.TextField(
+        verbose_name='Границы корзин (JSON)',
+    )
+    counts = models.TextField(
+        verbose_name='Счётчики корзин (JSON)',
+    )
+    sum = models.FloatField(
+        default=0,
+        verbose_name='Сумма',
+    )
+
+    class Meta:
+        verbose_name = 'Общая гистограмма'
+        verbose_name_plural = 'Общие гистограммы'
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,132 @@
+"""Поиск N+1: одинаковые по форме SQL из одного места за один запрос.
+
+QueryPatternMiddleware для доли NPLUSONE_SAMPLE запросов (в тестах - для
+всех) снимает отпечаток каждого SQL: числа, строки и списки параметров
+IN сворачиваются, так что запросы одной формы совпадают. Отпечаток
+считается вместе с местом, откуда запрос пришёл, - строкой шаблона и
+строкой кода проекта (обёртки БД из core пропускаются). Если одна такая
+тройка повторилась больше NPLUSONE_THRESHOLD раз, это N+1: с
+NPLUSONE_RAISE (тесты) запрос падает с NPlusOneError, иначе в лог
+core.nplusone уходит предупреждение со стеком.
+"""
+import collections
+import contextlib
+import logging
+import os
+import random
+import re
+import sys
+import traceback
+
+from django import conf
+from django.db import connections
+from django.template.base import Node
+
+logger = logging.getLogger(__name__)
+
+CORE_DIR = os.path.dirname(os.path.abspath(__file__))
+SKIPPED = tuple(
+    os.path.join(CORE_DIR, name)
+    for name in ('backends', 'metrics.py', 'nplusone.py')
+)
+RENDER_CODE = Node.render_annotated.__code__
+
+_IN_LIST = re.compile(r'%s(?:, %s)+')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+def fingerprint(sql):
+    sql = _IN_LIST.sub('%s, ...', sql)
+    sql = _STRING.sub('?', sql)
+    return _NUMBER.sub('?', sql)
+
+
+def _project_file(filename):
+    return (
+        filename.startswith(conf.settings.BASE_DIR)
+        and not filename.startswith(SKIPPED)
+        and 'site-packages' not in filename
+    )
+
+
+def origin(frame):
+    """Строка шаблона и строка кода проекта, ближайшие к запросу."""
+    template = code = None
+    while frame is not None and (template is None or code is None):
+        if frame.f_code is RENDER_CODE:
+            node = frame.f_locals['self']
+            if template is None and node.origin is not None:
+                name = node.origin.template_name or node.origin.name
+                template = f'{name}:{node.token.lineno}'
+        elif code is None and _project_file(frame.f_code.co_filename):
+            code = f'{frame.f_code.co_filename}:{frame.f_lineno}'
+        frame = frame.f_back
+    return template, code
+
+
+def _stack(frame):
+    return [
+        summary for summary in traceback.StackSummary.extract(
+            traceback.walk_stack(frame), lookup_lines=True,
+        )
+        if _project_file(summary.filename)
+    ][::-1]
+
+
+class Detector:
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.counts = collections.Counter()
+        self.stacks = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        frame = sys._getframe(1)
+        key = (fingerprint(sql), *origin(frame))
+        self.counts[key] += 1
+        if self.counts[key] == self.threshold + 1:
+            self.stacks[key] = _stack(frame)
+        return execute(sql, params, many, context)
+
+    def report(self, request):
+        lines = []
+        for key, stack in self.stacks.items():
+            sql, template, code = key
+            lines.append(
+                f'{self.counts[key]} запросов из {template or code}: {sql}'
+            )
+            lines.extend(
+                f'  {frame.filename}:{frame.lineno} в {frame.name}'
+                for frame in stack
+            )
+        if lines:
+            return f'N+1 в {request.path}:\n' + '\n'.join(lines)
+        return None
+
+
+class QueryPatternMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        settings = conf.settings
+        if not (
+            settings.NPLUSONE_RAISE
+            or random.random() < settings.NPLUSONE_SAMPLE
+        ):
+            return self.get_response(request)
+        detector = Detector(settings.NPLUSONE_THRESHOLD)
+        with contextlib.ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(detector))
+            response = self.get_response(request)
+        report = detector.report(request)
+        if report is not None:
+            if settings.NPLUSONE_RAISE:
+                raise NPlusOneError(report)
+            logger.warning(report)
+        return response
@@ -0,0 +1,146 @@
+"""Проверка регрессий производительности по сохранённой baseline.
+
+Baseline - JSON (PERF_BASELINE) с замерами страниц core.benchmark:
+задержки p50/p95/p99, SQL на запрос и пик памяти запроса (tracemalloc),
+снятыми на фиксированной базе (posts.seed с постоянным зерном). check()
+снимает те же замеры и сравнивает по порогам PERF_THRESHOLDS: число SQL
+не растёт совсем, память и p50 - не больше чем на заданную долю (для
+задержки ещё и не меньше чем на latency_floor_ms, чтобы шум быстрых
+страниц не валил тесты). Задержки приводятся к скорости машины: рядом с
+замерами хранится время калибровочной нагрузки, а при проверке её
+замеряют до страниц и после каждой из них и берут медиану, чтобы
+калибровка видела ту же загрузку машины, что и страницы. Если машина
+отличается от baseline больше чем в calibration раз (обычно это чужая
+нагрузка, при которой страницы замедляются непропорционально),
+задержки не проверяются вовсе - только SQL и память.
+
+С PERF_UPDATE_BASELINE=1 в окружении замеры записываются как новая
+baseline вместо сравнения.
+"""
+import json
+import os
+import statistics
+import time
+import warnings
+
+from django import conf
+from django.template import Context, Engine
+
+from . import benchmark
+
+CALIBRATION_TEMPLATE = '{% for i in items %}<p>{{ i|add:1 }}</p>{% endfor %}'
+CALIBRATION_ITEMS = 5000
+CALIBRATION_ROUNDS = 5
+
+
+def calibrate(rounds=CALIBRATION_ROUNDS):
+    """Времена rounds рендерингов фиксированного шаблона, мс."""
+    template = Engine().from_string(CALIBRATION_TEMPLATE)
+    context = Context({'items': range(CALIBRATION_ITEMS)})
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        template.render(context)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def load(path=None):
+    path = path or conf.settings.PERF_BASELINE
+    if not os.path.exists(path):
+        return {'calibration_ms': None, 'pages': {}}
+    with open(path) as file:
+        return json.load(file)
+
+
+def save(baseline, path=None):
+    with open(path or conf.settings.PERF_BASELINE, 'w') as file:
+        json.dump(baseline, file, ensure_ascii=False, indent=2, sort_keys=True)
+        file.write('\n')
+
+
+def _change(before, after):
+    return f'{before:g} -> {after:g}' + (
+        f' ({(after / before - 1) * 100:+.0f}%)' if before else ''
+    )
+
+
+def regressions(baseline, current, scale=1, thresholds=None):
+    """Строки с описанием каждой регрессии current против baseline.
+
+    С scale=None задержки не сравниваются.
+    """
+    thresholds = thresholds or conf.settings.PERF_THRESHOLDS
+    lines = []
+    for name, page in sorted(current.items()):
+        before = baseline.get(name)
+        if before is None:
+            lines.append(
+                f'{name}: нет в baseline, запишите её с '
+                'PERF_UPDATE_BASELINE=1'
+            )
+            continue
+        if page['statuses'] != before['statuses']:
+            lines.append(
+                f'{name}: статусы {before["statuses"]} -> {page["statuses"]}'
+            )
+        if page['queries'] > before['queries'] + thresholds['queries']:
+            lines.append(
+                f'{name}: SQL на запрос '
+                f'{_change(before["queries"], page["queries"])}'
+            )
+        memory_limit = before['memory_kb'] * (1 + thresholds['memory'])
+        if page['memory_kb'] > memory_limit:
+            memory = _change(before['memory_kb'], page['memory_kb'])
+            lines.append(
+                f'{name}: память {memory} КБ, '
+                f'порог +{thresholds["memory"]:.0%}'
+            )
+        if scale is None:
+            continue
+        expected = before['p50_ms'] * scale
+        latency_limit = max(
+            expected * (1 + thresholds['latency']),
+            expected + thresholds['latency_floor_ms'],
+        )
+        if page['p50_ms'] > latency_limit:
+            lines.append(
+                f'{name}: p50 {_change(round(expected, 3), page["p50_ms"])}'
+                f' мс, порог +{thresholds["latency"]:.0%}'
+            )
+    return lines
+
+
+def check(pages, requests=20, warmup=3):
+    """Замеряет страницы и падает с AssertionError на регрессиях.
+
+    pages - пары (имя, клиент core.benchmark, адрес).
+    """
+    samples = calibrate()
+    current = {}
+    for name, client, url in pages:
+        current[name] = benchmark.measure(client, url, requests, warmup)
+        samples += calibrate(rounds=2)
+    calibration = statistics.median(samples)
+    baseline = load()
+    if os.getenv('PERF_UPDATE_BASELINE'):
+        baseline['calibration_ms'] = calibration
+        baseline['pages'].update(current)
+        save(baseline)
+        return
+    scale = (
+        calibration / baseline['calibration_ms']
+        if baseline['calibration_ms'] else 1
+    )
+    limit = conf.settings.PERF_THRESHOLDS['calibration']
+    checked = 1 / limit <= scale <= limit
+    if not checked:
+        warnings.warn(
+            f'Калибровка {scale:.2f}x от baseline: задержки не проверяются.'
+        )
+    lines = regressions(baseline['pages'], current, scale if checked else None)
+    if lines:
+        raise AssertionError(
+            'Регрессии производительности '
+            f'(калибровка {scale:.2f}x от baseline):\n' + '\n'.join(lines)
+        )
@@ -0,0 +1,30 @@
+"""Локальная замена репликации для SQLite.
+
+Реплика - отдельный файл SQLite, в который sync() целиком копирует
+основную БД через backup API. Между синхронизациями реплика отстаёт,
+как настоящая, поэтому на ней проверяются маршрутизация и
+read-your-writes (core.routers) без внешних сервисов.
+"""
+import sqlite3
+
+from django import conf
+from django.db import connections
+
+from .routers import PRIMARY
+
+
+def sync(alias):
+    primary = connections[PRIMARY]
+    primary.ensure_connection()
+    connections[alias].close()
+    target = sqlite3.connect(connections[alias].settings_dict['NAME'])
+    try:
+        primary.connection.backup(target)
+    finally:
+        target.close()
+
+
+def sync_all():
+    for alias in conf.settings.DATABASE_REPLICAS:
+        sync(alias)
+        yield alias
@@ -0,0 +1,107 @@
+"""Чтение лент с реплик и read-your-writes для того, кто только что писал.
+
+ReplicaRoutingMiddleware включает чтение с реплик только на время
+GET-запроса к представлению из REPLICA_VIEWS. Все записи идут в default,
+и после записи клиент получает cookie, которая REPLICA_STICKY_SECONDS
+секунд держит все его чтения на основной БД: автор сразу видит свой пост
+в профиле, даже если реплика ещё не догнала.
+
+Запись замечает обёртка выполнения SQL на каждом соединении (её
+подключает install()) по INSERT, UPDATE, DELETE и REPLACE. Вызов
+db_for_write() сам по себе запрос не помечает: им пользуются и те, кому
+нужно только соединение с основной БД, и select_for_update().
+"""
+import random
+import re
+import threading
+
+from django import conf
+from django.db.backends.signals import connection_created
+
+PRIMARY = 'default'
+PRIMARY_COOKIE = 'use_primary'
+
+WRITE = re.compile(r'\s*(INSERT|UPDATE|DELETE|REPLACE)\b', re.IGNORECASE)
+
+_state = threading.local()
+
+
+def begin(pinned):
+    _state.pinned = pinned
+    _state.replica = False
+    _state.wrote = False
+
+
+def use_replica():
+    if not getattr(_state, 'pinned', True):
+        _state.replica = True
+
+
+def end():
+    """Сбрасывает состояние запроса и сообщает, были ли записи."""
+    wrote = getattr(_state, 'wrote', False)
+    begin(pinned=True)
+    return wrote
+
+
+def _execute(execute, sql, params, many, context):
+    # Вне запроса состояния нет, и помечать нечего.
+    if not getattr(_state, 'wrote', True) and WRITE.match(sql):
+        _state.wrote = True
+    return execute(sql, params, many, context)
+
+
+def _instrument(sender, connection, **kwargs):
+    if _execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute)
+
+
+def install():
+    """Подключает обёртку, замечающую записи, ко всем соединениям."""
+    connection_created.connect(_instrument)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = conf.settings.DATABASE_REPLICAS
+        if replicas and getattr(_state, 'replica', False):
+            return random.choice(replicas)
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики - копии default, объекты с них связываются свободно.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in conf.settings.DATABASE_REPLICAS
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        begin(pinned=PRIMARY_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = end()
+        if wrote:
+            response.set_cookie(
+                PRIMARY_COOKIE, '1',
+                max_age=conf.settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            request.method in ('GET', 'HEAD')
+            and request.resolver_match.view_name
+            in conf.settings.REPLICA_VIEWS
+        ):
+            use_replica()
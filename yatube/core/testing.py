@@ -0,0 +1,17 @@
+from django import conf
+from django.test import runner
+
+
+class DiscoverRunner(runner.DiscoverRunner):
+    """Тесты падают на N+1 (core.nplusone) в любом запросе, а фоновые
+    задачи (core.jobs) выполняются сразу при постановке."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        conf.settings.NPLUSONE_RAISE = True
+        conf.settings.JOBS_EAGER = True
+
+    def teardown_test_environment(self, **kwargs):
+        conf.settings.NPLUSONE_RAISE = False
+        conf.settings.JOBS_EAGER = False
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,54 @@
+from django.core.cache import caches
+from django.test import TestCase
+
+from posts import seed
+from posts.models import User
+from .. import benchmark
+
+
+class BenchmarkTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        caches['counters'].clear()
+        for _ in seed.seed(
+            users=20, groups=2, posts=50, comments=50, follows=3,
+        ):
+            pass
+        cls.user = User.objects.get(username='bench_1')
+
+    def setUp(self):
+        for alias in ['pages', 'fragments', 'counters']:
+            caches[alias].clear()
+
+    def test_all_pages(self):
+        result = benchmark.run(user=self.user, requests=3, warmup=1)
+        names = {
+            name for name, _ in benchmark.urls(
+                benchmark.parameters(self.user),
+            )
+        }
+        self.assertEqual(set(result['pages']), names)
+        self.assertTrue({
+            'posts:index', 'posts:post_detail', 'posts:profile',
+            'posts:group_list', 'users:password_reset_confirm',
+            'about:author',
+        } <= names)
+        self.assertFalse(set(benchmark.SKIPPED) & names)
+        index = result['pages']['posts:index']
+        self.assertEqual(set(index), {'anonymous', 'user'})
+        self.assertEqual(index['user']['statuses'], {'200': 3})
+        self.assertGreater(index['user']['queries'], 0)
+        self.assertGreater(index['user']['memory_kb'], 0)
+        self.assertLessEqual(index['user']['p50_ms'], index['user']['p99_ms'])
+        self.assertEqual(result['meta']['rows']['post'], 50)
+
+    def test_compare(self):
+        old = {'pages': {'posts:index': {'user': {'p95_ms': 10}}}}
+        new = {'pages': {
+            'posts:index': {'user': {'p95_ms': 15}},
+            'about:tech': {'user': {'p95_ms': 1}},
+        }}
+        self.assertEqual(
+            list(benchmark.compare(old, new)),
+            [('posts:index', 'user', 10, 15, 50.0)],
+        )
@@ -0,0 +1,108 @@
+import shutil
+import tempfile
+from multiprocessing import Process
+
+from django.core.cache import CacheKeyWarning
+from django.test import SimpleTestCase
+
+from ..cache import SQLiteCache
+
+
+def incr_many(location, times):
+    cache = SQLiteCache(location, {'KEY_PREFIX': 'test'})
+    for _ in range(times):
+        cache.incr('counter')
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = f'{self.directory}/cache.sqlite3'
+        self.cache = SQLiteCache(self.location, {'KEY_PREFIX': 'test'})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_basic_operations(self):
+        self.assertIsNone(self.cache.get('key'))
+        self.cache.set('key', {'value': [1, 2]})
+        self.assertEqual(self.cache.get('key'), {'value': [1, 2]})
+        self.assertFalse(self.cache.add('key', 'other'))
+        self.assertTrue(self.cache.add('new', 'value'))
+        self.assertEqual(
+            self.cache.get_many(['key', 'new', 'missing']),
+            {'key': {'value': [1, 2]}, 'new': 'value'},
+        )
+        self.assertTrue(self.cache.delete('key'))
+        self.assertFalse(self.cache.has_key('key'))
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('new'))
+
+    def test_expired_entries_are_missing(self):
+        self.cache.set('key', 'value', timeout=-1)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertTrue(self.cache.add('key', 'value', timeout=None))
+        self.assertEqual(self.cache.get('key'), 'value')
+
+    def test_entries_are_shared_between_instances(self):
+        other = SQLiteCache(self.location, {'KEY_PREFIX': 'test'})
+        self.cache.set('key', 'value')
+        self.assertEqual(other.get('key'), 'value')
+        other.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_incr_is_atomic_between_processes(self):
+        self.cache.set('counter', 0)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+        processes = [
+            Process(target=incr_many, args=(self.location, 50))
+            for _ in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertEqual(self.cache.get('counter'), 200)
+
+    def test_cull_keeps_size_bounded(self):
+        cache = SQLiteCache(self.location, {
+            'OPTIONS': {'MAX_ENTRIES': 10, 'CULL_EVERY': 1},
+        })
+        for i in range(30):
+            cache.set(f'key_{i}', i)
+        self.assertLessEqual(
+            sum(cache.has_key(f'key_{i}') for i in range(30)), 10,
+        )
+
+    def test_cull_is_checked_every_n_writes(self):
+        cache = SQLiteCache(self.location, {
+            'OPTIONS': {'MAX_ENTRIES': 10, 'CULL_EVERY': 20},
+        })
+        statements = []
+        cache._connection().set_trace_callback(statements.append)
+        for i in range(40):
+            cache.set(f'key_{i}', i)
+        self.assertEqual(
+            sum('COUNT(*)' in statement for statement in statements), 2,
+        )
+
+    def test_namespaces_are_culled_and_cleared_separately(self):
+        pages = SQLiteCache(self.location, {
+            'KEY_PREFIX': 'pages',
+            'OPTIONS': {'MAX_ENTRIES': 10, 'CULL_EVERY': 1},
+        })
+        sessions = SQLiteCache(self.location, {'KEY_PREFIX': 'sessions'})
+        for i in range(20):
+            sessions.set(f'session_{i}', i)
+        for i in range(100):
+            pages.set(f'page_{i}', i)
+        self.assertEqual(
+            len(sessions.get_many([f'session_{i}' for i in range(20)])), 20,
+        )
+        pages.clear()
+        self.assertEqual(sessions.get('session_0'), 0)
+
+    def test_invalid_key_warns(self):
+        with self.assertWarns(CacheKeyWarning):
+            self.cache.set('key with spaces', 'value')
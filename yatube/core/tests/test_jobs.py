@@ -0,0 +1,159 @@
+import io
+from datetime import timedelta
+
+from django.core import mail
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import User
+from .. import jobs
+from ..models import Job
+
+CALLS = []
+
+
+def record(*args):
+    CALLS.append(args)
+
+
+def fail():
+    raise ValueError('сбой')
+
+
+@override_settings(JOBS_EAGER=False, JOBS_SCHEDULE={}, JOBS_RETRY_DELAY=10)
+class JobsTest(TestCase):
+    def setUp(self):
+        CALLS.clear()
+        jobs._scheduled.clear()
+
+    def test_enqueue_and_work(self):
+        job = jobs.enqueue(record, 1, 'a')
+        self.assertEqual(job.task, 'core.tests.test_jobs.record')
+        self.assertEqual(CALLS, [])
+        self.assertEqual(jobs.work(burst=True), 1)
+        self.assertEqual(CALLS, [(1, 'a')])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNotNone(job.finished)
+
+    def test_idempotency_key(self):
+        first = jobs.enqueue(record, 1, key='once')
+        self.assertEqual(jobs.enqueue(record, 2, key='once'), first)
+        jobs.work(burst=True)
+        jobs.enqueue(record, 3, key='once')
+        jobs.work(burst=True)
+        self.assertEqual(CALLS, [(1,)])
+
+    def test_delayed(self):
+        job = jobs.enqueue(record, 'later', delay=60)
+        self.assertEqual(jobs.work(burst=True), 0)
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        self.assertEqual(jobs.work(burst=True), 1)
+        self.assertEqual(CALLS, [('later',)])
+
+    def test_retries_with_backoff(self):
+        job = jobs.enqueue(fail, max_attempts=2)
+        with self.assertLogs('core.jobs', 'ERROR'):
+            jobs.work(burst=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertGreaterEqual(
+            job.run_at, timezone.now() + timedelta(seconds=9),
+        )
+        self.assertIn('ValueError', job.error)
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs('core.jobs', 'ERROR'):
+            jobs.work(burst=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_backoff_grows_and_is_capped(self):
+        with self.settings(JOBS_RETRY_MAX_DELAY=35):
+            delays = [jobs.backoff(attempt) for attempt in (1, 2, 3, 10)]
+        self.assertTrue(10 <= delays[0] <= 12.5)
+        self.assertTrue(20 <= delays[1] <= 25)
+        self.assertTrue(35 <= delays[2] <= 35 * 1.25)
+        self.assertTrue(35 <= delays[3] <= 35 * 1.25)
+
+    def test_claimed_once(self):
+        job = jobs.enqueue(record)
+        self.assertEqual(jobs.claim('a'), job)
+        self.assertIsNone(jobs.claim('b'))
+
+    def test_lost_job_is_reclaimed(self):
+        job = jobs.enqueue(record, 'lost', max_attempts=2)
+        jobs.claim('crashed')
+        self.assertEqual(jobs.work(burst=True), 0)
+        Job.objects.filter(pk=job.pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1),
+        )
+        self.assertEqual(jobs.work(burst=True), 1)
+        self.assertEqual(CALLS, [('lost',)])
+        # Задача, которую теряют снова и снова, в конце концов бросается.
+        job = jobs.enqueue(record, max_attempts=1)
+        jobs.claim('crashed')
+        Job.objects.filter(pk=job.pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1),
+        )
+        jobs.work(burst=True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(len(CALLS), 1)
+
+    def test_schedule(self):
+        now = timezone.now()
+        with self.settings(JOBS_SCHEDULE={'core.tests.test_jobs.record': 60}):
+            jobs.schedule(now)
+            jobs.schedule(now)
+            # Другой процесс в том же интервале задачу не повторит.
+            jobs._scheduled.clear()
+            jobs.schedule(now)
+            self.assertEqual(Job.objects.count(), 1)
+            jobs.schedule(now + timedelta(seconds=60))
+            self.assertEqual(Job.objects.count(), 2)
+
+    def test_purge(self):
+        old = jobs.enqueue(record)
+        fresh = jobs.enqueue(record)
+        jobs.work(burst=True)
+        Job.objects.filter(pk=old.pk).update(
+            finished=timezone.now() - timedelta(days=30),
+        )
+        jobs.purge()
+        self.assertEqual(list(Job.objects.all()), [fresh])
+
+    def test_eager(self):
+        with self.settings(JOBS_EAGER=True):
+            self.assertIsNone(jobs.enqueue(record, 1))
+            with self.assertRaises(ValueError):
+                jobs.enqueue(fail)
+        self.assertEqual(CALLS, [(1,)])
+        self.assertFalse(Job.objects.exists())
+
+    def test_command(self):
+        jobs.enqueue(record, 1)
+        jobs.enqueue(record, 2)
+        out = io.StringIO()
+        call_command('run_workers', burst=True, concurrency=1, stdout=out)
+        self.assertEqual(CALLS, [(1,), (2,)])
+        self.assertIn('2', out.getvalue())
+        with self.settings(JOBS_EAGER=True):
+            with self.assertRaises(CommandError):
+                call_command('run_workers', burst=True, concurrency=1)
+
+    def test_password_reset_email_is_queued(self):
+        User.objects.create_user('reader', 'reader@example.com', 'secret')
+        self.client.post(
+            reverse('users:password_reset'), {'email': 'reader@example.com'},
+        )
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(
+            Job.objects.get().task, 'core.jobs.send_email',
+        )
+        jobs.work(burst=True)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['reader@example.com'])
+        self.assertIn('/auth/reset/', mail.outbox[0].body)
@@ -0,0 +1,149 @@
+import threading
+import time
+from http import HTTPStatus
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from posts import generations
+from posts.models import User
+from .. import limiter
+
+# Имитация базы: CAPACITY запросов обслуживаются одновременно по SERVICE
+# секунд, остальные ждут в очереди.
+CAPACITY = 4
+SERVICE = 0.02
+CLIENTS = 48
+
+
+def percentile_99(latencies):
+    latencies = sorted(latencies)
+    return latencies[int(len(latencies) * 0.99)]
+
+
+class AdaptiveLimitTest(SimpleTestCase):
+    def test_sheds_over_limit(self):
+        limit = limiter.AdaptiveLimit(2, 1, 4, target=1)
+        self.assertTrue(limit.acquire())
+        self.assertTrue(limit.acquire())
+        self.assertFalse(limit.acquire())
+        self.assertEqual(limit.state()['shed'], 1)
+
+    def test_aimd(self):
+        limit = limiter.AdaptiveLimit(4, 2, 6, target=1)
+        for _ in range(100):
+            limit.acquire()
+            limit.release(0.1)
+        self.assertEqual(limit.state()['limit'], 6)
+        for _ in range(100):
+            limit.acquire()
+            limit.release(2)
+        self.assertEqual(limit.state()['limit'], 2)
+
+    def burst(self, limits):
+        database = threading.Semaphore(CAPACITY)
+
+        def view(request):
+            with database:
+                time.sleep(SERVICE)
+            return HttpResponse()
+
+        middleware = limiter.LoadSheddingMiddleware(view, limits=limits)
+        admitted, shed = [], []
+        barrier = threading.Barrier(CLIENTS)
+
+        def client():
+            request = RequestFactory().post('/create/')
+            request.user = AnonymousUser()
+            barrier.wait()
+            start = time.monotonic()
+            response = middleware(request)
+            latency = time.monotonic() - start
+            if response.status_code == HTTPStatus.OK:
+                admitted.append(latency)
+            else:
+                shed.append(response)
+
+        for _ in range(3):
+            threads = [threading.Thread(target=client) for _ in range(CLIENTS)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        return admitted, shed
+
+    def test_burst_keeps_admitted_latency_bounded(self):
+        unlimited, _ = self.burst({})
+        admitted, shed = self.burst({
+            'write': limiter.AdaptiveLimit(
+                8, CAPACITY, CAPACITY * 2, target=SERVICE * 2,
+            ),
+        })
+        self.assertTrue(shed)
+        self.assertEqual(shed[0]['Retry-After'], '2')
+        self.assertLess(percentile_99(admitted), SERVICE * 10)
+        self.assertLess(
+            percentile_99(admitted), percentile_99(unlimited) / 2,
+        )
+
+
+class LoadSheddingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create(username='staff', is_staff=True)
+
+    def setUp(self):
+        caches['pages'].clear()
+        self.limit = limiter.limits()['anonymous']
+
+    def fill(self):
+        acquired = 0
+        while self.limit.acquire():
+            acquired += 1
+        return acquired
+
+    def drain(self, acquired):
+        for _ in range(acquired):
+            self.limit.release(0)
+
+    def test_anonymous_overload_gets_stale_page(self):
+        url = reverse('posts:index')
+        fresh = Client().get(url)
+        generations.bump(generations.ALL)
+        acquired = self.fill()
+        try:
+            stale = Client().get(url)
+            missing = Client().get(reverse('about:author'))
+        finally:
+            self.drain(acquired)
+        self.assertEqual(stale.content, fresh.content)
+        self.assertIn('Stale', stale['Warning'])
+        self.assertEqual(missing.status_code, HTTPStatus.SERVICE_UNAVAILABLE)
+        self.assertEqual(missing['Retry-After'], '2')
+
+    def test_classes_have_separate_budgets(self):
+        client = Client()
+        client.force_login(self.staff)
+        acquired = self.fill()
+        try:
+            response = client.get(reverse('posts:index'))
+        finally:
+            self.drain(acquired)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_state_for_staff_only(self):
+        url = reverse('load_state')
+        self.assertEqual(
+            Client().get(url).status_code, HTTPStatus.NOT_FOUND,
+        )
+        client = Client()
+        client.force_login(self.staff)
+        state = client.get(url).json()
+        self.assertEqual(
+            set(state), {'anonymous', 'authenticated', 'write', 'admin'},
+        )
+        self.assertIn('p99', state['anonymous'])
@@ -0,0 +1,109 @@
+from http import HTTPStatus
+
+from django.core.cache import caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from .. import metrics
+
+METRICS_URL = reverse('metrics')
+
+
+def sample(name, **labels):
+    """Значение метрики из выдачи /status/metrics/."""
+    text = metrics.exposition()
+    prefix = metrics._sample(name, tuple(labels.items()), '')
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line[len(prefix):])
+    return None
+
+
+class MetricsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create(username='staff', is_staff=True)
+        cls.author = User.objects.create(username='author')
+        cls.group = Group.objects.create(
+            slug='group_slug', title='group', description='Тестовая группа',
+        )
+        Post.objects.create(text='Тестовый пост', author=cls.author)
+
+    def setUp(self):
+        for alias in ['pages', 'fragments', 'counters']:
+            caches[alias].clear()
+        metrics.reset()
+
+    def test_request_recorded_by_view(self):
+        url = reverse('posts:index')
+        Client().get(url)
+        view = 'posts:index'
+        self.assertEqual(sample('request_seconds_count', view=view), 1)
+        self.assertEqual(sample('requests_total', view=view, status=200), 1)
+        self.assertGreater(sample('db_queries_sum', view=view), 0)
+        self.assertGreater(sample('template_seconds_sum', view=view), 0)
+        self.assertGreater(sample('cache_misses_total', view=view), 0)
+        self.assertEqual(
+            sample('db_queries_bucket', view=view, le='+Inf'), 1,
+        )
+
+    def test_page_cache_hit_recorded_without_view(self):
+        url = reverse('posts:index')
+        Client().get(url)
+        Client().get(url)
+        self.assertEqual(sample('page_cache_seconds_count'), 1)
+        self.assertEqual(
+            sample('request_seconds_count', view='posts:index'), 1,
+        )
+
+    def test_cache_instances_counted_not_classes(self):
+        cache = caches['fragments']
+        # Обёртка - атрибут экземпляра, класс бэкенда не тронут.
+        self.assertIn('get', vars(cache))
+        stats = metrics._local.stats = metrics.RequestStats()
+        try:
+            cache.set('key', 1)
+            cache.get('key')
+            cache.get('missing')
+            cache.get_many(['key', 'missing'])
+        finally:
+            metrics._local.stats = None
+        self.assertEqual((stats.cache_hits, stats.cache_misses), (2, 2))
+
+    def test_limiter_state_exported(self):
+        self.assertIsNotNone(sample('load_limit', **{'class': 'anonymous'}))
+
+    def test_thumbnail_timer(self):
+        with metrics.timer('thumbnail_seconds'):
+            pass
+        self.assertEqual(sample('thumbnail_seconds_count'), 1)
+
+    @override_settings(METRICS_SLOW_SECONDS=0)
+    def test_slow_request_logged_with_sql(self):
+        with self.assertLogs('core.metrics', 'WARNING') as logs:
+            Client().get(reverse('posts:group_list', args=[self.group.slug]))
+        self.assertIn('posts:group_list', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_endpoint_protected(self):
+        staff = Client()
+        staff.force_login(self.staff)
+        for client, headers, status in [
+            [Client(), {}, HTTPStatus.NOT_FOUND],
+            [Client(), {'HTTP_AUTHORIZATION': 'Bearer wrong'},
+             HTTPStatus.NOT_FOUND],
+            [Client(), {'HTTP_AUTHORIZATION': 'Bearer secret'},
+             HTTPStatus.OK],
+            [staff, {}, HTTPStatus.OK],
+        ]:
+            with self.subTest(headers=headers):
+                response = client.get(METRICS_URL, **headers)
+                self.assertEqual(response.status_code, status)
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        self.assertIn(
+            '# TYPE yatube_request_seconds histogram',
+            response.content.decode(),
+        )
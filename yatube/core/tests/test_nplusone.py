@@ -0,0 +1,78 @@
+from django.contrib import admin
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import Client, TestCase, override_settings
+from django.urls import path
+
+from posts.models import Post, User
+from .. import nplusone
+
+AUTHORS = Template(
+    '{% for post in posts %}{{ post.author.username }}{% endfor %}'
+)
+
+
+def template_loop(request):
+    posts = Post.objects.all()
+    if 'joined' in request.GET:
+        posts = posts.select_related('author')
+    return HttpResponse(AUTHORS.render(Context({'posts': posts})))
+
+
+def code_loop(request):
+    return HttpResponse(
+        ' '.join(post.author.username for post in Post.objects.all())
+    )
+
+
+urlpatterns = [
+    path('admin/', admin.site.urls),
+    path('template/', template_loop),
+    path('code/', code_loop),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__, NPLUSONE_THRESHOLD=3)
+class QueryPatternTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(5):
+            Post.objects.create(
+                text=f'Пост {i}',
+                author=User.objects.create(username=f'author_{i}'),
+            )
+
+    def test_fingerprint(self):
+        self.assertEqual(
+            nplusone.fingerprint(
+                "SELECT * FROM t WHERE id IN (%s, %s, %s) AND a = 'x' "
+                "LIMIT 21"
+            ),
+            'SELECT * FROM t WHERE id IN (%s, ...) AND a = ? LIMIT ?',
+        )
+
+    def test_template_loop_raises(self):
+        with self.assertRaisesMessage(
+            nplusone.NPlusOneError,
+            '5 запросов из <unknown source>:1',
+        ):
+            Client().get('/template/')
+
+    def test_code_loop_raises(self):
+        with self.assertRaisesMessage(
+            nplusone.NPlusOneError, 'test_nplusone.py:',
+        ):
+            Client().get('/code/')
+
+    def test_joined_query_passes(self):
+        self.assertEqual(
+            Client().get('/template/?joined').content.decode(),
+            ''.join(f'author_{i}' for i in reversed(range(5))),
+        )
+
+    @override_settings(NPLUSONE_RAISE=False, NPLUSONE_SAMPLE=1)
+    def test_production_logs_stack(self):
+        with self.assertLogs('core.nplusone', 'WARNING') as logs:
+            Client().get('/code/')
+        self.assertIn('N+1 в /code/', logs.output[0])
+        self.assertIn('в code_loop', logs.output[0])
@@ -0,0 +1,66 @@
+from django.test import SimpleTestCase
+
+from .. import regression
+
+THRESHOLDS = {
+    'queries': 0, 'memory': 0.25, 'latency': 0.5, 'latency_floor_ms': 3,
+}
+
+
+def page(**values):
+    return {
+        'p50_ms': 10, 'queries': 5, 'memory_kb': 100,
+        'statuses': {'200': 20}, **values,
+    }
+
+
+class RegressionsTest(SimpleTestCase):
+    def check(self, current, scale=1):
+        return regression.regressions(
+            {'index': page()}, {'index': current}, scale, THRESHOLDS,
+        )
+
+    def test_within_thresholds(self):
+        self.assertEqual(
+            self.check(page(p50_ms=14.9, memory_kb=125)), [],
+        )
+
+    def test_queries_are_strict(self):
+        self.assertEqual(
+            self.check(page(queries=6)),
+            ['index: SQL на запрос 5 -> 6 (+20%)'],
+        )
+
+    def test_memory_and_latency(self):
+        lines = self.check(page(p50_ms=16, memory_kb=130))
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith('index: память 100 -> 130'))
+        self.assertTrue(lines[1].startswith('index: p50 10 -> 16'))
+
+    def test_latency_scaled_by_calibration(self):
+        self.assertEqual(self.check(page(p50_ms=25), scale=2), [])
+        self.assertEqual(len(self.check(page(p50_ms=25), scale=1)), 1)
+
+    def test_latency_floor(self):
+        fast = {'index': page(p50_ms=1)}
+        self.assertEqual(
+            regression.regressions(
+                fast, {'index': page(p50_ms=3.9)}, 1, THRESHOLDS,
+            ),
+            [],
+        )
+
+    def test_missing_page_and_status(self):
+        lines = regression.regressions(
+            {'index': page()},
+            {'index': page(statuses={'500': 20}), 'search': page()},
+            1, THRESHOLDS,
+        )
+        self.assertEqual(lines[0], "index: статусы {'200': 20} -> {'500': 20}")
+        self.assertTrue(lines[1].startswith('search: нет в baseline'))
+
+    def test_latency_not_checked_without_scale(self):
+        self.assertEqual(
+            self.check(page(p50_ms=100), scale=None), [],
+        )
+        self.assertEqual(len(self.check(page(p50_ms=100, queries=6), None)), 1)
@@ -0,0 +1,102 @@
+import shutil
+import tempfile
+
+from django.core.cache import caches
+from django.db import connections, transaction
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+from .. import replicas, routers
+from ..routers import PRIMARY_COOKIE
+
+REPLICA = 'replica_test'
+USER_NAME = 'user_1'
+
+INDEX_URL = reverse('posts:index')
+PROFILE_URL = reverse('posts:profile', args=[USER_NAME])
+POST_CREATE_URL = reverse('posts:post_create')
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaRoutingTest(TransactionTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Реплика подключается после setUpClass: TransactionTestCase не
+        # очищает её и не запрещает к ней запросы.
+        cls.directory = tempfile.mkdtemp()
+        connections.databases[REPLICA] = {
+            **connections['default'].settings_dict,
+            'NAME': f'{cls.directory}/replica.sqlite3',
+        }
+
+    @classmethod
+    def tearDownClass(cls):
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.databases[REPLICA]
+        shutil.rmtree(cls.directory, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create(username=USER_NAME)
+        self.post = Post.objects.create(text='synced', author=self.user)
+        replicas.sync(REPLICA)
+        self.user_client = Client()
+        self.user_client.force_login(self.user)
+        self.guest_client = Client()
+
+    def texts(self, client, url):
+        caches['fragments'].clear()
+        return [
+            post.text for post in client.get(url).context['page_obj']
+        ]
+
+    def test_listing_reads_from_replica(self):
+        Post.objects.create(text='lagging', author=self.user)
+        self.assertEqual(self.texts(self.guest_client, INDEX_URL), ['synced'])
+        replicas.sync(REPLICA)
+        self.assertEqual(
+            self.texts(self.guest_client, INDEX_URL), ['lagging', 'synced'],
+        )
+
+    def test_other_views_read_primary(self):
+        post = Post.objects.create(text='lagging', author=self.user)
+        response = self.user_client.get(
+            reverse('posts:post_edit', args=[post.id]),
+        )
+        self.assertEqual(response.context['form'].instance, post)
+
+    def test_writer_reads_own_writes(self):
+        response = self.user_client.post(
+            POST_CREATE_URL, data={'text': 'fresh'},
+        )
+        self.assertIn(PRIMARY_COOKIE, response.cookies)
+        self.assertEqual(
+            self.texts(self.user_client, PROFILE_URL), ['fresh', 'synced'],
+        )
+        self.assertEqual(
+            self.texts(self.guest_client, PROFILE_URL), ['synced'],
+        )
+        # Окно прилипания закончилось - снова читаем с реплики.
+        del self.user_client.cookies[PRIMARY_COOKIE]
+        self.assertEqual(
+            self.texts(self.user_client, PROFILE_URL), ['synced'],
+        )
+
+    def test_reads_do_not_pin(self):
+        response = self.guest_client.get(INDEX_URL)
+        self.assertNotIn(PRIMARY_COOKIE, response.cookies)
+
+    def test_primary_connection_without_writes_does_not_pin(self):
+        response = self.guest_client.get(reverse('posts:search'), {'q': 'x'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(PRIMARY_COOKIE, response.cookies)
+        routers.begin(pinned=False)
+        with transaction.atomic():
+            list(Post.objects.select_for_update())
+        self.assertFalse(routers.end())
+        routers.begin(pinned=False)
+        Post.objects.filter(pk=self.post.pk).update(text='edited')
+        self.assertTrue(routers.end())
@@ -0,0 +1,122 @@
+import shutil
+import tempfile
+import threading
+
+from django.db import connection, utils
+from django.test import SimpleTestCase
+
+from ..backends.sqlite3.base import DatabaseWrapper
+
+WRITERS = 8
+WRITES = 20
+
+
+class SQLiteBackendTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.settings_dict = {
+            **connection.settings_dict,
+            'NAME': f'{self.directory}/db.sqlite3',
+            'OPTIONS': {'timeout': 5, 'write_timeout': 5},
+        }
+        wrapper = self.wrapper()
+        with wrapper.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (value INTEGER)')
+        wrapper.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def wrapper(self, **options):
+        return DatabaseWrapper({
+            **self.settings_dict,
+            'OPTIONS': {**self.settings_dict['OPTIONS'], **options},
+        })
+
+    def begin(self, wrapper):
+        # То же, что делает transaction.atomic на внешнем уровне.
+        wrapper.set_autocommit(
+            False, force_begin_transaction_with_broken_autocommit=True,
+        )
+
+    def end(self, wrapper):
+        wrapper.commit()
+        wrapper.set_autocommit(True)
+
+    def test_pragmas(self):
+        wrapper = self.wrapper(pragmas={'cache_size': -1000})
+        with wrapper.cursor() as cursor:
+            for pragma, expected in [
+                ['journal_mode', 'wal'],
+                ['synchronous', 1],
+                ['cache_size', -1000],
+                ['temp_store', 2],
+                ['busy_timeout', 5000],
+            ]:
+                with self.subTest(pragma=pragma):
+                    cursor.execute(f'PRAGMA {pragma}')
+                    self.assertEqual(cursor.fetchone()[0], expected)
+        wrapper.close()
+
+    def test_concurrent_writers_do_not_fail(self):
+        errors = []
+
+        def write():
+            wrapper = self.wrapper()
+            try:
+                for i in range(WRITES):
+                    if i % 2:
+                        self.begin(wrapper)
+                        with wrapper.cursor() as cursor:
+                            cursor.execute('SELECT COUNT(*) FROM item')
+                            cursor.execute(
+                                'INSERT INTO item VALUES (%s)', [i],
+                            )
+                        self.end(wrapper)
+                    else:
+                        with wrapper.cursor() as cursor:
+                            cursor.execute(
+                                'INSERT INTO item VALUES (%s)', [i],
+                            )
+            except Exception as error:
+                errors.append(error)
+            finally:
+                wrapper.close()
+
+        threads = [threading.Thread(target=write) for _ in range(WRITERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        wrapper = self.wrapper()
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM item')
+            self.assertEqual(cursor.fetchone()[0], WRITERS * WRITES)
+        wrapper.close()
+
+    def test_write_waits_are_bounded(self):
+        holder = self.wrapper()
+        self.begin(holder)
+        result = []
+
+        def write():
+            wrapper = self.wrapper(write_timeout=0.1)
+            try:
+                with wrapper.cursor() as cursor:
+                    cursor.execute('INSERT INTO item VALUES (1)')
+            except utils.OperationalError as error:
+                result.append(error)
+            finally:
+                wrapper.close()
+
+        thread = threading.Thread(target=write)
+        thread.start()
+        thread.join()
+        self.end(holder)
+        self.assertEqual(len(result), 1)
+        with holder.cursor() as cursor:
+            cursor.execute('INSERT INTO item VALUES (1)')
+            cursor.execute('SELECT COUNT(*) FROM item')
+            self.assertEqual(cursor.fetchone()[0], 1)
+        holder.close()
@@ -1,4 +1,9 @@
+from django import conf
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+
+from . import limiter, metrics
 
 
 def page_not_found(request, exception):
@@ -15,3 +20,23 @@ def csrf_failure(request, reason=''):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
+
+
+def load_state(request):
+    """Лимиты и счётчики core.limiter этого процесса, только для staff."""
+    if not request.user.is_staff:
+        raise Http404
+    return JsonResponse(limiter.state())
+
+
+def metrics_export(request):
+    """Метрики core.metrics для Prometheus: staff или METRICS_TOKEN."""
+    token = conf.settings.METRICS_TOKEN
+    authorized = token and constant_time_compare(
+        request.headers.get('Authorization', ''), f'Bearer {token}',
+    )
+    if not (authorized or request.user.is_staff):
+        raise Http404
+    return HttpResponse(
+        metrics.exposition(), content_type=metrics.CONTENT_TYPE,
+    )
@@ -1,7 +1,10 @@
 from django.contrib import admin
 
+from . import search
 from .models import Group, Post, Comment, Follow
 
+ADMIN_SEARCH_LIMIT = 1000
+
 
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
@@ -10,6 +13,13 @@ class PostAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
     list_editable = ('group',)
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return queryset.filter(
+            pk__in=search.post_ids(search_term, ADMIN_SEARCH_LIMIT),
+        ), False
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
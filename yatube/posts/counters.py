@@ -0,0 +1,121 @@
+"""Денормализованные счётчики постов, комментариев и подписок.
+
+Счётчики меняются атомарными F()-обновлениями из сигналов (posts.signals),
+а команда recount_counters и периодическая задача recount (core.jobs)
+пересчитывают их пачками, если они разошлись с данными (например, после
+bulk_create или ручных правок в базе).
+"""
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Group, Post, User, UserCounters
+
+
+def change(model, pk, **deltas):
+    if pk is None:
+        return
+    model.objects.filter(pk=pk).update(**{
+        field: F(field) + delta if delta > 0 else Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items()
+    })
+
+
+def post_created(post):
+    with transaction.atomic():
+        change(UserCounters, post.author_id, posts=1)
+        change(Group, post.group_id, post_count=1)
+
+
+def post_deleted(post):
+    with transaction.atomic():
+        change(UserCounters, post.author_id, posts=-1)
+        change(Group, post.group_id, post_count=-1)
+
+
+def post_moved(old_group_id, new_group_id):
+    with transaction.atomic():
+        change(Group, old_group_id, post_count=-1)
+        change(Group, new_group_id, post_count=1)
+
+
+def comment_changed(comment, delta):
+    with transaction.atomic():
+        change(UserCounters, comment.author_id, comments=delta)
+        change(Post, comment.post_id, comment_count=delta)
+
+
+def follow_changed(follow, delta):
+    with transaction.atomic():
+        change(UserCounters, follow.author_id, followers=delta)
+        change(UserCounters, follow.user_id, following=delta)
+
+
+def count_of(model, field):
+    """Подзапрос с числом строк model, у которых field = pk внешней строки."""
+    return Coalesce(Subquery(
+        model.objects.filter(
+            **{field: OuterRef('pk')}
+        ).order_by().values(field).annotate(
+            count=Count('*'),
+        ).values('count')
+    ), 0)
+
+
+def recount_users(user_ids):
+    UserCounters.objects.bulk_create(
+        (UserCounters(user_id=user_id) for user_id in user_ids),
+        ignore_conflicts=True,
+    )
+    return UserCounters.objects.filter(pk__in=user_ids).update(
+        posts=count_of(Post, 'author'),
+        comments=count_of(Comment, 'author'),
+        followers=count_of(Follow, 'author'),
+        following=count_of(Follow, 'user'),
+    )
+
+
+def recount_groups(group_ids):
+    return Group.objects.filter(pk__in=group_ids).update(
+        post_count=count_of(Post, 'group'),
+    )
+
+
+def recount_posts(post_ids):
+    return Post.objects.filter(pk__in=post_ids).update(
+        comment_count=count_of(Comment, 'post'),
+    )
+
+
+RECOUNTERS = (
+    (User, recount_users),
+    (Group, recount_groups),
+    (Post, recount_posts),
+)
+
+
+def recount_all(batch_size):
+    """Пересчитывает все счётчики пачками по batch_size строк.
+
+    Отдаёт (модель, число обновлённых строк) после каждой пачки.
+    """
+    for model, recount in RECOUNTERS:
+        last_pk = 0
+        while True:
+            batch = list(
+                model.objects.filter(pk__gt=last_pk).order_by(
+                    'pk'
+                ).values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            with transaction.atomic():
+                updated = recount(batch)
+            yield model, updated
+            last_pk = batch[-1]
+
+
+def recount(batch_size=1000):
+    """Периодическая задача: пересчёт всех счётчиков."""
+    for _ in recount_all(batch_size):
+        pass
@@ -0,0 +1,83 @@
+"""ETag страниц для условных GET (django.views.decorators.http.condition).
+
+Отпечаток страницы собирается из поколений кэша её областей
+(posts.generations) - их сдвигает каждое изменение постов, комментариев и
+групп, - и зрителя: от него зависят шапка и кнопки. В страницы с формами
+входит и CSRF-токен зрителя: после нового входа токен меняется, и
+сохранённая браузером форма со старым токеном была бы отклонена. Подсчёт
+отпечатка - обращения к кэшу и не больше одного запроса по индексу, поэтому
+неизменившаяся страница отдаётся как 304 без выборки ленты и рендеринга.
+"""
+import hashlib
+
+from django.middleware.csrf import get_token
+
+from . import follows, generations
+from .models import Group, Post, UserCounters
+
+
+def _etag(request, *parts, forms=False):
+    viewer = request.user.pk if request.user.is_authenticated else 'anon'
+    if forms and request.user.is_authenticated:
+        # get_token заводит токен, если его ещё нет, - тот же, что
+        # попадёт в форму.
+        get_token(request)
+        viewer = f'{viewer}:{request.META["CSRF_COOKIE"]}'
+    return hashlib.md5(
+        ':'.join(map(str, [viewer, *parts])).encode()
+    ).hexdigest()
+
+
+def index(request):
+    return _etag(request, *generations.get(generations.ALL))
+
+
+def group(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'id', flat=True,
+    ).first()
+    if group_id is None:
+        return None
+    return _etag(request, *generations.get(generations.group(group_id)))
+
+
+def profile(request, username):
+    # Счётчики автора меняют и чужие действия (подписки, комментарии к
+    # чужим постам), поэтому они входят в отпечаток сами.
+    counters = UserCounters.objects.filter(
+        user__username=username,
+    ).values_list(
+        'user_id', 'posts', 'comments', 'followers', 'following',
+    ).first()
+    if counters is None:
+        return None
+    author_id = counters[0]
+    following = (
+        request.user.is_authenticated
+        and follows.is_following(request.user.pk, author_id)
+    )
+    return _etag(request, *counters, following, *generations.get(
+        generations.author(author_id), generations.GROUPS,
+    ))
+
+
+def post_detail(request, post_id):
+    author_id = Post.objects.filter(pk=post_id).values_list(
+        'author_id', flat=True,
+    ).first()
+    if author_id is None:
+        return None
+    # Комментарии сдвигают поколение автора поста. Вошедшим страница
+    # показывает форму комментария.
+    return _etag(request, *generations.get(
+        generations.author(author_id), generations.GROUPS,
+    ), forms=True)
+
+
+def follow_index(request):
+    followees = follows.followees(request.user.pk)
+    # Поколение пользователя сдвигают задачи, дописывающие его ленту.
+    return _etag(request, *followees, *generations.get(
+        generations.user(request.user.pk), generations.GROUPS,
+        *(generations.author(author_id) for author_id in followees),
+    ))
@@ -0,0 +1,156 @@
+"""Граф подписок.
+
+Подписки пользователя кэшируются одним значением - отсортированным
+массивом id авторов (8 байт на подписку), поэтому «подписан ли я на X» и
+«на кого из этих авторов я подписан» проверяются двоичным поиском без
+запросов к базе. Кэш пользователя сбрасывается при любой записи в Follow.
+
+Массовые подписка и отписка делаются одним запросом каждая: вставка с
+ON CONFLICT DO NOTHING RETURNING и удаление по списку авторов. RETURNING
+отдаёт только действительно вставленные строки, поэтому последствия
+подписки применяются ровно один раз и при параллельных подписках.
+"""
+import array
+import bisect
+
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+
+from core import jobs
+from . import counters, generations, timeline
+from .models import Follow
+
+CACHE = 'counters'
+KEY = 'posts:follows:{}'
+TYPECODE = 'q'
+# Пар (user_id, author_id) в одной вставке: лимит параметров SQLite.
+INSERT_BATCH = 400
+
+
+def followees(user_id):
+    """Отсортированный массив id авторов, на которых подписан пользователь."""
+    cache = caches[CACHE]
+    key = KEY.format(user_id)
+    ids = array.array(TYPECODE)
+    data = cache.get(key)
+    if data is not None:
+        ids.frombytes(data)
+        return ids
+    # Только основная БД: подписки с отстающей реплики остались бы в
+    # кэше до следующей записи.
+    ids.extend(
+        Follow.objects.using(DEFAULT_DB_ALIAS).filter(
+            user_id=user_id,
+        ).order_by('author_id').values_list('author_id', flat=True)
+    )
+    cache.set(key, ids.tobytes())
+    return ids
+
+
+def _contains(ids, author_id):
+    position = bisect.bisect_left(ids, author_id)
+    return position < len(ids) and ids[position] == author_id
+
+
+def is_following(user_id, author_id):
+    return _contains(followees(user_id), author_id)
+
+
+def following(user_id, author_ids):
+    """Те из author_ids, на кого подписан пользователь."""
+    ids = followees(user_id)
+    return {author_id for author_id in author_ids if _contains(ids, author_id)}
+
+
+def invalidate(user_id):
+    caches[CACHE].delete(KEY.format(user_id))
+
+
+def created(follow):
+    """Последствия новой подписки: счётчики, лента, кэш."""
+    counters.follow_changed(follow, 1)
+    jobs.enqueue(timeline.backfill, follow.user_id, follow.author_id)
+    timeline.followers_changed(follow.author_id, followed=True)
+    generations.users_changed(follow.user_id, follow.author_id)
+    invalidate(follow.user_id)
+
+
+def deleted(follow):
+    counters.follow_changed(follow, -1)
+    timeline.trim(follow.user_id, follow.author_id)
+    timeline.followers_changed(follow.author_id, followed=False)
+    generations.users_changed(follow.user_id, follow.author_id)
+    invalidate(follow.user_id)
+
+
+def _returning(connection):
+    """Понимает ли база INSERT ... ON CONFLICT DO NOTHING RETURNING."""
+    return connection.vendor == 'postgresql' or (
+        connection.vendor == 'sqlite'
+        and connection.Database.sqlite_version_info >= (3, 35)
+    )
+
+
+def _insert(connection, user_id, author_ids):
+    """Вставляет подписки, возвращает авторов вставленных строк."""
+    quote = connection.ops.quote_name
+    table = quote(Follow._meta.db_table)
+    user = quote(Follow._meta.get_field('user').column)
+    author = quote(Follow._meta.get_field('author').column)
+    inserted = []
+    with connection.cursor() as cursor:
+        for start in range(0, len(author_ids), INSERT_BATCH):
+            batch = author_ids[start:start + INSERT_BATCH]
+            cursor.execute(
+                f'INSERT INTO {table} ({user}, {author}) VALUES '
+                + ', '.join(['(%s, %s)'] * len(batch))
+                + f' ON CONFLICT DO NOTHING RETURNING {author}',
+                [
+                    value for author_id in batch
+                    for value in (user_id, author_id)
+                ],
+            )
+            inserted.extend(row[0] for row in cursor.fetchall())
+    return inserted
+
+
+def follow(user_id, author_ids):
+    """Подписывает пользователя на авторов, повторы и себя пропускает.
+
+    Возвращает id авторов, подписка на которых появилась.
+    """
+    author_ids = [
+        author_id for author_id in dict.fromkeys(author_ids)
+        if author_id != user_id
+    ]
+    using = router.db_for_write(Follow)
+    connection = connections[using]
+    with transaction.atomic(using=using):
+        if not _returning(connection):
+            # Без RETURNING - по строке; последствия вызывает post_save.
+            return [
+                author_id for author_id in author_ids
+                if Follow.objects.using(using).get_or_create(
+                    user_id=user_id, author_id=author_id,
+                )[1]
+            ]
+        inserted = _insert(connection, user_id, author_ids)
+        # Вставка в обход ORM не отправляет post_save - последствия
+        # вызываются здесь же и только для вставленных строк.
+        for author_id in inserted:
+            created(Follow(user_id=user_id, author_id=author_id))
+    invalidate(user_id)
+    inserted = set(inserted)
+    return [author_id for author_id in author_ids if author_id in inserted]
+
+
+def unfollow(user_id, author_ids):
+    """Отписывает от авторов, последствия - через post_delete.
+
+    Возвращает число удалённых подписок.
+    """
+    count, _ = Follow.objects.filter(
+        user_id=user_id, author_id__in=author_ids,
+    ).delete()
+    invalidate(user_id)
+    return count
@@ -1,6 +1,9 @@
 from django import forms
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
 from django.forms import ModelForm
 
+from . import uploads
 from .models import Comment, Post
 
 
@@ -11,6 +14,28 @@ class PostForm(ModelForm):
         help_texts = {'group': 'Выберите группу', 'text': 'Введите ссообщение'}
         fields = ('group', 'text', 'image')
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Слишком большую картинку отклоняем по заголовку, не отдавая
+        # её ImageField, который декодирует файл целиком.
+        self.image_error = None
+        image = self.files.get(self.add_prefix('image'))
+        if image:
+            try:
+                uploads.check(image)
+            except ValidationError as error:
+                self.image_error = error
+                self.files = self.files.copy()
+                del self.files[self.add_prefix('image')]
+
+    def clean_image(self):
+        if self.image_error:
+            raise self.image_error
+        image = self.cleaned_data['image']
+        if isinstance(image, UploadedFile):
+            return uploads.store(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,84 @@
+"""Поколения кэша для лент.
+
+Каждой области (вся лента, группа, автор) соответствует счётчик
+поколения. Ключ закэшированного фрагмента включает текущее поколение его
+области, поэтому фрагменты могут жить часами: при изменении поста,
+комментария или группы сигнал увеличивает поколение, и следующий запрос
+просто не находит старый ключ.
+"""
+import time
+
+from django.core.cache import caches
+
+CACHE = 'fragments'
+ALL = 'all'
+GROUPS = 'groups'
+KEY = 'posts:generation:{}'
+
+
+def group(group_id):
+    return f'group:{group_id}'
+
+
+def author(author_id):
+    return f'author:{author_id}'
+
+
+def user(user_id):
+    """Счётчики и подписки на странице пользователя."""
+    return f'user:{user_id}'
+
+
+def get(*scopes):
+    cache = caches[CACHE]
+    keys = [KEY.format(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # Поколение могло быть вытеснено из кэша: новое начальное
+            # значение не должно совпасть ни с одним из прежних.
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def bump(*scopes):
+    cache = caches[CACHE]
+    for scope in set(scopes):
+        key = KEY.format(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+
+
+def posts_changed(author_id, *group_ids):
+    """Сбрасывает ленты, в которых показываются посты автора."""
+    bump(ALL, author(author_id), *(
+        group(group_id) for group_id in group_ids if group_id
+    ))
+
+
+def users_changed(*user_ids):
+    """Сбрасывает страницы пользователей, чьи счётчики изменились."""
+    bump(*(user(user_id) for user_id in user_ids))
+
+
+def group_changed(group_id):
+    """Сбрасывает ленты, где выводится название или описание группы."""
+    bump(ALL, GROUPS, group(group_id))
+
+
+def fragment_context(request, view, *scopes):
+    """Ключ и время жизни фрагмента ленты для тега {% cache %}.
+
+    Ключ зависит от ленты, поколений её областей, страницы и зрителя:
+    автор видит у своих постов кнопку «Редактировать».
+    """
+    viewer = request.user.pk if request.user.is_authenticated else 'anon'
+    return {
+        'fragment_key': ':'.join(map(str, [
+            view, *get(*scopes), viewer, request.GET.urlencode(),
+        ])),
+        'fragment_timeout': caches[CACHE].default_timeout,
+    }
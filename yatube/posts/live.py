@@ -0,0 +1,178 @@
+"""Живая лента: события о новых постах для server-sent events.
+
+После коммита нового поста его краткое описание (id, автор, группа,
+начало текста) публикуется в хаб, а каждое открытое соединение
+/live/ держит подписку на него и пересылает клиенту подходящие события.
+Хаб выбирается настройкой LIVE_HUB:
+
+* LocalHub - очереди в памяти процесса, для разработки и одного воркера;
+* CacheHub - журнал событий в общем кэше (SQLiteCache, Redis): события
+  видят все процессы и серверы, подписчики опрашивают его раз в
+  CacheHub.poll_interval секунд.
+
+Соединение занимает поток воркера, поэтому сервер запускается с
+потоковыми (gthread) или gevent-воркерами.
+"""
+import collections
+import json
+import queue
+import threading
+import time
+
+from django import conf
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from django.utils.text import Truncator
+
+from . import follows, settings
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+class LocalHub:
+    def __init__(self):
+        self._queues = set()
+        self._lock = threading.Lock()
+
+    def publish(self, event):
+        with self._lock:
+            queues = list(self._queues)
+        for events in queues:
+            try:
+                events.put_nowait(event)
+            except queue.Full:
+                # Клиент не успевает читать - пропускает события, а не
+                # копит их в памяти.
+                pass
+
+    def subscribe(self):
+        events = queue.Queue(maxsize=settings.LIVE_QUEUE_SIZE)
+        with self._lock:
+            self._queues.add(events)
+        return LocalSubscription(self, events)
+
+    def unsubscribe(self, events):
+        with self._lock:
+            self._queues.discard(events)
+
+
+class LocalSubscription:
+    def __init__(self, hub, events):
+        self.hub = hub
+        self.events = events
+
+    def get(self, timeout):
+        """Следующее событие или None, если за timeout секунд его не было."""
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.hub.unsubscribe(self.events)
+
+
+class CacheHub:
+    cache = 'default'
+    sequence_key = 'posts:live:sequence'
+    event_key = 'posts:live:event:{}'
+    event_timeout = 60
+    poll_interval = 1
+
+    def publish(self, event):
+        cache = caches[self.cache]
+        cache.add(self.sequence_key, 0, None)
+        number = cache.incr(self.sequence_key)
+        cache.set(self.event_key.format(number), event, self.event_timeout)
+
+    def subscribe(self):
+        return CacheSubscription(
+            self, caches[self.cache].get(self.sequence_key, 0),
+        )
+
+
+class CacheSubscription:
+    def __init__(self, hub, last):
+        self.hub = hub
+        self.last = last
+        self.pending = collections.deque()
+
+    def get(self, timeout):
+        cache = caches[self.hub.cache]
+        deadline = time.monotonic() + timeout
+        while not self.pending:
+            number = cache.get(self.hub.sequence_key, 0)
+            if number > self.last:
+                # Не больше очереди LocalHub за раз: отставший клиент
+                # пропускает старые события.
+                first = max(self.last + 1, number - settings.LIVE_QUEUE_SIZE)
+                keys = [
+                    self.hub.event_key.format(i)
+                    for i in range(first, number + 1)
+                ]
+                found = cache.get_many(keys)
+                self.pending.extend(found[key] for key in keys if key in found)
+                self.last = number
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(self.hub.poll_interval, remaining))
+        return self.pending.popleft()
+
+    def close(self):
+        pass
+
+
+def hub():
+    global _hub
+    with _hub_lock:
+        if _hub is None:
+            _hub = import_string(conf.settings.LIVE_HUB)()
+        return _hub
+
+
+def event(post):
+    return {
+        'id': post.id,
+        'author': post.author.username,
+        'author_id': post.author_id,
+        'group': post.group.slug if post.group_id else None,
+        'text': Truncator(post.text).chars(settings.LIVE_SNIPPET_LENGTH),
+    }
+
+
+def publish(post):
+    hub().publish(event(post))
+
+
+def matches(item, group=None, follower_id=None):
+    if group is not None and item['group'] != group:
+        return False
+    return follower_id is None or follows.is_following(
+        follower_id, item['author_id'],
+    )
+
+
+def stream(group=None, follower_id=None):
+    """Тело ответа text/event-stream: новые посты группы, подписок или все.
+
+    Пока событий нет, раз в LIVE_KEEPALIVE_SECONDS уходит комментарий,
+    чтобы прокси не закрыли соединение. Через LIVE_MAX_SECONDS поток
+    заканчивается и браузер переподключается сам - так воркеры не
+    заняты навсегда.
+    """
+    deadline = time.monotonic() + conf.settings.LIVE_MAX_SECONDS
+    subscription = hub().subscribe()
+    try:
+        yield f'retry: {settings.LIVE_RETRY_MILLISECONDS}\n\n'
+        while time.monotonic() < deadline:
+            item = subscription.get(conf.settings.LIVE_KEEPALIVE_SECONDS)
+            if item is None:
+                yield ': keepalive\n\n'
+            elif matches(item, group, follower_id):
+                data = json.dumps(item, ensure_ascii=False)
+                yield f'id: {item["id"]}\nevent: post\ndata: {data}\n\n'
+    finally:
+        subscription.close()
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Дорисовывает миниатюры картинок постов, у которых их нет.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Сколько постов выбирать за раз.',
+        )
+
+    def handle(self, *args, **options):
+        total = sum(thumbnails.missing(options['batch_size']))
+        self.stdout.write(f'Обработано постов: {total}')
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс постов и комментариев.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько строк читать и индексировать за раз.',
+        )
+
+    def handle(self, *args, **options):
+        totals = {}
+        for model, indexed in search.rebuild(options['batch_size']):
+            name = model._meta.verbose_name_plural
+            totals[name] = totals.get(name, 0) + indexed
+        for name, indexed in totals.items():
+            self.stdout.write(f'{name}: проиндексировано {indexed}')
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов, комментариев и подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько строк пересчитывать в одной транзакции.',
+        )
+
+    def handle(self, *args, **options):
+        totals = {}
+        for model, updated in counters.recount_all(options['batch_size']):
+            name = model._meta.verbose_name_plural
+            totals[name] = totals.get(name, 0) + updated
+        for name, updated in totals.items():
+            self.stdout.write(f'{name}: пересчитано {updated}')
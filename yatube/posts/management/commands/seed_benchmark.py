@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, группами, постами, '
+        'комментариями и подписками для бенчмарков.'
+    )
+
+    def add_arguments(self, parser):
+        for name, default, help_text in [
+            ['users', 100_000, 'Пользователей.'],
+            ['groups', 1000, 'Групп.'],
+            ['posts', 1_000_000, 'Постов.'],
+            ['comments', 3_000_000, 'Комментариев.'],
+            ['follows', 20, 'Подписок на пользователя в среднем.'],
+            ['batch-size', 10_000, 'Строк в одном bulk_create.'],
+            ['seed', 0, 'Зерно генератора случайных чисел.'],
+            ['days', 365, 'За сколько дней до сегодня распределить посты.'],
+        ]:
+            parser.add_argument(
+                f'--{name}', type=int, default=default, help=help_text,
+            )
+        parser.add_argument(
+            '--alpha', type=float, default=1.1,
+            help='Показатель степенного закона популярности.',
+        )
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Сначала удалить данные прошлого запуска.',
+        )
+        parser.add_argument(
+            '--no-derived', dest='derived', action='store_false',
+            help='Не пересчитывать счётчики, ленты и поисковый индекс.',
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь.')
+        if options['clear']:
+            seed.clear(options['batch_size'])
+        totals = {}
+        for action, model, rows in seed.seed(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows=options['follows'],
+            batch_size=options['batch_size'],
+            alpha=options['alpha'],
+            seed=options['seed'],
+            derived=options['derived'],
+            days=options['days'],
+        ):
+            key = model._meta.verbose_name_plural, action
+            totals[key] = totals.get(key, 0) + rows
+            self.stdout.write(f'{key[0]}: {action} {totals[key]}')
@@ -0,0 +1,65 @@
+from itertools import islice
+
+from django.db import migrations
+
+from posts.stemmer import terms
+
+POSTGRES_INDEXES = (
+    ('posts_post_text_search', 'posts_post'),
+    ('posts_comment_text_search', 'posts_comment'),
+)
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for name, table in POSTGRES_INDEXES:
+            schema_editor.execute(
+                f'CREATE INDEX {name} ON {table} USING GIN '
+                "(to_tsvector('russian'::regconfig, COALESCE(text, '')))"
+            )
+    if vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        'CREATE VIRTUAL TABLE posts_search USING fts5('
+        "post_id UNINDEXED, body, tokenize='unicode61 remove_diacritics 0')"
+    )
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    for model, post_field, shift in ((Post, 'id', 0), (Comment, 'post_id', 1)):
+        rows = (
+            [2 * pk + shift, post_id, ' '.join(terms(text))]
+            for pk, post_id, text in model.objects.values_list(
+                'pk', post_field, 'text',
+            ).iterator()
+        )
+        while True:
+            batch = list(islice(rows, 1000))
+            if not batch:
+                break
+            with schema_editor.connection.cursor() as cursor:
+                cursor.executemany(
+                    'INSERT INTO posts_search (rowid, post_id, body) '
+                    'VALUES (%s, %s, %s)',
+                    batch,
+                )
+
+
+def drop_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for name, _ in POSTGRES_INDEXES:
+            schema_editor.execute(f'DROP INDEX {name}')
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE posts_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
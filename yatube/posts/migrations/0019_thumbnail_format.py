@@ -0,0 +1,37 @@
+# Generated by Django 2.2.19 on 2026-10-18 06:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_thumbnail'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='thumbnail',
+            name='Единственность миниатюры',
+        ),
+        migrations.AddField(
+            model_name='thumbnail',
+            name='format',
+            field=models.CharField(
+                default='jpeg', max_length=10, verbose_name='Формат',
+            ),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='thumbnail',
+            name='size',
+            field=models.CharField(max_length=20, verbose_name='Вариант'),
+        ),
+        migrations.AddConstraint(
+            model_name='thumbnail',
+            constraint=models.UniqueConstraint(
+                fields=('post', 'size', 'format', 'width'),
+                name='Единственность миниатюры',
+            ),
+        ),
+    ]
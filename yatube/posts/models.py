@@ -4,7 +4,29 @@ from django.contrib.auth import get_user_model
 User = get_user_model()
 
 
-class Group(models.Model):
+class CountedModel(models.Model):
+    """Модель с денормализованными счётчиками (см. posts.counters).
+
+    Счётчики меняются только F()-обновлениями, поэтому обычное сохранение
+    существующего объекта их не перезаписывает.
+    """
+
+    counter_fields = ()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class Group(CountedModel):
     title = models.CharField(
         max_length=200,
         verbose_name='Заглавие',
@@ -17,6 +39,13 @@ class Group(models.Model):
         max_length=200,
         verbose_name='Описание',
     )
+    post_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число постов',
+    )
+
+    counter_fields = ('post_count',)
 
     class Meta:
         verbose_name = 'Группа'
@@ -26,7 +55,20 @@ class Group(models.Model):
         return self.title
 
 
-class Post(models.Model):
+class PostQuerySet(models.QuerySet):
+    def for_listing(self):
+        """Посты для лент без дополнительных запросов на каждый пост.
+
+        Автор и группа подтягиваются join'ом, миниатюры - одним запросом
+        на всю страницу, число комментариев хранится в самом посте
+        (comment_count).
+        """
+        return self.select_related('author', 'group').prefetch_related(
+            'thumbnails',
+        )
+
+
+class Post(CountedModel):
     text = models.TextField(
         verbose_name='Текст поста',
         help_text='Введите текст поста',
@@ -55,16 +97,83 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True,
     )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число комментариев',
+    )
+
+    counter_fields = ('comment_count',)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        # Под каждую ленту: фильтр и сортировка (pub_date, id) одним
+        # проходом по индексу, без сортировки во временном B-дереве.
+        indexes = [
+            models.Index(
+                name='post_date_idx',
+                fields=['-pub_date', '-id'],
+            ),
+            models.Index(
+                name='post_group_date_idx',
+                fields=['group', '-pub_date', '-id'],
+            ),
+            models.Index(
+                name='post_author_date_idx',
+                fields=['author', '-pub_date', '-id'],
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
 
+class Thumbnail(models.Model):
+    """Готовая миниатюра картинки поста (см. posts.thumbnails)."""
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='thumbnails',
+        verbose_name='Пост',
+    )
+    size = models.CharField(
+        max_length=20,
+        verbose_name='Вариант',
+    )
+    format = models.CharField(
+        max_length=10,
+        verbose_name='Формат',
+    )
+    image = models.ImageField(
+        'Миниатюра',
+        upload_to='posts/thumbnails/',
+    )
+    width = models.PositiveIntegerField(
+        verbose_name='Ширина',
+    )
+    height = models.PositiveIntegerField(
+        verbose_name='Высота',
+    )
+
+    class Meta:
+        verbose_name = 'Миниатюра'
+        verbose_name_plural = 'Миниатюры'
+        constraints = [
+            models.UniqueConstraint(
+                name='Единственность миниатюры',
+                fields=['post', 'size', 'format', 'width'],
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id}: {self.size} {self.width}w {self.format}'
+
+
 class Comment(models.Model):
     post = models.ForeignKey(
         Post, on_delete=models.CASCADE,
@@ -89,6 +198,12 @@ class Comment(models.Model):
         ordering = ('-created',)
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                name='comment_post_created_idx',
+                fields=['post', '-created', '-id'],
+            ),
+        ]
 
     def __str__(self):
         return self.text[:20]
@@ -121,3 +236,88 @@ class Follow(models.Model):
                 check=~models.Q(user=models.F('author'))
             ),
         ]
+        # Подписчики автора: раскладка ленты и подсчёт без чтения таблицы.
+        indexes = [
+            models.Index(
+                name='follow_author_user_idx',
+                fields=['author', 'user'],
+            ),
+        ]
+
+
+class UserCounters(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='counters',
+        verbose_name='Пользователь',
+    )
+    posts = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Постов',
+    )
+    comments = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Комментариев',
+    )
+    followers = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписчиков',
+    )
+    following = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписок',
+    )
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+    def __str__(self):
+        return str(self.user_id)
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+    )
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                name='Единственность записи ленты',
+                fields=['user', 'post'],
+            ),
+        ]
+        indexes = [
+            models.Index(
+                name='timeline_user_date_idx',
+                fields=['user', '-pub_date', '-post'],
+            ),
+            models.Index(
+                name='timeline_user_author_idx',
+                fields=['user', 'author'],
+            ),
+        ]
@@ -0,0 +1,90 @@
+"""Кэш целых страниц для анонимных посетителей.
+
+Представление помечает страницу суррогатными ключами - областями
+поколений (posts.generations), от которых она зависит, - вызовом tag().
+Для анонимного GET PageCacheMiddleware сохраняет ответ вместе с
+поколениями ключей на момент рендеринга и отдаёт его, пока они не
+изменились. Сигналы сдвигают поколения при записи в Post, Comment,
+Follow и Group - это и есть очистка по ключу, без обхода кэша.
+
+Ключи уходят и в заголовок Surrogate-Key, а Cache-Control разрешает
+CDN хранить анонимную страницу PAGE_CACHE_MAX_AGE секунд.
+"""
+import hashlib
+
+from django import conf
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from . import generations
+
+CACHE = 'pages'
+KEY = 'posts:page:{}'
+SURROGATE_HEADER = 'Surrogate-Key'
+
+
+def tag(request, *scopes):
+    """Помечает страницу областями; поколения читаются до выборки данных."""
+    request.surrogate_keys = dict(zip(scopes, generations.get(*scopes)))
+
+
+def _key(request):
+    return KEY.format(
+        hashlib.md5(request.get_full_path().encode()).hexdigest()
+    )
+
+
+def _anonymous_get(request):
+    return (
+        request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+    )
+
+
+def stale(request):
+    """Сохранённая страница, даже устаревшая, - для сброса нагрузки."""
+    if not _anonymous_get(request):
+        return None
+    entry = caches[CACHE].get(_key(request))
+    return entry and entry[1]
+
+
+class PageCacheMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not _anonymous_get(request):
+            return self.finish(request, self.get_response(request))
+        cache = caches[CACHE]
+        key = _key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            keys, response = entry
+            if generations.get(*keys) == list(keys.values()):
+                request.page_cache_hit = True
+                return get_conditional_response(
+                    request, etag=response.get('ETag'), response=response,
+                )
+        response = self.finish(request, self.get_response(request))
+        keys = getattr(request, 'surrogate_keys', None)
+        if (
+            keys and response.status_code == 200
+            and not response.streaming and not response.cookies
+        ):
+            cache.set(key, (keys, response))
+        return response
+
+    def finish(self, request, response):
+        keys = getattr(request, 'surrogate_keys', None)
+        if not keys:
+            return response
+        response[SURROGATE_HEADER] = ' '.join(keys)
+        if _anonymous_get(request):
+            patch_cache_control(
+                response, public=True,
+                max_age=conf.settings.PAGE_CACHE_MAX_AGE,
+            )
+        else:
+            patch_cache_control(response, private=True)
+        return response
@@ -0,0 +1,166 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps([str(value) for value in values]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token, length):
+    """Разбирает непрозрачный токен курсора в список значений ключей."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw.decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(token)
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidCursor(token)
+    return values
+
+
+class CursorPage(Sequence):
+    """Страница курсорной пагинации.
+
+    В отличие от django.core.paginator.Page не знает ни номера страницы,
+    ни общего количества объектов: навигация только вперёд и назад.
+    """
+
+    is_cursor = True
+    number = None
+
+    def __init__(self, object_list, paginator, cursor,
+                 has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.cursor = cursor
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<CursorPage {self.cursor or "first"}>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next and bool(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous and bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if self.has_next():
+            return self.paginator.cursor_for(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous():
+            return self.paginator.cursor_for(self.object_list[0])
+
+
+class CursorPaginator:
+    """Keyset-пагинация по убыванию ключей (по умолчанию pub_date, id).
+
+    Стоимость любой страницы равна стоимости первой: вместо
+    COUNT(*) и OFFSET выполняется один запрос с условием на ключи
+    последнего показанного объекта.
+
+    Если queryset явно отсортирован по стольким же полям, сколько ключей
+    (например, по их денормализованным копиям в другой таблице), условие
+    и сортировка строятся по этим полям - так запрос идёт по их индексу.
+    """
+
+    is_cursor = True
+
+    def __init__(self, queryset, per_page, keys=('pub_date', 'id')):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.keys = keys
+        ordering = [
+            field.lstrip('-') for field in queryset.query.order_by
+            if isinstance(field, str)
+        ]
+        self.fields = (
+            tuple(ordering) if len(ordering) == len(keys) else keys
+        )
+
+    def cursor_for(self, obj):
+        # Строки queryset.values() - словари.
+        if isinstance(obj, dict):
+            return encode_cursor(obj[key] for key in self.keys)
+        return encode_cursor(getattr(obj, key) for key in self.keys)
+
+    def _seek(self, values, lookup):
+        condition = Q()
+        for position, field in enumerate(self.fields):
+            equal = dict(zip(self.fields[:position], values[:position]))
+            condition |= Q(
+                **equal, **{f'{field}__{lookup}': values[position]}
+            )
+        return condition
+
+    def get_page(self, after=None, before=None):
+        """Возвращает страницу после/до курсора, при ошибке - первую."""
+        try:
+            if after:
+                return self._page_after(after)
+            if before:
+                return self._page_before(before)
+        except (InvalidCursor, ValidationError, ValueError):
+            pass
+        return self._page_after(None)
+
+    def _fetch(self, values, forward):
+        """Следующие per_page + 1 объектов после (forward) или до курсора.
+
+        Объекты «до курсора» возвращаются в порядке возрастания ключей.
+        """
+        if forward:
+            queryset = self.queryset.order_by(
+                *(f'-{field}' for field in self.fields)
+            )
+        else:
+            queryset = self.queryset.order_by(*self.fields)
+        if values is not None:
+            queryset = queryset.filter(
+                self._seek(values, 'lt' if forward else 'gt')
+            )
+        return list(queryset[:self.per_page + 1])
+
+    def _page_after(self, token):
+        values = decode_cursor(token, len(self.keys)) if token else None
+        object_list = self._fetch(values, forward=True)
+        return CursorPage(
+            object_list[:self.per_page], self, token,
+            has_next=len(object_list) > self.per_page,
+            has_previous=bool(token),
+        )
+
+    def _page_before(self, token):
+        values = decode_cursor(token, len(self.keys))
+        object_list = self._fetch(values, forward=False)
+        if len(object_list) <= self.per_page:
+            # Дошли до начала ленты - показываем полную первую страницу.
+            return self._page_after(None)
+        return CursorPage(
+            object_list[:self.per_page][::-1], self, token,
+            has_next=True,
+            has_previous=True,
+        )
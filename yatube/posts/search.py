@@ -0,0 +1,226 @@
+"""Полнотекстовый поиск по постам и комментариям.
+
+На SQLite индекс - виртуальная таблица FTS5 posts_search, в которую
+сигналы (posts.signals) пишут основы слов (posts.stemmer) каждого поста
+и комментария. Строка поста хранится под rowid = 2 * id, строка
+комментария - под 2 * id + 1. На PostgreSQL используется to_tsvector с
+конфигурацией russian и GIN-индексами из миграции, синхронизировать
+ничего не нужно.
+
+Выдача ранжируется (у SQLite - bm25, у PostgreSQL - ts_rank) и листается
+курсором по (search_rank, id).
+"""
+from django.db import connections, router
+from django.db.models import Q
+
+from .models import Comment, Post
+from .paginator import CursorPaginator
+from .stemmer import terms
+
+TABLE = 'posts_search'
+POSTGRES_CONFIG = 'russian'
+
+
+def _connection():
+    return connections[router.db_for_write(Post)]
+
+
+def _indexed(connection):
+    return connection.vendor == 'sqlite'
+
+
+def _write(rowid, post_id, text):
+    connection = _connection()
+    if not _indexed(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [rowid])
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, post_id, body) VALUES (%s, %s, %s)',
+            [rowid, post_id, ' '.join(terms(text))],
+        )
+
+
+def _delete(rowid):
+    connection = _connection()
+    if _indexed(connection):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [rowid])
+
+
+def index_post(post):
+    _write(2 * post.id, post.id, post.text)
+
+
+def index_comment(comment):
+    _write(2 * comment.id + 1, comment.post_id, comment.text)
+
+
+def remove_post(post_id):
+    _delete(2 * post_id)
+
+
+def remove_comment(comment_id):
+    _delete(2 * comment_id + 1)
+
+
+def remove_many(posts, comments):
+    """Убирает из индекса посты и комментарии querysets, не загружая их.
+
+    Вместе с постами уходят и строки комментариев к ним.
+    """
+    connection = _connection()
+    if not _indexed(connection):
+        return
+    posts_sql, posts_params = posts.values('pk').query.sql_with_params()
+    comments_sql, comments_params = comments.values(
+        'pk',
+    ).query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {TABLE} WHERE post_id IN ({posts_sql})',
+            posts_params,
+        )
+        cursor.execute(
+            f'DELETE FROM {TABLE} WHERE rowid IN '
+            f'(SELECT 2 * id + 1 FROM ({comments_sql}))',
+            comments_params,
+        )
+
+
+def rebuild(batch_size=1000):
+    """Перестраивает индекс, читая посты и комментарии пачками.
+
+    Отдаёт модель и размер каждой проиндексированной пачки.
+    """
+    connection = _connection()
+    if not _indexed(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+    for model, post_field, shift in ((Post, 'id', 0), (Comment, 'post_id', 1)):
+        last_pk = 0
+        while True:
+            batch = list(
+                model.objects.filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', post_field, 'text')[:batch_size]
+            )
+            if not batch:
+                break
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f'INSERT INTO {TABLE} (rowid, post_id, body) '
+                    'VALUES (%s, %s, %s)',
+                    [
+                        [2 * pk + shift, post_id, ' '.join(terms(text))]
+                        for pk, post_id, text in batch
+                    ],
+                )
+            yield model, len(batch)
+            last_pk = batch[-1][0]
+
+
+def match_expression(query):
+    """Запрос FTS5: все основы слов запроса, каждая как префикс."""
+    return ' '.join(f'"{term}"*' for term in dict.fromkeys(terms(query)))
+
+
+class SearchPaginator(CursorPaginator):
+    """Ранжированная выдача FTS5 с курсором по (search_rank, id)."""
+
+    SQL = (
+        'SELECT post_id, rank FROM ('
+        # Скрытый столбец rank FTS5 - это bm25, меньше значит лучше.
+        f'SELECT post_id, -MIN(rank) AS rank FROM {TABLE} '
+        f'WHERE {TABLE} MATCH %s GROUP BY post_id'
+        ') {where} ORDER BY rank {order}, post_id {order} LIMIT %s'
+    )
+
+    def __init__(self, match, per_page, using):
+        super().__init__(
+            Post.objects.for_listing(), per_page, keys=('search_rank', 'id'),
+        )
+        self.match = match
+        self.using = using
+
+    def _fetch(self, values, forward):
+        where, params = '', [self.match]
+        if values is not None:
+            sign = '<' if forward else '>'
+            where = (
+                f'WHERE rank {sign} %s OR (rank = %s AND post_id {sign} %s)'
+            )
+            rank, post_id = float(values[0]), int(values[1])
+            params += [rank, rank, post_id]
+        sql = self.SQL.format(where=where, order='DESC' if forward else 'ASC')
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(sql, params + [self.per_page + 1])
+            rows = cursor.fetchall()
+        posts = self.queryset.using(self.using).in_bulk(
+            [post_id for post_id, _ in rows]
+        )
+        found = []
+        for post_id, rank in rows:
+            if post_id in posts:
+                posts[post_id].search_rank = rank
+                found.append(posts[post_id])
+        return found
+
+
+def _postgres_vector():
+    from django.contrib.postgres.search import SearchVector
+
+    return SearchVector('text', config=POSTGRES_CONFIG)
+
+
+def _postgres_query(query):
+    from django.contrib.postgres.search import SearchQuery
+
+    return SearchQuery(query, config=POSTGRES_CONFIG)
+
+
+def _postgres_queryset(query):
+    from django.contrib.postgres.search import SearchRank
+
+    search_query = _postgres_query(query)
+    commented = Comment.objects.annotate(
+        search=_postgres_vector(),
+    ).filter(search=search_query).values('post')
+    return Post.objects.for_listing().annotate(
+        search=_postgres_vector(),
+        search_rank=SearchRank(_postgres_vector(), search_query),
+    ).filter(Q(search=search_query) | Q(pk__in=commented))
+
+
+def paginator(query, per_page):
+    """Пагинатор ранжированной выдачи или None для пустого запроса."""
+    match = match_expression(query)
+    if not match:
+        return None
+    using = router.db_for_read(Post)
+    if connections[using].vendor == 'postgresql':
+        return CursorPaginator(
+            _postgres_queryset(query), per_page, keys=('search_rank', 'id'),
+        )
+    return SearchPaginator(match, per_page, using)
+
+
+def post_ids(query, limit):
+    """id постов, в тексте которых встречается запрос (для админки)."""
+    match = match_expression(query)
+    if not match:
+        return []
+    using = router.db_for_read(Post)
+    if connections[using].vendor == 'postgresql':
+        return list(
+            Post.objects.annotate(search=_postgres_vector()).filter(
+                search=_postgres_query(query),
+            ).values_list('id', flat=True)[:limit]
+        )
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'SELECT post_id FROM {TABLE} WHERE {TABLE} MATCH %s '
+            'AND rowid %% 2 = 0 ORDER BY rank LIMIT %s',
+            [match, limit],
+        )
+        return [post_id for post_id, in cursor.fetchall()]
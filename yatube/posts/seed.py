@@ -0,0 +1,278 @@
+"""Синтетическая база в масштабе продакшена для бенчмарков.
+
+Пользователи, группы, посты, комментарии и подписки вставляются
+пачками по batch_size из генераторов, так что память не
+растёт с числом строк (в памяти держатся только массивы id). Популярность
+подчиняется закону Ципфа с показателем alpha: немногие авторы собирают
+большую часть подписчиков, постов и комментариев, а немногие посты -
+большую часть комментариев. Посты равномерно растянуты на days дней до
+текущего момента, комментарии пишутся между публикацией поста и текущим
+моментом, чаще вскоре после публикации. Зерно делает базу
+воспроизводимой.
+
+bulk_create не вызывает сигналы, поэтому в конце пересчитываются
+счётчики, пересобираются ленты подписок и поисковый индекс, а поколения
+кэша сбрасываются. clear() по той же причине удаляет строки запросами
+DELETE, без загрузки объектов и сигналов, и затем пересчитывает счётчики.
+"""
+import bisect
+import itertools
+import random
+from array import array
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.db import connections, models, router, transaction
+from django.utils import timezone
+
+from . import counters, follows as follow_graph, generations, search, timeline
+from .models import Comment, Follow, Group, Post, TimelineEntry, User
+
+USERNAME = 'bench_{}'
+GROUP_SLUG = 'bench-{}'
+PASSWORD = 'benchmark'
+WORDS = (
+    'пост', 'лента', 'автор', 'группа', 'подписка', 'комментарий', 'кэш',
+    'база', 'запрос', 'страница', 'новость', 'день', 'город', 'книга',
+    'музыка', 'кино', 'код', 'python', 'django', 'сервер', 'фото',
+    'путешествие', 'работа', 'вечер', 'утро', 'кофе', 'погода', 'спорт',
+    'идея', 'проект', 'релиз', 'ошибка', 'тест', 'скорость', 'память',
+)
+
+
+class Popularity:
+    """Случайный id, i-й по порядку с весом 1 / (i + 1) ** alpha."""
+
+    def __init__(self, ids, alpha, rng):
+        self.ids = ids
+        self.rng = rng
+        self.cum_weights = array('d', itertools.accumulate(
+            (rank + 1) ** -alpha for rank in range(len(ids))
+        ))
+
+    def choice(self):
+        point = self.rng.random() * self.cum_weights[-1]
+        return self.ids[bisect.bisect(self.cum_weights, point)]
+
+
+def batches(objects, size):
+    iterator = iter(objects)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _insert(model, objects, batch_size):
+    # executemany одного INSERT в обход bulk_create: на миллионах строк
+    # ORM тратит на сборку SQL больше времени, чем база на вставку.
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    fields = [
+        field for field in model._meta.concrete_fields
+        if not field.primary_key
+    ]
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table),
+        ', '.join(quote(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    for batch in batches(objects, batch_size):
+        rows = [
+            [
+                # Заданную дату auto_now_add не заменяет текущим временем.
+                field.get_db_prep_save(
+                    field.pre_save(obj, getattr(obj, field.attname) is None),
+                    connection,
+                )
+                for field in fields
+            ]
+            for obj in batch
+        ]
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.executemany(sql, rows)
+        yield 'создано', model, len(batch)
+
+
+def _ids(queryset):
+    return array('q', queryset.order_by('pk').values_list(
+        'pk', flat=True,
+    ).iterator())
+
+
+def _ages(queryset, now):
+    """Возраст постов в секундах в порядке pk."""
+    return array('d', (
+        (now - pub_date).total_seconds()
+        for pub_date in queryset.order_by('pk').values_list(
+            'pub_date', flat=True,
+        ).iterator()
+    ))
+
+
+def _text(rng, low, high):
+    return ' '.join(rng.choices(WORDS, k=rng.randint(low, high)))
+
+
+def _follows(user_ids, popularity, per_user, rng):
+    for user_id in user_ids:
+        authors = {
+            popularity.choice()
+            for _ in range(rng.randint(0, 2 * per_user))
+        }
+        authors.discard(user_id)
+        for author_id in sorted(authors):
+            yield Follow(user_id=user_id, author_id=author_id)
+
+
+def _timelines(author_ids):
+    # По одному запросу постов на автора, а не на каждую подписку.
+    celebrities = timeline.celebrity_ids()
+    for author_id in author_ids:
+        if author_id not in celebrities:
+            yield from timeline.author_entries(author_id)
+
+
+def _delete(queryset):
+    """DELETE строк queryset и всего, что на них ссылается, детьми вперёд.
+
+    В отличие от QuerySet.delete() объекты не загружаются в память и
+    сигналы не отправляются.
+    """
+    for relation in queryset.model._meta.get_fields(include_hidden=True):
+        if not (
+            relation.auto_created and not relation.concrete
+            and (relation.one_to_many or relation.one_to_one)
+        ):
+            continue
+        related = relation.related_model._base_manager.filter(
+            **{f'{relation.field.name}__in': queryset.values('pk')}
+        )
+        if relation.on_delete is models.SET_NULL:
+            related.update(**{relation.field.name: None})
+        elif relation.on_delete is not models.DO_NOTHING:
+            _delete(related)
+    connection = connections[router.db_for_write(queryset.model)]
+    sql, params = queryset.values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'DELETE FROM {} WHERE {} IN ({})'.format(
+                connection.ops.quote_name(queryset.model._meta.db_table),
+                connection.ops.quote_name(queryset.model._meta.pk.column),
+                sql,
+            ),
+            params,
+        )
+
+
+def clear(batch_size=10000):
+    """Удаляет созданное seed() вместе с постами и подписками."""
+    users = User.objects.filter(username__startswith=USERNAME.format(''))
+    groups = Group.objects.filter(slug__startswith=GROUP_SLUG.format(''))
+    followers = array('q', Follow.objects.filter(author__in=users).exclude(
+        user__in=users,
+    ).values_list('user_id', flat=True).distinct().iterator())
+    with transaction.atomic(using=router.db_for_write(User)):
+        search.remove_many(
+            Post.objects.filter(author__in=users),
+            Comment.objects.filter(author__in=users),
+        )
+        _delete(users)
+        _delete(groups)
+    # Удалены подписки и комментарии к чужим постам и авторам.
+    for _ in counters.recount_all(batch_size):
+        pass
+    for user_id in followers:
+        follow_graph.invalidate(user_id)
+    caches[timeline.CACHE].delete(timeline.CELEBRITIES_CACHE_KEY)
+    generations.bump(generations.ALL, generations.GROUPS)
+
+
+def seed(users, groups, posts, comments, follows, batch_size=10000,
+         alpha=1.1, seed=0, derived=True, days=365):
+    """Заполняет базу, отдавая (действие, модель, строк) после пачек.
+
+    follows - среднее число подписок на пользователя, days - за сколько
+    дней до текущего момента распределены посты. С derived=False
+    счётчики, ленты и индекс не пересобираются - это можно сделать
+    потом командами recount_counters, rebuild_timelines и
+    rebuild_search_index.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    step = timedelta(days=days) / max(posts, 1)
+    password = make_password(PASSWORD)
+    yield from _insert(User, (
+        User(username=USERNAME.format(i), password=password)
+        for i in range(users)
+    ), batch_size)
+    yield from _insert(Group, (
+        Group(
+            title=f'Группа {i}',
+            slug=GROUP_SLUG.format(i),
+            description=_text(rng, 5, 20),
+        )
+        for i in range(groups)
+    ), batch_size)
+    user_ids = _ids(User.objects.filter(
+        username__startswith=USERNAME.format(''),
+    ))
+    group_ids = _ids(Group.objects.filter(
+        slug__startswith=GROUP_SLUG.format(''),
+    ))
+    authors = Popularity(user_ids, alpha, rng)
+    yield from _insert(Follow, _follows(
+        user_ids, authors, follows, rng,
+    ), batch_size)
+    yield from _insert(Post, (
+        Post(
+            text=_text(rng, 5, 60),
+            author_id=authors.choice(),
+            # Примерно треть постов без группы.
+            group_id=(
+                rng.choice(group_ids)
+                if group_ids and rng.random() > 0.3 else None
+            ),
+            # Посты идут по времени в порядке вставки, как в живой базе.
+            pub_date=now - step * (posts - i - rng.random()),
+        )
+        for i in range(posts)
+    ), batch_size)
+    seeded_posts = Post.objects.filter(
+        author__username__startswith=USERNAME.format(''),
+    )
+    post_ids = _ids(seeded_posts)
+    post_ages = _ages(seeded_posts, now)
+    # Больше всего комментариев у свежих постов.
+    hot_posts = Popularity(post_ids[::-1], alpha, rng)
+
+    def comment():
+        post_id = hot_posts.choice()
+        age = post_ages[bisect.bisect_left(post_ids, post_id)]
+        return Comment(
+            post_id=post_id,
+            author_id=rng.choice(user_ids),
+            text=_text(rng, 2, 30),
+            # Чем позже после публикации, тем реже комментируют.
+            created=now - timedelta(seconds=age * (1 - rng.random() ** 3)),
+        )
+
+    yield from _insert(Comment, (
+        comment() for _ in range(comments if post_ids else 0)
+    ), batch_size)
+    if derived:
+        for model, updated in counters.recount_all(batch_size):
+            yield 'пересчитано', model, updated
+        caches[timeline.CACHE].delete(timeline.CELEBRITIES_CACHE_KEY)
+        followed = array('q', Follow.objects.filter(
+            user__username__startswith=USERNAME.format(''),
+        ).order_by('author_id').values_list(
+            'author_id', flat=True,
+        ).distinct().iterator())
+        yield from _insert(TimelineEntry, _timelines(followed), batch_size)
+        for model, indexed in search.rebuild(batch_size):
+            yield 'проиндексировано', model, indexed
+    generations.bump(generations.ALL, generations.GROUPS)
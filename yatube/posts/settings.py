@@ -1,2 +1,32 @@
-
 NUMBER_POST_PAGINATION = 30
+NUMBER_COMMENT_PAGINATION = 20
+
+# Форматы картинок постов, которые принимаются при загрузке, и расширения
+# файлов, под которыми они хранятся.
+IMAGE_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif', 'WEBP': 'webp'}
+# Форматы, которые Pillow называет по-своему, хотя это один из принятых.
+# MPO - JPEG с дополнительными кадрами, так сохраняют снимки многие
+# телефоны; сохраняется только основной кадр.
+IMAGE_FORMAT_ALIASES = {'MPO': 'JPEG'}
+IMAGE_JPEG_QUALITY = 95
+
+# Варианты миниатюр картинок постов: имя -> пропорции кадра (ширина и
+# высота основного размера), ширины для srcset и атрибут sizes.
+THUMBNAIL_RENDITIONS = {
+    'card': {
+        'size': (960, 339),
+        'widths': (480, 960, 1440),
+        'sizes': '(min-width: 1200px) 1110px, 100vw',
+    },
+}
+# Форматы в порядке предпочтения, не поддерживаемые Pillow пропускаются.
+# Последний формат - запасной для <img>.
+THUMBNAIL_FORMATS = ('avif', 'webp', 'jpeg')
+THUMBNAIL_QUALITY = {'avif': 60, 'webp': 80, 'jpeg': 85}
+THUMBNAIL_PLACEHOLDER = 'img/thumbnail.svg'
+
+# Живая лента (posts.live): сколько событий ждёт медленного клиента,
+# длина начала текста в событии и пауза браузера перед переподключением.
+LIVE_QUEUE_SIZE = 100
+LIVE_SNIPPET_LENGTH = 140
+LIVE_RETRY_MILLISECONDS = 5000
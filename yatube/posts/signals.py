@@ -0,0 +1,98 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import (
+    counters, follows, generations, live, search, thumbnails, timeline,
+)
+from .models import Comment, Follow, Group, Post, User, UserCounters
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserCounters.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, raw=False, **kwargs):
+    if not raw and not instance._state.adding:
+        instance._saved_group_id, instance._saved_image = (
+            Post.objects.filter(pk=instance.pk).values_list(
+                'group_id', 'image',
+            ).first() or (None, '')
+        )
+
+
+@receiver(post_save, sender=Post)
+def post_published(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    saved_group_id = getattr(instance, '_saved_group_id', None)
+    generations.posts_changed(
+        instance.author_id, instance.group_id, saved_group_id,
+    )
+    search.index_post(instance)
+    if instance.image.name != getattr(instance, '_saved_image', ''):
+        if not created:
+            thumbnails.discard(instance.id)
+        if instance.image:
+            thumbnails.enqueue(instance.id)
+    if created:
+        counters.post_created(instance)
+        timeline.fan_out(instance)
+        transaction.on_commit(lambda: live.publish(instance))
+    elif saved_group_id != instance.group_id:
+        counters.post_moved(saved_group_id, instance.group_id)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.post_deleted(instance)
+    generations.posts_changed(instance.author_id, instance.group_id)
+    search.remove_post(instance.id)
+
+
+def comment_changed(comment):
+    post = Post.objects.filter(pk=comment.post_id).values_list(
+        'author_id', 'group_id',
+    ).first()
+    if post:
+        generations.posts_changed(*post)
+    generations.users_changed(comment.author_id)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_comment(instance)
+    if created:
+        counters.comment_changed(instance, 1)
+    # Правка текста меняет страницы так же, как новый комментарий.
+    comment_changed(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.comment_changed(instance, -1)
+    comment_changed(instance)
+    search.remove_comment(instance.id)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        generations.group_changed(instance.id)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        follows.created(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    follows.deleted(instance)
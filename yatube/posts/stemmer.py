@@ -0,0 +1,90 @@
+"""Стеммер Snowball для русского языка и разбиение текста на термы.
+
+Используется поисковым индексом (posts.search): и тексты, и запросы
+приводятся к основам слов, поэтому «книги», «книгой» и «книгами»
+находятся по одному и тому же терму.
+"""
+import re
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = re.compile(
+    r'(ив|ивши|ившись|ыв|ывши|ывшись|(?<=[ая])(в|вши|вшись))$'
+)
+REFLEXIVE = re.compile(r'(ся|сь)$')
+ADJECTIVE = re.compile(
+    r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых'
+    r'|ую|юю|ая|яя|ою|ею)$'
+)
+PARTICIPLE = re.compile(r'(ивш|ывш|ующ|(?<=[ая])(ем|нн|вш|ющ|щ))$')
+VERB = re.compile(
+    r'(ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|ено'
+    r'|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю'
+    r'|(?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно))$'
+)
+NOUN = re.compile(
+    r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем'
+    r'|ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$'
+)
+DERIVATIONAL = re.compile(r'ость?$')
+SUPERLATIVE = re.compile(r'ейше?$')
+WORD = re.compile(r'\w+')
+
+
+def _region(word, start):
+    """Начало области после первой согласной, следующей за гласной."""
+    for i in range(start + 1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            return i + 1
+    return len(word)
+
+
+def _cut(pattern, text):
+    return pattern.sub('', text, count=1)
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    rv = next(
+        (i + 1 for i, letter in enumerate(word) if letter in VOWELS), None,
+    )
+    if rv is None:
+        return word
+    r2 = _region(word, _region(word, 0))
+    prefix, ending = word[:rv], word[rv:]
+
+    # Шаг 1: деепричастие, иначе возвратность и прилагательное,
+    # глагол или существительное.
+    cut = _cut(PERFECTIVE_GERUND, ending)
+    if cut == ending:
+        ending = _cut(REFLEXIVE, ending)
+        cut = _cut(ADJECTIVE, ending)
+        if cut != ending:
+            cut = _cut(PARTICIPLE, cut)
+        else:
+            cut = _cut(VERB, ending)
+            if cut == ending:
+                cut = _cut(NOUN, ending)
+    ending = cut
+
+    # Шаг 2.
+    if ending.endswith('и'):
+        ending = ending[:-1]
+
+    # Шаг 3: словообразовательный суффикс только в области R2.
+    found = DERIVATIONAL.search(ending)
+    if found and rv + found.start() >= r2:
+        ending = ending[:found.start()]
+
+    # Шаг 4.
+    cut = _cut(SUPERLATIVE, ending)
+    if cut != ending or ending.endswith('нн'):
+        ending = cut[:-1] if cut.endswith('нн') else cut
+    elif ending.endswith('ь'):
+        ending = ending[:-1]
+    return prefix + ending
+
+
+def terms(text):
+    """Основы всех слов текста в порядке следования."""
+    return [stem(word) for word in WORD.findall(text.lower())]
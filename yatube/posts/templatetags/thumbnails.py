@@ -0,0 +1,47 @@
+from django import template
+from django.templatetags.static import static
+
+from posts import settings, thumbnails
+
+register = template.Library()
+
+
+@register.inclusion_tag('posts/includes/picture.html')
+def post_picture(post, size, css_class=''):
+    """<picture> со srcset по формату, а без миниатюр - заглушка."""
+    rendition = settings.THUMBNAIL_RENDITIONS[size]
+    by_format = {}
+    for thumbnail in sorted(post.thumbnails.all(), key=lambda t: t.width):
+        if thumbnail.size == size:
+            by_format.setdefault(thumbnail.format, []).append(thumbnail)
+    context = {'css_class': css_class, 'sizes': rendition['sizes']}
+    fallback = next(
+        (name for name in reversed(settings.THUMBNAIL_FORMATS)
+         if name in by_format), None,
+    )
+    if fallback is None:
+        width, height = rendition['size']
+        return {
+            **context, 'src': static(settings.THUMBNAIL_PLACEHOLDER),
+            'width': width, 'height': height,
+        }
+    images = by_format.pop(fallback)
+    base_width = rendition['size'][0]
+    src = ([image for image in images if image.width <= base_width]
+           or images)[-1]
+    return {
+        **context,
+        'sources': [
+            {'type': thumbnails.MIME_TYPES[name],
+             'srcset': _srcset(by_format[name])}
+            for name in settings.THUMBNAIL_FORMATS if name in by_format
+        ],
+        'src': src.image.url,
+        'srcset': _srcset(images),
+        'width': src.width,
+        'height': src.height,
+    }
+
+
+def _srcset(images):
+    return ', '.join(f'{image.image.url} {image.width}w' for image in images)
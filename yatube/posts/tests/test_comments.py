@@ -0,0 +1,94 @@
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import settings
+from ..models import Comment, Post, User
+
+USER_NAME = 'user_1'
+PAGE = settings.NUMBER_COMMENT_PAGINATION
+
+
+class CommentPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username=USER_NAME)
+        cls.post = Post.objects.create(text='post', author=cls.user)
+        cls.POST_DETAIL_URL = reverse(
+            'posts:post_detail', args=[cls.post.id],
+        )
+        cls.COMMENTS_URL = reverse('posts:post_comments', args=[cls.post.id])
+        cls.client = Client()
+
+    def add_comments(self, count):
+        start = Comment.objects.count()
+        for i in range(start, start + count):
+            author = User.objects.create(username=f'commenter_{i}')
+            Comment.objects.create(
+                post=self.post, author=author, text=str(i),
+            )
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        return len(context.captured_queries)
+
+    def test_detail_inlines_first_page(self):
+        self.add_comments(PAGE + 1)
+        comments = self.client.get(self.POST_DETAIL_URL).context['comments']
+        self.assertEqual(len(comments), PAGE)
+        self.assertEqual(
+            [comment.text for comment in comments],
+            [str(i) for i in range(PAGE, 0, -1)],
+        )
+        self.assertTrue(comments.has_next())
+
+    def test_fragments_cover_all_comments(self):
+        self.add_comments(PAGE * 2 + 1)
+        comments = self.client.get(self.POST_DETAIL_URL).context['comments']
+        texts = [comment.text for comment in comments]
+        while comments.has_next():
+            response = self.client.get(
+                f'{self.COMMENTS_URL}?after={comments.next_cursor}',
+            )
+            self.assertTemplateUsed(
+                response, 'posts/includes/comment_list.html',
+            )
+            comments = response.context['comments']
+            texts += [comment.text for comment in comments]
+        self.assertEqual(texts, [str(i) for i in range(PAGE * 2, -1, -1)])
+
+    def test_json_pages(self):
+        self.add_comments(PAGE + 1)
+        data = self.client.get(
+            self.COMMENTS_URL, HTTP_ACCEPT='application/json',
+        ).json()
+        self.assertEqual(len(data['comments']), PAGE)
+        self.assertEqual(data['comments'][0]['author'], f'commenter_{PAGE}')
+        data = self.client.get(
+            f'{self.COMMENTS_URL}?after={data["next"]}',
+            HTTP_ACCEPT='application/json',
+        ).json()
+        self.assertEqual(
+            [comment['text'] for comment in data['comments']], ['0'],
+        )
+        self.assertIsNone(data['next'])
+
+    def test_unknown_post(self):
+        response = self.client.get(
+            reverse('posts:post_comments', args=[self.post.id + 1]),
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_queries_do_not_depend_on_comment_count(self):
+        self.add_comments(1)
+        expected = {
+            url: self.count_queries(url)
+            for url in [self.POST_DETAIL_URL, self.COMMENTS_URL]
+        }
+        self.add_comments(PAGE * 2)
+        for url, queries in expected.items():
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), queries)
@@ -0,0 +1,82 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import Comment, Follow, Group, Post, User, UserCounters
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='user_1')
+        cls.user_2 = User.objects.create(username='user_2')
+        cls.group = Group.objects.create(
+            slug='group_slug_1',
+            title='group_1',
+            description='Тестовая группа 1',
+        )
+        cls.group_2 = Group.objects.create(
+            slug='group_slug_2',
+            title='group_2',
+            description='Тестовая группа 2',
+        )
+
+    def counters(self, user):
+        counters = UserCounters.objects.get(user=user)
+        return (
+            counters.posts,
+            counters.comments,
+            counters.followers,
+            counters.following,
+        )
+
+    def test_counters_follow_writes_and_deletes(self):
+        post = Post.objects.create(
+            text='post', author=self.user, group=self.group,
+        )
+        comment = Comment.objects.create(
+            post=post, author=self.user_2, text='comment',
+        )
+        follow = Follow.objects.create(user=self.user_2, author=self.user)
+        post.refresh_from_db()
+        self.group.refresh_from_db()
+        self.assertEqual(self.counters(self.user), (1, 0, 1, 0))
+        self.assertEqual(self.counters(self.user_2), (0, 1, 0, 1))
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(self.group.post_count, 1)
+
+        follow.delete()
+        comment.delete()
+        post.delete()
+        self.group.refresh_from_db()
+        self.assertEqual(self.counters(self.user), (0, 0, 0, 0))
+        self.assertEqual(self.counters(self.user_2), (0, 0, 0, 0))
+        self.assertEqual(self.group.post_count, 0)
+
+    def test_edit_moves_post_between_groups(self):
+        post = Post.objects.create(
+            text='post', author=self.user, group=self.group,
+        )
+        Comment.objects.create(post=post, author=self.user_2, text='c')
+        post.group = self.group_2
+        post.save()
+        post.refresh_from_db()
+        self.group.refresh_from_db()
+        self.group_2.refresh_from_db()
+        self.assertEqual(self.group.post_count, 0)
+        self.assertEqual(self.group_2.post_count, 1)
+        self.assertEqual(post.comment_count, 1)
+
+    def test_recount_counters_repairs_drift(self):
+        Post.objects.bulk_create(
+            Post(text=f'post {i}', author=self.user, group=self.group)
+            for i in range(3)
+        )
+        UserCounters.objects.filter(user=self.user_2).delete()
+        call_command('recount_counters', batch_size=1, stdout=StringIO())
+        self.group.refresh_from_db()
+        self.assertEqual(self.counters(self.user), (3, 0, 0, 0))
+        self.assertEqual(self.counters(self.user_2), (0, 0, 0, 0))
+        self.assertEqual(self.group.post_count, 3)
@@ -0,0 +1,150 @@
+from http import HTTPStatus
+
+from django.core.cache import caches
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+GROUP_SLUG = 'group_slug_1'
+USER_NAME = 'user_1'
+USER_NAME_2 = 'user_2'
+
+INDEX_URL = reverse('posts:index')
+GROUP_URL = reverse('posts:group_list', args=[GROUP_SLUG])
+PROFILE_URL = reverse('posts:profile', args=[USER_NAME])
+FOLLOW_INDEX = reverse('posts:follow_index')
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username=USER_NAME)
+        cls.user_2 = User.objects.create(username=USER_NAME_2)
+        cls.group = Group.objects.create(
+            slug=GROUP_SLUG,
+            title='group_1',
+            description='Тестовая группа 1',
+        )
+        cls.post = Post.objects.create(
+            text='post', author=cls.user, group=cls.group,
+        )
+        Follow.objects.create(user=cls.user_2, author=cls.user)
+        cls.POST_DETAIL_URL = reverse('posts:post_detail', args=[cls.post.id])
+        cls.URLS = [
+            INDEX_URL, GROUP_URL, PROFILE_URL, FOLLOW_INDEX,
+            cls.POST_DETAIL_URL,
+        ]
+
+    def setUp(self):
+        caches['fragments'].clear()
+        caches['counters'].clear()
+        self.user_client = Client()
+        self.user_client.force_login(self.user_2)
+
+    def revalidate(self, url, client=None):
+        client = client or self.user_client
+        etag = client.get(url)['ETag']
+        return client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_pages_are_not_rendered(self):
+        for url in self.URLS:
+            with self.subTest(url=url):
+                response = self.revalidate(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+                self.assertEqual(response.templates, [])
+
+    def edit_comment(self):
+        comment = Comment.objects.get(post=self.post)
+        comment.text = 'edited comment'
+        comment.save()
+
+    def test_edited_comment_is_sent_again(self):
+        comment = Comment.objects.create(
+            post=self.post, author=self.user_2, text='comment',
+        )
+        etag = self.user_client.get(self.POST_DETAIL_URL)['ETag']
+        comment.text = 'edited comment'
+        comment.save()
+        response = self.user_client.get(
+            self.POST_DETAIL_URL, HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'edited comment')
+
+    def test_changes_invalidate_etags(self):
+        changes = [
+            lambda: Post.objects.create(
+                text='new', author=self.user, group=self.group,
+            ),
+            lambda: Comment.objects.create(
+                post=self.post, author=self.user_2, text='comment',
+            ),
+            self.edit_comment,
+            self.group.save,
+        ]
+        for number, change in enumerate(changes):
+            etags = {
+                url: self.user_client.get(url)['ETag'] for url in self.URLS
+            }
+            change()
+            for url in self.URLS:
+                with self.subTest(change=number, url=url):
+                    self.assertNotEqual(
+                        self.user_client.get(url)['ETag'], etags[url],
+                    )
+
+    def test_follow_changes_profile_and_feed(self):
+        urls = [PROFILE_URL, FOLLOW_INDEX]
+        etags = {url: self.user_client.get(url)['ETag'] for url in urls}
+        Follow.objects.filter(user=self.user_2, author=self.user).delete()
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertNotEqual(
+                    self.user_client.get(url)['ETag'], etags[url],
+                )
+
+    def test_etags_vary_by_viewer(self):
+        guest_client = Client()
+        for url in [INDEX_URL, GROUP_URL, PROFILE_URL, self.POST_DETAIL_URL]:
+            with self.subTest(url=url):
+                self.assertNotEqual(
+                    guest_client.get(url)['ETag'],
+                    self.user_client.get(url)['ETag'],
+                )
+
+    def test_missing_objects_have_no_etag(self):
+        for url in [
+            reverse('posts:group_list', args=['missing']),
+            reverse('posts:profile', args=['missing']),
+            reverse('posts:post_detail', args=[self.post.id + 1]),
+        ]:
+            with self.subTest(url=url):
+                response = self.user_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+                self.assertFalse(response.has_header('ETag'))
+
+    def test_new_login_invalidates_pages_with_forms(self):
+        # Вход выдаёт новый CSRF-токен: форма комментария со старым
+        # токеном из кэша браузера была бы отклонена.
+        User.objects.create_user(username='reader', password='secret')
+        client = Client()
+        client.login(username='reader', password='secret')
+        etag = client.get(self.POST_DETAIL_URL)['ETag']
+        self.assertEqual(
+            client.get(
+                self.POST_DETAIL_URL, HTTP_IF_NONE_MATCH=etag,
+            ).status_code,
+            HTTPStatus.NOT_MODIFIED,
+        )
+        client.logout()
+        client.post(reverse('users:login'), {
+            'username': 'reader', 'password': 'secret',
+        })
+        self.assertEqual(
+            client.get(
+                self.POST_DETAIL_URL, HTTP_IF_NONE_MATCH=etag,
+            ).status_code,
+            HTTPStatus.OK,
+        )
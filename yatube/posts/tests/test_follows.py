@@ -0,0 +1,116 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase
+
+from .. import follows
+from ..models import Follow, Post, TimelineEntry, User, UserCounters
+
+AUTHORS = 5
+
+
+class FollowGraphTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='reader')
+        cls.authors = [
+            User.objects.create(username=f'author_{i}') for i in range(AUTHORS)
+        ]
+        cls.author_ids = [author.id for author in cls.authors]
+        for author in cls.authors:
+            Post.objects.create(text='post', author=author)
+
+    def setUp(self):
+        caches[follows.CACHE].clear()
+
+    def counters(self, user):
+        counters = UserCounters.objects.get(user=user)
+        return counters.followers, counters.following
+
+    def test_checks_are_served_from_cache(self):
+        Follow.objects.create(user=self.user, author=self.authors[1])
+        Follow.objects.create(user=self.user, author=self.authors[3])
+        follows.followees(self.user.id)
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                follows.is_following(self.user.id, self.author_ids[1])
+            )
+            self.assertFalse(
+                follows.is_following(self.user.id, self.author_ids[2])
+            )
+            self.assertEqual(
+                follows.following(self.user.id, self.author_ids),
+                {self.author_ids[1], self.author_ids[3]},
+            )
+
+    def test_follow_writes_invalidate_cache(self):
+        author_id = self.author_ids[0]
+        self.assertFalse(follows.is_following(self.user.id, author_id))
+        follow = Follow.objects.create(user=self.user, author=self.authors[0])
+        self.assertTrue(follows.is_following(self.user.id, author_id))
+        follow.delete()
+        self.assertFalse(follows.is_following(self.user.id, author_id))
+
+    def test_bulk_follow_is_idempotent(self):
+        Follow.objects.create(user=self.user, author=self.authors[0])
+        created = follows.follow(
+            self.user.id, self.author_ids + [self.user.id, self.author_ids[1]],
+        )
+        self.assertEqual(created, self.author_ids[1:])
+        self.assertEqual(follows.follow(self.user.id, self.author_ids), [])
+        self.assertEqual(
+            follows.following(self.user.id, self.author_ids),
+            set(self.author_ids),
+        )
+        self.assertEqual(self.counters(self.user), (0, AUTHORS))
+        self.assertEqual(self.counters(self.authors[1]), (1, 0))
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.user).count(), AUTHORS,
+        )
+
+    def test_side_effects_only_for_inserted_rows(self):
+        # Подписка, вставленная параллельно (здесь - без сигналов), не
+        # меняет счётчики второй раз.
+        Follow.objects.bulk_create([
+            Follow(user=self.user, author=self.authors[0]),
+        ])
+        with self.assertNumQueries(1):
+            follows._insert(
+                connection, self.user.id, self.author_ids[:1],
+            )
+        self.assertEqual(
+            follows.follow(self.user.id, self.author_ids[:2]),
+            self.author_ids[1:2],
+        )
+        self.assertEqual(self.counters(self.user), (0, 1))
+        self.assertEqual(self.counters(self.authors[0]), (0, 0))
+        self.assertEqual(self.counters(self.authors[1]), (1, 0))
+
+    def test_follow_without_returning(self):
+        Follow.objects.create(user=self.user, author=self.authors[0])
+        with mock.patch.object(follows, '_returning', return_value=False):
+            self.assertEqual(
+                follows.follow(self.user.id, self.author_ids[:3]),
+                self.author_ids[1:3],
+            )
+        self.assertEqual(self.counters(self.user), (0, 3))
+        self.assertTrue(follows.is_following(self.user.id, self.author_ids[2]))
+
+    def test_bulk_unfollow(self):
+        follows.follow(self.user.id, self.author_ids)
+        self.assertEqual(
+            follows.unfollow(self.user.id, self.author_ids[:2]), 2,
+        )
+        self.assertEqual(
+            follows.unfollow(self.user.id, self.author_ids[:2]), 0,
+        )
+        self.assertEqual(
+            follows.following(self.user.id, self.author_ids),
+            set(self.author_ids[2:]),
+        )
+        self.assertEqual(self.counters(self.user), (0, AUTHORS - 2))
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.user).count(), AUTHORS - 2,
+        )
@@ -1,3 +1,4 @@
+import hashlib
 import shutil
 import tempfile
 from http import HTTPStatus
@@ -31,6 +32,8 @@ GIF = (
     b'\x02\x00\x01\x00\x00\x02\x02\x0C'
     b'\x0A\x00\x3B'
 )
+# Картинки сохраняются под именем хэша содержимого.
+GIF_NAME = f'{UPLOAD}{hashlib.sha256(GIF).hexdigest()}.gif'
 UPLOADED = SimpleUploadedFile(
     name='GIF.gif',
     content=GIF,
@@ -112,14 +115,13 @@ class PostFormTests(TestCase):
             data=new_post,
             follow=True,
         )
-        image = f'{UPLOAD}{new_post["image"].name}'
         self.assertEqual(Post.objects.count(), 1)
         post = Post.objects.get()
         self.assertRedirects(response, PROFILE_URL)
         self.assertEqual(post.author, self.user)
         self.assertEqual(post.group.id, new_post['group'])
         self.assertEqual(post.text, new_post['text'])
-        self.assertEquals(post.image, image)
+        self.assertEquals(post.image, GIF_NAME)
 
     def test_add_post_anonymous(self):
         Post.objects.all().delete()
@@ -146,14 +148,13 @@ class PostFormTests(TestCase):
             data=edit_post,
             follow=True,
         )
-        image = f'{UPLOAD}{edit_post["image"].name}'
         post = response.context['post']
         self.assertEqual(response.status_code, HTTPStatus.OK)
         self.assertRedirects(response, self.POST_DETAIL_URL)
         self.assertEqual(post.text, edit_post['text'])
         self.assertEqual(post.group.id, edit_post['group'])
         self.assertEqual(post.author, self.post.author)
-        self.assertEquals(post.image, image)
+        self.assertEquals(post.image, GIF_NAME)
 
     def test_edit_post_another_user_and_guest(self):
         edit_post = {
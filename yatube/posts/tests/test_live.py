@@ -0,0 +1,130 @@
+import json
+from http import HTTPStatus
+
+from django.core.cache import caches
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts import settings
+from .. import live
+from ..models import Follow, Group, Post, User
+
+GROUP_SLUG = 'group_slug_1'
+LIVE_URL = reverse('posts:live')
+
+
+class HubTest(TransactionTestCase):
+    def check_hub(self, hub):
+        subscription = hub.subscribe()
+        self.assertIsNone(subscription.get(0))
+        hub.publish({'id': 1})
+        hub.publish({'id': 2})
+        self.assertEqual(subscription.get(1), {'id': 1})
+        self.assertEqual(subscription.get(1), {'id': 2})
+        self.assertIsNone(subscription.get(0))
+        subscription.close()
+
+    def test_local_hub(self):
+        hub = live.LocalHub()
+        self.check_hub(hub)
+        subscription = hub.subscribe()
+        for i in range(settings.LIVE_QUEUE_SIZE + 1):
+            hub.publish({'id': i})
+        self.assertEqual(
+            subscription.events.qsize(), settings.LIVE_QUEUE_SIZE,
+        )
+        subscription.close()
+        hub.publish({'id': 0})
+        self.assertEqual(hub._queues, set())
+
+    def test_cache_hub(self):
+        caches['default'].clear()
+        hub = live.CacheHub()
+        hub.poll_interval = 0.01
+        self.check_hub(hub)
+
+
+@override_settings(
+    LIVE_UPDATES=True, LIVE_KEEPALIVE_SECONDS=0.05, LIVE_MAX_SECONDS=0.3,
+)
+class LiveFeedTest(TransactionTestCase):
+    def setUp(self):
+        caches['counters'].clear()
+        self.user = User.objects.create(username='user_1')
+        self.author = User.objects.create(username='author_1')
+        self.group = Group.objects.create(
+            slug=GROUP_SLUG,
+            title='group_1',
+            description='Тестовая группа 1',
+        )
+        Follow.objects.create(user=self.user, author=self.author)
+        self.user_client = Client()
+        self.user_client.force_login(self.user)
+
+    def publish(self):
+        Post.objects.create(
+            text='в группе', author=self.user, group=self.group,
+        )
+        Post.objects.create(text='x' * 500, author=self.author)
+
+    def events(self, query):
+        response = self.user_client.get(f'{LIVE_URL}?{query}')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = iter(response.streaming_content)
+        # Первый кусок - retry, после него подписка уже открыта.
+        self.assertTrue(next(chunks).startswith(b'retry:'))
+        self.publish()
+        events = []
+        for chunk in chunks:
+            if chunk.startswith(b'id:'):
+                events.append(json.loads(chunk.decode().split('data: ')[1]))
+        response.close()
+        return events
+
+    def test_feeds(self):
+        for query, texts in [
+            ['feed=all', ['в группе', 'x' * 139 + '…']],
+            [f'feed=group&group={GROUP_SLUG}', ['в группе']],
+            ['feed=follow', ['x' * 139 + '…']],
+        ]:
+            with self.subTest(query=query):
+                self.assertEqual(
+                    [event['text'] for event in self.events(query)], texts,
+                )
+
+    def test_event_fields(self):
+        event = self.events(f'feed=group&group={GROUP_SLUG}')[0]
+        self.assertEqual(event, {
+            'id': Post.objects.get(group=self.group).id,
+            'author': 'user_1',
+            'author_id': self.user.id,
+            'group': GROUP_SLUG,
+            'text': 'в группе',
+        })
+
+    def test_bad_feeds(self):
+        for query, status in [
+            ['feed=group&group=missing', HTTPStatus.NOT_FOUND],
+            ['feed=follow', HTTPStatus.FORBIDDEN],
+        ]:
+            with self.subTest(query=query):
+                self.assertEqual(
+                    Client().get(f'{LIVE_URL}?{query}').status_code, status,
+                )
+
+    def test_pages_subscribe_only_when_enabled(self):
+        group_url = reverse('posts:group_list', args=[GROUP_SLUG])
+        for enabled in [True, False]:
+            with self.subTest(enabled=enabled):
+                with self.settings(LIVE_UPDATES=enabled):
+                    caches['pages'].clear()
+                    response = Client().get(group_url)
+                    self.assertEqual(
+                        b'data-live=' in response.content, enabled,
+                    )
+                    response = Client().get(f'{LIVE_URL}?feed=all')
+                    response.close()
+                    self.assertEqual(
+                        response.status_code == HTTPStatus.NOT_FOUND,
+                        not enabled,
+                    )
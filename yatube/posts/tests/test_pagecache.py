@@ -0,0 +1,109 @@
+from django.core.cache import caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+GROUP_SLUG = 'group_slug_1'
+USER_NAME = 'user_1'
+USER_NAME_2 = 'user_2'
+
+INDEX_URL = reverse('posts:index')
+GROUP_URL = reverse('posts:group_list', args=[GROUP_SLUG])
+PROFILE_URL = reverse('posts:profile', args=[USER_NAME])
+
+
+@override_settings(PAGE_CACHE_MAX_AGE=30)
+class PageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username=USER_NAME)
+        cls.user_2 = User.objects.create(username=USER_NAME_2)
+        cls.group = Group.objects.create(
+            slug=GROUP_SLUG,
+            title='group_1',
+            description='Тестовая группа 1',
+        )
+        cls.post = Post.objects.create(
+            text='post', author=cls.user, group=cls.group,
+        )
+        cls.POST_DETAIL_URL = reverse('posts:post_detail', args=[cls.post.id])
+        cls.URLS = [INDEX_URL, GROUP_URL, PROFILE_URL, cls.POST_DETAIL_URL]
+
+    def setUp(self):
+        caches['pages'].clear()
+        self.guest_client = Client()
+        self.user_client = Client()
+        self.user_client.force_login(self.user_2)
+
+    def is_cached(self, url):
+        return not self.guest_client.get(url).templates
+
+    def test_anonymous_pages_are_served_from_cache(self):
+        for url in self.URLS:
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                with self.assertNumQueries(0):
+                    second = self.guest_client.get(url)
+                self.assertEqual(second.content, first.content)
+                self.assertEqual(second.templates, [])
+
+    def test_headers(self):
+        response = self.guest_client.get(self.POST_DETAIL_URL)
+        self.assertEqual(
+            set(response['Surrogate-Key'].split()),
+            {f'author:{self.user.id}', 'groups'},
+        )
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=30', response['Cache-Control'])
+        response = self.user_client.get(self.POST_DETAIL_URL)
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_authenticated_pages_are_not_cached(self):
+        self.user_client.get(INDEX_URL)
+        self.assertTrue(self.user_client.get(INDEX_URL).templates)
+        self.assertFalse(self.is_cached(INDEX_URL))
+
+    def test_writes_purge_pages(self):
+        cases = [
+            [
+                lambda: Post.objects.create(text='new', author=self.user),
+                [INDEX_URL, PROFILE_URL, self.POST_DETAIL_URL],
+            ],
+            [
+                lambda: Comment.objects.create(
+                    post=self.post, author=self.user_2, text='comment',
+                ),
+                self.URLS,
+            ],
+            [self.group.save, self.URLS],
+            [
+                lambda: Follow.objects.create(
+                    user=self.user_2, author=self.user,
+                ),
+                [PROFILE_URL],
+            ],
+        ]
+        for number, [change, purged] in enumerate(cases):
+            for url in self.URLS:
+                self.guest_client.get(url)
+            change()
+            for url in self.URLS:
+                with self.subTest(change=number, url=url):
+                    self.assertEqual(self.is_cached(url), url not in purged)
+
+    def test_comment_edit_purges_pages(self):
+        comment = Comment.objects.create(
+            post=self.post, author=self.user_2, text='comment',
+        )
+        for url in self.URLS:
+            self.guest_client.get(url)
+        comment.text = 'edited comment'
+        comment.save()
+        for url in self.URLS:
+            with self.subTest(url=url):
+                self.assertFalse(self.is_cached(url))
+        self.assertContains(
+            self.guest_client.get(self.POST_DETAIL_URL), 'edited comment',
+        )
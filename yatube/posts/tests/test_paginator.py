@@ -0,0 +1,98 @@
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import settings
+from ..models import Follow, Group, Post, User
+from ..paginator import CursorPage, CursorPaginator
+
+GROUP_SLUG = 'group_slug_1'
+USER_NAME = 'user_1'
+USER_NAME_2 = 'user_2'
+
+INDEX_URL = reverse('posts:index')
+GROUP_URL = reverse('posts:group_list', args=[GROUP_SLUG])
+PROFILE_URL = reverse('posts:profile', args=[USER_NAME])
+FOLLOW_INDEX = reverse('posts:follow_index')
+CURSOR_VIEWS = (
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:follow_index',
+)
+PAGE = settings.NUMBER_POST_PAGINATION
+
+
+@override_settings(CURSOR_PAGINATION_VIEWS=CURSOR_VIEWS)
+class CursorPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username=USER_NAME)
+        cls.user_2 = User.objects.create(username=USER_NAME_2)
+        cls.group = Group.objects.create(
+            slug=GROUP_SLUG,
+            title='group_1',
+            description='Тестовая группа 1',
+        )
+        for i in range(PAGE * 2 + 1):
+            Post.objects.create(
+                text=f'post {i}',
+                author=cls.user,
+                group=cls.group,
+            )
+        Follow.objects.create(author=cls.user, user=cls.user_2)
+        cls.user_client = Client()
+        cls.user_client.force_login(cls.user_2)
+
+    def walk(self, url):
+        pages = []
+        page = self.user_client.get(url).context['page_obj']
+        pages.append(page)
+        while page.has_next():
+            page = self.user_client.get(
+                f'{url}?after={page.next_cursor}'
+            ).context['page_obj']
+            pages.append(page)
+        return pages
+
+    def test_cursor_pages_cover_feed(self):
+        expected = list(Post.objects.order_by('-pub_date', '-id'))
+        for url in [INDEX_URL, GROUP_URL, PROFILE_URL, FOLLOW_INDEX]:
+            with self.subTest(url=url):
+                pages = self.walk(url)
+                self.assertIsInstance(pages[0], CursorPage)
+                self.assertEqual(
+                    [len(page) for page in pages], [PAGE, PAGE, 1]
+                )
+                self.assertEqual(
+                    [post for page in pages for post in page], expected
+                )
+
+    def test_before_returns_previous_page(self):
+        first, second, _ = self.walk(INDEX_URL)
+        page = self.user_client.get(
+            f'{INDEX_URL}?before={second.previous_cursor}'
+        ).context['page_obj']
+        self.assertEqual(list(page), list(first))
+        self.assertFalse(page.has_previous())
+
+    def test_invalid_cursor_returns_first_page(self):
+        first = self.user_client.get(INDEX_URL).context['page_obj']
+        for query in ['?after=garbage', '?before=%%%', '?after=WyJ4Il0']:
+            with self.subTest(query=query):
+                page = self.user_client.get(INDEX_URL + query)
+                self.assertEqual(
+                    list(page.context['page_obj']), list(first)
+                )
+
+    def test_deep_page_is_single_query_without_count(self):
+        paginator = CursorPaginator(Post.objects.all(), PAGE)
+        token = paginator.cursor_for(Post.objects.order_by('pub_date')[1])
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(len(paginator.get_page(after=token)), 1)
+        self.assertEqual(len(context.captured_queries), 1)
+        sql = context.captured_queries[0]['sql']
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
@@ -0,0 +1,58 @@
+import os
+from unittest import skipUnless
+
+import pytest
+from django.core.cache import caches
+from django.test import TestCase
+
+from core import benchmark, regression
+from .. import seed
+from ..models import User
+
+# Страницы posts.views без побочных эффектов.
+VIEWS = (
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'posts:post_comments',
+    'posts:follow_index',
+    'posts:search',
+    'posts:post_create',
+)
+
+
+@pytest.mark.performance
+@skipUnless(
+    os.getenv('PERF_TESTS') or os.getenv('PERF_UPDATE_BASELINE'),
+    'замеры производительности включаются PERF_TESTS=1',
+)
+class ViewPerformanceTest(TestCase):
+    """Замеры страниц против posts/tests/performance_baseline.json.
+
+    Задержки зависят от загрузки машины, поэтому тест запускается только
+    с PERF_TESTS=1 (в pytest: -m performance). Новая baseline:
+    PERF_UPDATE_BASELINE=1 python manage.py test posts.tests.test_performance
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        caches['counters'].clear()
+        for _ in seed.seed(
+            users=50, groups=3, posts=500, comments=1000, follows=5,
+        ):
+            pass
+        cls.user = User.objects.get(username='bench_1')
+
+    def setUp(self):
+        for alias in ['pages', 'fragments', 'counters']:
+            caches[alias].clear()
+
+    def test_views(self):
+        regression.check([
+            (name, benchmark.LocalClient(self.user), url)
+            for name, url in benchmark.urls(
+                benchmark.parameters(self.user),
+            )
+            if name in VIEWS
+        ])
@@ -0,0 +1,69 @@
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import settings
+from ..models import Comment, Follow, Group, Post, User
+
+GROUP_SLUG = 'group_slug_1'
+USER_NAME = 'user_1'
+USER_NAME_2 = 'user_2'
+
+INDEX_URL = reverse('posts:index')
+GROUP_URL = reverse('posts:group_list', args=[GROUP_SLUG])
+PROFILE_URL = reverse('posts:profile', args=[USER_NAME])
+FOLLOW_INDEX = reverse('posts:follow_index')
+
+
+class ListingQueriesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username=USER_NAME)
+        cls.user_2 = User.objects.create(username=USER_NAME_2)
+        cls.group = Group.objects.create(
+            slug=GROUP_SLUG,
+            title='group_1',
+            description='Тестовая группа 1',
+        )
+        Follow.objects.create(author=cls.user, user=cls.user_2)
+        cls.user_client = Client()
+        cls.user_client.force_login(cls.user_2)
+
+    def add_posts(self, count):
+        for i in range(count):
+            post = Post.objects.create(
+                text=f'post {i}',
+                author=self.user,
+                group=self.group,
+            )
+            Comment.objects.create(post=post, author=self.user_2, text='c')
+
+    def count_queries(self, url):
+        caches['fragments'].clear()
+        caches['counters'].clear()
+        with CaptureQueriesContext(connection) as context:
+            self.user_client.get(url)
+        return len(context.captured_queries)
+
+    def test_listing_queries_do_not_depend_on_page_size(self):
+        urls = [INDEX_URL, GROUP_URL, PROFILE_URL, FOLLOW_INDEX]
+        self.add_posts(1)
+        expected = {url: self.count_queries(url) for url in urls}
+        self.add_posts(settings.NUMBER_POST_PAGINATION)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), expected[url])
+
+    def test_comment_count_annotation(self):
+        self.add_posts(2)
+        post = Post.objects.for_listing().first()
+        Comment.objects.create(post=post, author=self.user, text='c')
+        counts = {
+            post.id: post.comment_count
+            for post in Post.objects.for_listing()
+        }
+        self.assertEqual(counts[post.id], 2)
+        self.assertEqual(sorted(counts.values()), [1, 2])
@@ -0,0 +1,123 @@
+import re
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import settings
+from ..models import Comment, Follow, Group, Post, User
+from ..paginator import CursorPaginator
+
+GROUP_SLUG = 'group_slug_1'
+USER_NAME = 'user_1'
+USER_NAME_2 = 'user_2'
+
+INDEX_URL = reverse('posts:index')
+GROUP_URL = reverse('posts:group_list', args=[GROUP_SLUG])
+PROFILE_URL = reverse('posts:profile', args=[USER_NAME])
+FOLLOW_INDEX = reverse('posts:follow_index')
+CURSOR_VIEWS = (
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:follow_index',
+)
+PAGE = settings.NUMBER_POST_PAGINATION
+
+# SQLite: полный проход по таблице (без индекса) и сортировка во
+# временном B-дереве. Проход по subquery - это производная таблица, в
+# которую Django 2.2 оборачивает count() с аннотациями, её внутренний
+# план проверяется отдельными строками. PostgreSQL: Seq Scan и Sort.
+SQLITE_PROBLEMS = re.compile(r'^SCAN (TABLE )?(?!subquery)\S+$|TEMP B-TREE')
+POSTGRES_PROBLEMS = re.compile(r'^\s*(->\s+)?(Seq Scan|Sort)\b')
+
+
+def explain(sql):
+    """Строки плана запроса, в которых он читает таблицу целиком."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL enable_sort = off')
+            cursor.execute(f'EXPLAIN {sql}')
+            lines = [row[0] for row in cursor.fetchall()]
+            pattern = POSTGRES_PROBLEMS
+        else:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            lines = [row[-1] for row in cursor.fetchall()]
+            pattern = SQLITE_PROBLEMS
+    return [line for line in lines if pattern.search(line)]
+
+
+class QueryPlanTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username=USER_NAME)
+        cls.user_2 = User.objects.create(username=USER_NAME_2)
+        cls.group = Group.objects.create(
+            slug=GROUP_SLUG,
+            title='group_1',
+            description='Тестовая группа 1',
+        )
+        Follow.objects.create(author=cls.user, user=cls.user_2)
+        for i in range(PAGE * 2 + 2):
+            post = Post.objects.create(
+                text=f'post {i}',
+                author=cls.user,
+                group=cls.group if i % 2 else None,
+            )
+            Comment.objects.create(post=post, author=cls.user_2, text='c')
+        cls.post = post
+        cls.user_client = Client()
+        cls.user_client.force_login(cls.user_2)
+
+    def assert_plans(self, url):
+        caches['fragments'].clear()
+        with CaptureQueriesContext(connection) as context:
+            self.user_client.get(url)
+        for query in context.captured_queries:
+            if query['sql'].startswith('SELECT'):
+                with self.subTest(url=url, sql=query['sql']):
+                    self.assertEqual(explain(query['sql']), [])
+
+    def next_cursor(self, url):
+        page = self.user_client.get(url).context['page_obj']
+        return f'{url}?after={page.next_cursor}'
+
+    def test_listing_plans(self):
+        urls = [
+            INDEX_URL,
+            GROUP_URL,
+            PROFILE_URL,
+            FOLLOW_INDEX,
+            reverse('posts:post_detail', args=[self.post.id]),
+            reverse('posts:post_comments', args=[self.post.id]),
+        ]
+        for url in urls:
+            self.assert_plans(url)
+            self.assert_plans(f'{url}?page=2')
+
+    @override_settings(CURSOR_PAGINATION_VIEWS=CURSOR_VIEWS)
+    def test_cursor_listing_plans(self):
+        for url in [INDEX_URL, GROUP_URL, PROFILE_URL, FOLLOW_INDEX]:
+            self.assert_plans(url)
+            self.assert_plans(self.next_cursor(url))
+
+    def test_follower_queries_use_index(self):
+        followers = Follow.objects.filter(author=self.user)
+        for queryset in [
+            followers.values_list('user_id', flat=True),
+            Follow.objects.filter(author=self.user, user=self.user_2),
+            Comment.objects.filter(post=self.post),
+        ]:
+            with self.subTest(sql=str(queryset.query)):
+                self.assertEqual(explain(str(queryset.query)), [])
+        self.assertEqual(followers.count(), 1)
+
+    def test_paginator_uses_queryset_ordering_fields(self):
+        paginator = CursorPaginator(
+            Post.objects.order_by('-pub_date', '-id'), PAGE,
+        )
+        self.assertEqual(paginator.fields, ('pub_date', 'id'))
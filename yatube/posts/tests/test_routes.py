@@ -18,6 +18,9 @@ CASES = [
     [f'/profile/{USER_NAME}/follow/', 'profile_follow', [USER_NAME]],
     ['/follow/', 'follow_index', []],
     [f'/posts/{POST_ID}/comment/', 'add_comment', [POST_ID]],
+    [f'/posts/{POST_ID}/comments/', 'post_comments', [POST_ID]],
+    ['/search/', 'search', []],
+    ['/live/', 'live', []],
 ]
 
 
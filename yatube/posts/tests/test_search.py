@@ -0,0 +1,98 @@
+from io import StringIO
+
+from django.contrib.admin.sites import site
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post, User
+from ..stemmer import stem
+
+SEARCH_URL = reverse('posts:search')
+
+
+class StemmerTest(TestCase):
+    def test_word_forms_share_stem(self):
+        forms = [
+            ['книга', 'книги', 'книгой', 'книгами'],
+            ['читать', 'читали', 'читает'],
+            ['красивый', 'красивая', 'красивейшая'],
+            ['ёлка', 'елки'],
+        ]
+        for words in forms:
+            with self.subTest(words=words):
+                self.assertEqual(len({stem(word) for word in words}), 1)
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='user_1')
+        cls.book = Post.objects.create(
+            text='Прочитал интересные книги про котов', author=cls.user,
+        )
+        cls.books = Post.objects.create(
+            text='Книга, книги, книгой - кругом книги', author=cls.user,
+        )
+        cls.other = Post.objects.create(text='Про погоду', author=cls.user)
+        Comment.objects.create(
+            post=cls.other, author=cls.user, text='Лучше бы книгу почитал',
+        )
+        cls.guest = Client()
+
+    def found(self, query, **params):
+        page = self.guest.get(
+            SEARCH_URL, {'q': query, **params}
+        ).context['page_obj']
+        return page
+
+    def test_search_uses_stems_posts_and_comments(self):
+        found = list(self.found('книгой'))
+        self.assertEqual(found[0], self.books)
+        self.assertEqual(set(found), {self.books, self.book, self.other})
+        self.assertEqual(list(self.found('котами')), [self.book])
+        self.assertEqual(list(self.found('нет такого слова')), [])
+        self.assertIsNone(self.found(' !! '))
+
+    def test_index_follows_edits_and_deletes(self):
+        book = Post.objects.get(pk=self.book.pk)
+        book.text = 'Теперь про собак'
+        book.save()
+        self.assertEqual(list(self.found('котов')), [])
+        self.assertEqual(list(self.found('собаки')), [self.book])
+        Comment.objects.all().delete()
+        self.assertNotIn(self.other, self.found('книга'))
+        Post.objects.filter(pk=self.books.pk).delete()
+        self.assertEqual(list(self.found('книга')), [])
+
+    def test_keyset_pages(self):
+        for i in range(5):
+            Post.objects.create(text=f'книга номер {i}', author=self.user)
+        expected = list(self.found('книга'))
+        paginator = self.guest.get(
+            SEARCH_URL, {'q': 'книга'}
+        ).context['page_obj'].paginator
+        paginator.per_page = 2
+        pages = [paginator.get_page()]
+        while pages[-1].has_next():
+            pages.append(paginator.get_page(after=pages[-1].next_cursor))
+        self.assertEqual([post for page in pages for post in page], expected)
+        previous = paginator.get_page(before=pages[2].previous_cursor)
+        self.assertEqual(list(previous), list(pages[1]))
+
+    def test_rebuild_search_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM posts_search')
+        self.assertEqual(list(self.found('котов')), [])
+        call_command('rebuild_search_index', batch_size=1, stdout=StringIO())
+        self.assertEqual(list(self.found('котов')), [self.book])
+
+    def test_admin_search_uses_index(self):
+        admin = site._registry[Post]
+        request = RequestFactory().get('/admin/posts/post/')
+        queryset, _ = admin.get_search_results(
+            request, Post.objects.all(), 'книгу',
+        )
+        self.assertEqual(set(queryset), {self.book, self.books})
@@ -0,0 +1,108 @@
+from datetime import timedelta
+
+from django.core.cache import caches
+from django.db import connection
+from django.db.models import Count, F, Max, Min
+from django.test import TestCase
+
+from .. import search, seed
+from ..models import Comment, Follow, Group, Post, TimelineEntry, User
+
+
+def run(**options):
+    options = {
+        'users': 60, 'groups': 3, 'posts': 300, 'comments': 400,
+        'follows': 5, 'batch_size': 50, **options,
+    }
+    return list(seed.seed(**options))
+
+
+def follow_graph():
+    return list(Follow.objects.order_by('user_id', 'author_id').values_list(
+        'user__username', 'author__username',
+    ))
+
+
+class SeedTest(TestCase):
+    def setUp(self):
+        caches['counters'].clear()
+
+    def test_rows_and_derived_data(self):
+        progress = run()
+        self.assertEqual(User.objects.count(), 60)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 300)
+        self.assertEqual(Comment.objects.count(), 400)
+        self.assertIn(('создано', Post, 50), progress)
+        post = Post.objects.order_by('-comment_count').first()
+        self.assertEqual(post.comment_count, post.comments.count())
+        author = User.objects.get(username='bench_0')
+        self.assertEqual(
+            author.counters.followers, author.following.count(),
+        )
+        follower = Follow.objects.filter(author=author).first().user
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=follower, author=author).count(),
+            author.posts.count(),
+        )
+        self.assertTrue(
+            author.check_password(seed.PASSWORD),
+        )
+
+    def test_power_law(self):
+        run(users=200, follows=10, comments=0, derived=False)
+        followers = list(Follow.objects.values('author').annotate(
+            count=Count('id'),
+        ).order_by('-count').values_list('count', flat=True))
+        # Первые 10% авторов собирают большую часть подписчиков.
+        self.assertGreater(sum(followers[:20]), sum(followers) / 2)
+
+    def test_reproducible(self):
+        run(derived=False)
+        graph = follow_graph()
+        seed.clear()
+        self.assertFalse(User.objects.exists())
+        run(derived=False)
+        self.assertEqual(follow_graph(), graph)
+        seed.clear()
+        run(seed=1, derived=False)
+        self.assertNotEqual(follow_graph(), graph)
+
+    def test_dates_are_spread(self):
+        run(days=100, derived=False)
+        dates = Post.objects.aggregate(
+            first=Min('pub_date'), last=Max('pub_date'),
+        )
+        self.assertGreater(dates['last'] - dates['first'], timedelta(days=95))
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('pk', flat=True)),
+            list(Post.objects.order_by('pub_date').values_list(
+                'pk', flat=True,
+            )),
+        )
+        self.assertFalse(
+            Comment.objects.filter(created__lt=F('post__pub_date')).exists()
+        )
+        self.assertGreater(
+            Comment.objects.values('created').distinct().count(), 300,
+        )
+
+    def test_clear_keeps_other_data_consistent(self):
+        run()
+        reader = User.objects.create(username='reader')
+        author = User.objects.get(username='bench_0')
+        Follow.objects.create(user=reader, author=author)
+        Comment.objects.create(
+            post=author.posts.first(), author=reader, text='чужой',
+        )
+        seed.clear()
+        self.assertEqual(list(User.objects.all()), [reader])
+        self.assertFalse(Group.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(TimelineEntry.objects.exists())
+        reader.counters.refresh_from_db()
+        self.assertEqual(reader.counters.following, 0)
+        if search._indexed(connection):
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT COUNT(*) FROM {search.TABLE}')
+                self.assertEqual(cursor.fetchone(), (0,))
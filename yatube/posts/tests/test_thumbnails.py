@@ -0,0 +1,155 @@
+import io
+import shutil
+import tempfile
+
+from django import conf
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from core import jobs, metrics
+from posts import settings, thumbnails
+from ..models import Post, Thumbnail, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=conf.settings.BASE_DIR)
+
+USER_NAME = 'user_1'
+INDEX_URL = reverse('posts:index')
+PLACEHOLDER = static(settings.THUMBNAIL_PLACEHOLDER)
+
+
+def uploaded(name, color, size=(1200, 600)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return SimpleUploadedFile(
+        name=name, content=buffer.getvalue(), content_type='image/png',
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, JOBS_EAGER=True)
+class ThumbnailTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username=USER_NAME)
+        cls.user_client = Client()
+        cls.user_client.force_login(cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, **kwargs):
+        return Post.objects.create(
+            text='post', author=self.user,
+            image=uploaded('a.png', 'red', **kwargs),
+        )
+
+    def test_renditions_rendered_on_save(self):
+        post = self.create_post()
+        formats = thumbnails.formats()
+        self.assertIn('webp', formats)
+        self.assertEqual(formats[-1], 'jpeg')
+        rendered = Thumbnail.objects.filter(post=post, size='card')
+        self.assertEqual(
+            set(rendered.values_list('width', 'format')),
+            {(width, name) for width in (480, 960) for name in formats},
+        )
+        for thumbnail in rendered:
+            with self.subTest(thumbnail=str(thumbnail)):
+                with Image.open(thumbnail.image.path) as image:
+                    self.assertEqual(image.format.lower(), thumbnail.format)
+                    self.assertEqual(
+                        image.size, (thumbnail.width, thumbnail.height),
+                    )
+        self.assertEqual(rendered.get(width=960, format='jpeg').height, 339)
+
+    def test_small_image_is_not_upscaled(self):
+        post = self.create_post(size=(300, 200))
+        self.assertEqual(
+            set(Thumbnail.objects.filter(post=post).values_list(
+                'width', flat=True,
+            )),
+            {480},
+        )
+
+    def test_picture_markup(self):
+        post = self.create_post()
+        rendered = Thumbnail.objects.filter(post=post)
+        webp = rendered.filter(format='webp').order_by('width')
+        jpeg = rendered.get(format='jpeg', width=960)
+        srcset = ', '.join(
+            f'{thumbnail.image.url} {thumbnail.width}w' for thumbnail in webp
+        )
+        for url in [INDEX_URL, reverse('posts:post_detail', args=[post.id])]:
+            with self.subTest(url=url):
+                content = self.user_client.get(url).content.decode()
+                self.assertIn(
+                    f'<source type="image/webp" srcset="{srcset}"', content,
+                )
+                self.assertIn(f'src="{jpeg.image.url}"', content)
+                self.assertIn('width="960" height="339"', content)
+                self.assertNotIn(PLACEHOLDER, content)
+
+    def test_changed_image_replaces_thumbnails(self):
+        post = self.create_post()
+        old = set(
+            Thumbnail.objects.filter(post=post).values_list('image', flat=True)
+        )
+        post.image = uploaded('b.png', 'blue')
+        post.save()
+        new = Thumbnail.objects.filter(post=post)
+        self.assertFalse(old & set(new.values_list('image', flat=True)))
+        with Image.open(new.get(format='jpeg', width=480).image.path) as image:
+            red, _, blue = image.getpixel((0, 0))
+        self.assertGreater(blue, red)
+        post.image = ''
+        post.save()
+        self.assertFalse(Thumbnail.objects.filter(post=post).exists())
+
+    @override_settings(JOBS_EAGER=False, JOBS_SCHEDULE={})
+    def test_placeholder_until_job_finished(self):
+        post = self.create_post()
+        self.assertFalse(Thumbnail.objects.filter(post=post).exists())
+        self.assertIn(
+            PLACEHOLDER, self.user_client.get(INDEX_URL).content.decode(),
+        )
+        self.assertEqual(jobs.work(burst=True), 1)
+        content = self.user_client.get(INDEX_URL).content.decode()
+        self.assertIn(
+            Thumbnail.objects.filter(post=post).first().image.url, content,
+        )
+        self.assertNotIn(PLACEHOLDER, content)
+
+    @override_settings(JOBS_EAGER=False)
+    def test_command_renders_missing_thumbnails(self):
+        posts = [self.create_post() for _ in range(3)]
+        Post.objects.create(text='no image', author=self.user)
+        call_command('generate_thumbnails', batch_size=2, stdout=io.StringIO())
+        self.assertEqual(
+            set(Thumbnail.objects.values_list('post', flat=True)),
+            {post.id for post in posts},
+        )
+
+    def test_unreadable_image_is_skipped(self):
+        with self.assertLogs('posts.thumbnails', 'WARNING'):
+            post = Post.objects.create(
+                text='post', author=self.user,
+                image=SimpleUploadedFile('broken.png', b'not an image'),
+            )
+        self.assertFalse(Thumbnail.objects.filter(post=post).exists())
+
+    @override_settings(JOBS_EAGER=False, JOBS_SCHEDULE={})
+    def test_worker_timing_reaches_metrics(self):
+        self.create_post()
+        metrics.reset()
+        self.assertEqual(jobs.work(burst=True), 1)
+        # Воркер пишет замер в БД, а не в гистограммы своего процесса.
+        self.assertEqual(metrics._histograms, {})
+        self.assertIn(
+            'yatube_thumbnail_seconds_count 1\n', metrics.exposition(),
+        )
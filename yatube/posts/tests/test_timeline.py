@@ -0,0 +1,99 @@
+from django.core.cache import caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import jobs
+from core.models import Job
+from .. import timeline
+from ..models import Follow, Post, TimelineEntry, User
+
+FOLLOW_INDEX = reverse('posts:follow_index')
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create(username='reader')
+        cls.author = User.objects.create(username='author')
+        cls.other = User.objects.create(username='other')
+        cls.old_post = Post.objects.create(text='old', author=cls.author)
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    def setUp(self):
+        caches['counters'].clear()
+
+    def feed(self):
+        return list(
+            self.reader_client.get(FOLLOW_INDEX).context['page_obj']
+        )
+
+    def test_follow_backfills_and_unfollow_trims(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.feed(), [self.old_post])
+        Follow.objects.get(user=self.reader, author=self.author).delete()
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+        self.assertEqual(self.feed(), [])
+
+    def test_new_post_fans_out_to_followers(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='new', author=self.author)
+        Post.objects.create(text='not followed', author=self.other)
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post)
+        )
+        self.assertEqual(self.feed(), [post, self.old_post])
+
+    @override_settings(TIMELINE_CELEBRITY_FOLLOWERS=1)
+    def test_celebrity_posts_are_read_on_demand(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.other, author=self.author)
+        self.assertTrue(timeline.is_celebrity(self.author.id))
+        post = Post.objects.create(text='celebrity', author=self.author)
+        self.assertFalse(TimelineEntry.objects.filter(post=post))
+        self.assertEqual(self.feed(), [post, self.old_post])
+        Follow.objects.get(user=self.other, author=self.author).delete()
+        self.assertFalse(timeline.is_celebrity(self.author.id))
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post)
+        )
+        self.assertEqual(self.feed(), [post, self.old_post])
+
+    @override_settings(JOBS_EAGER=False, JOBS_SCHEDULE={})
+    def test_backfill_is_queued(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+        self.assertEqual(
+            Job.objects.get().task, 'posts.timeline.backfill',
+        )
+        etag = self.reader_client.get(FOLLOW_INDEX)['ETag']
+        jobs.work(burst=True)
+        response = self.reader_client.get(
+            FOLLOW_INDEX, HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(list(response.context['page_obj']), [self.old_post])
+
+    @override_settings(JOBS_EAGER=False, JOBS_SCHEDULE={})
+    def test_backfill_skipped_after_unfollow(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.get(user=self.reader, author=self.author).delete()
+        jobs.work(burst=True)
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+
+    @override_settings(
+        TIMELINE_CELEBRITY_FOLLOWERS=1, JOBS_EAGER=False, JOBS_SCHEDULE={},
+    )
+    def test_former_celebrity_is_backfilled_by_job(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.other, author=self.author)
+        Job.objects.all().delete()
+        Follow.objects.get(user=self.other, author=self.author).delete()
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+        self.assertEqual(
+            Job.objects.get().task, 'posts.timeline.backfill_followers',
+        )
+        jobs.work(burst=True)
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=self.old_post)
+        )
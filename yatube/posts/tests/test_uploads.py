@@ -0,0 +1,150 @@
+import io
+import os
+import shutil
+import struct
+import tempfile
+
+from django import conf
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopUpload
+from django.test import (
+    Client, RequestFactory, TestCase, override_settings,
+)
+from django.urls import reverse
+from PIL import Image
+
+from .. import uploads
+from ..models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=conf.settings.BASE_DIR)
+
+USER_NAME = 'user_1'
+POST_CREATE_URL = reverse('posts:post_create')
+ORIENTATION = 0x0112
+
+
+def image_file(name, size=(40, 20), image_format='PNG', noise=False,
+               **options):
+    image = Image.new('RGB', size, 'red')
+    if noise:
+        image = Image.frombytes('RGB', size, os.urandom(size[0] * size[1] * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+def mpo_file(name, exif):
+    """Два JPEG-кадра с индексом MPF, как снимки многих телефонов."""
+    frames = []
+    for color in ['red', 'blue']:
+        buffer = io.BytesIO()
+        Image.new('RGB', (40, 20), color).save(buffer, 'JPEG', exif=exif)
+        frames.append(buffer.getvalue())
+    # Заголовок TIFF и IFD с версией, числом кадров и их записями.
+    entries_offset = 8 + 2 + 3 * 12 + 4
+    ifd = struct.pack('>2sHIH', b'MM', 42, 8, 3)
+    ifd += struct.pack('>HHI4s', 0xB000, 7, 4, b'0100')
+    ifd += struct.pack('>HHII', 0xB001, 4, 1, len(frames))
+    ifd += struct.pack('>HHII', 0xB002, 7, 16 * len(frames), entries_offset)
+    ifd += struct.pack('>I', 0)
+    segment_size = 2 + 2 + 4 + len(ifd) + 16 * len(frames)
+    first_size = len(frames[0]) + segment_size
+    # Смещения кадров считаются от заголовка TIFF: SOI, маркер, длина, MPF.
+    header_offset = 2 + 4 + 4
+    entries = struct.pack('>IIIHH', 0x20030000, first_size, 0, 0, 0)
+    entries += struct.pack(
+        '>IIIHH', 0, len(frames[1]), first_size - header_offset, 0, 0,
+    )
+    segment = b'\xff\xe2' + struct.pack('>H', segment_size - 2)
+    segment += b'MPF\0' + ifd + entries
+    content = frames[0][:2] + segment + frames[0][2:] + frames[1]
+    return SimpleUploadedFile(name, content)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageUploadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username=USER_NAME)
+        cls.user_client = Client()
+        cls.user_client.force_login(cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create(self, image):
+        return self.user_client.post(
+            POST_CREATE_URL, data={'text': 'post', 'image': image},
+        )
+
+    def test_rejected_images(self):
+        cases = [
+            ['file_too_large', {'IMAGE_UPLOAD_MAX_SIZE': 1000},
+             image_file('noise.png', size=(100, 100), noise=True)],
+            ['too_many_pixels', {'IMAGE_MAX_PIXELS': 100},
+             image_file('big.png')],
+            ['invalid_format', {},
+             image_file('image.bmp', image_format='BMP')],
+        ]
+        for code, limits, image in cases:
+            with self.subTest(code=code), override_settings(**limits):
+                response = self.create(image)
+                self.assertEqual(
+                    response.context['form'].errors.as_data()['image'][0].code,
+                    code,
+                )
+                self.assertFalse(Post.objects.exists())
+
+    def test_exif_orientation_applied_and_stripped(self):
+        exif = Image.Exif()
+        exif[ORIENTATION] = 6
+        self.create(image_file('photo.jpg', image_format='JPEG', exif=exif))
+        with Image.open(Post.objects.get().image.path) as image:
+            self.assertEqual(image.size, (20, 40))
+            self.assertFalse(image.getexif())
+
+    def test_mpo_photo_stored_as_jpeg(self):
+        exif = Image.Exif()
+        exif[ORIENTATION] = 6
+        image = mpo_file('photo.jpg', exif)
+        with Image.open(image) as opened:
+            self.assertEqual((opened.format, opened.n_frames), ('MPO', 2))
+        image.seek(0)
+        self.create(image)
+        path = Post.objects.get().image.path
+        self.assertTrue(path.endswith('.jpg'))
+        with Image.open(path) as stored:
+            self.assertEqual(stored.format, 'JPEG')
+            self.assertEqual(stored.size, (20, 40))
+            self.assertFalse(stored.getexif())
+
+    @override_settings(IMAGE_UPLOAD_MAX_SIZE=1000)
+    def test_upload_stops_at_size_limit(self):
+        request = RequestFactory().post('/')
+        handler = uploads.StreamingUploadHandler(request)
+        handler.new_file('image', 'big.png', 'image/png', None)
+        handler.receive_data_chunk(b'x' * 600, 0)
+        with self.assertRaises(StopUpload) as stop:
+            handler.receive_data_chunk(b'x' * 600, 600)
+        self.assertTrue(stop.exception.connection_reset)
+        self.assertEqual(request.oversized_uploads, {'image': 'big.png'})
+
+    def stored(self):
+        directory = os.path.join(TEMP_MEDIA_ROOT, 'posts')
+        os.makedirs(directory, exist_ok=True)
+        return set(os.listdir(directory))
+
+    def test_identical_images_stored_once(self):
+        content = image_file('a.png', size=(30, 30)).read()
+        stored = self.stored()
+        for name in ['a.png', 'b.png']:
+            self.create(SimpleUploadedFile(name, content))
+        names = set(Post.objects.values_list('image', flat=True))
+        self.assertEqual(len(names), 1)
+        self.assertEqual(
+            self.stored() - stored - {'thumbnails'},
+            {os.path.basename(names.pop())},
+        )
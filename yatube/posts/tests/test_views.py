@@ -3,13 +3,13 @@ import tempfile
 
 from django import conf
 from django.conf import settings
-from django.core.cache import cache
+from django.core.cache import caches
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from posts import settings
-from ..models import Follow, Group, Post, User
+from posts import settings, timeline
+from ..models import Comment, Follow, Group, Post, User
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=conf.settings.BASE_DIR)
 
@@ -137,6 +137,8 @@ class PostTest(TestCase):
                 group=self.group,
             ) for i in range(settings.NUMBER_POST_PAGINATION + count)
         )
+        # bulk_create не отправляет сигналы - ленту подписок собираем сами.
+        timeline.rebuild(self.user_2.id)
 
         urls = [
             [INDEX_URL, settings.NUMBER_POST_PAGINATION],
@@ -157,19 +159,80 @@ class PostTest(TestCase):
 
     def test_cache_index(self):
         first_client = self.user_client.get(INDEX_URL)
-        Post.objects.all().delete()
+        # update() не отправляет сигналы - фрагмент остаётся в кэше.
+        Post.objects.update(text='Изменено в обход сигналов')
         two_client = self.user_client.get(INDEX_URL)
         self.assertEqual(
             first_client.content,
             two_client.content,
         )
-        cache.clear()
+        caches['fragments'].clear()
         third_client = self.user_client.get(INDEX_URL)
         self.assertNotEqual(
             two_client.content,
             third_client.content,
         )
 
+    def fragment_key(self, client, url):
+        # Страницу целиком анонимам отдаёт кэш страниц, здесь проверяется
+        # фрагмент под ним.
+        caches['pages'].clear()
+        return client.get(url).context['fragment_key']
+
+    def test_cache_invalidated_by_changes(self):
+        comment_url = reverse('posts:add_comment', args=[self.post.id])
+        all_urls = [INDEX_URL, GROUP_URL, PROFILE_URL]
+        cases = [
+            [
+                lambda: self.user_client.post(comment_url, {'text': 'к'}),
+                all_urls,
+            ],
+            [self.edit_comment, all_urls],
+            [lambda: Group.objects.get(pk=self.group.pk).save(), all_urls],
+            [
+                lambda: Post.objects.create(text='Пост', author=self.user),
+                [INDEX_URL, PROFILE_URL],
+            ],
+            [lambda: Post.objects.all().delete(), all_urls],
+        ]
+        for change, urls in cases:
+            before = {
+                url: self.fragment_key(self.guest_client, url)
+                for url in all_urls
+            }
+            change()
+            for url in all_urls:
+                with self.subTest(url=url):
+                    after = self.fragment_key(self.guest_client, url)
+                    self.assertEqual(before[url] != after, url in urls)
+
+    def edit_comment(self):
+        comment = Comment.objects.filter(post=self.post).first()
+        comment.text = 'Исправленный комментарий'
+        comment.save()
+
+    def test_comment_edit_changes_post_detail(self):
+        Comment.objects.create(
+            post=self.post, author=self.user_2, text='Комментарий',
+        )
+        etag = self.guest_client.get(self.POST_DETAIL_URL)['ETag']
+        self.edit_comment()
+        response = self.guest_client.get(
+            self.POST_DETAIL_URL, HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, 'Исправленный комментарий')
+
+    def test_cache_separates_viewers(self):
+        keys = {
+            self.fragment_key(client, INDEX_URL)
+            for client in [
+                self.guest_client, self.user_client, self.another_client,
+            ]
+        }
+        self.assertEqual(len(keys), 3)
+
     def test_follow(self):
         Follow.objects.all().delete()
         self.user_client.get(PROFILE_FOLLOW)
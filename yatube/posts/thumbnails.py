@@ -0,0 +1,160 @@
+"""Миниатюры картинок постов, готовые до первого показа.
+
+После сохранения поста с новой картинкой задача рендеринга уходит в
+очередь фоновых задач (core.jobs), а шаблоны выводят только ссылки на
+готовые файлы из модели Thumbnail, пока их нет - заглушку.
+Каждый вариант (THUMBNAIL_RENDITIONS) рисуется в нескольких ширинах и
+форматах, тег post_picture собирает из них <picture> со srcset.
+Посты, оставшиеся без миниатюр, дорисовывает периодическая задача
+generate_missing и команда generate_thumbnails.
+"""
+import hashlib
+import io
+import logging
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from core import jobs, metrics
+from . import generations, settings
+from .models import Post, Thumbnail
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {'jpeg': 'jpg'}
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+
+
+def formats():
+    """Форматы из THUMBNAIL_FORMATS, которые умеет сохранять Pillow."""
+    Image.init()
+    return [
+        name for name in settings.THUMBNAIL_FORMATS
+        if name.upper() in Image.SAVE
+    ]
+
+
+def widths(rendition, source_width):
+    """Ширины варианта без растягивания: крупнее исходника не рисуем."""
+    fitting = [
+        width for width in rendition['widths'] if width <= source_width
+    ]
+    return fitting or [min(rendition['widths'])]
+
+
+def _encode(image, name):
+    buffer = io.BytesIO()
+    image.save(
+        buffer, name.upper(), quality=settings.THUMBNAIL_QUALITY[name],
+    )
+    return ContentFile(buffer.getvalue())
+
+
+def _source(image):
+    """Картинка в RGB или None, если файла нет или это не картинка."""
+    try:
+        with image.open('rb') as file, Image.open(file) as source:
+            return source.convert('RGB')
+    except (OSError, SuspiciousFileOperation):
+        return None
+
+
+def render(post_id):
+    """Рисует все варианты из THUMBNAIL_RENDITIONS во всех форматах."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    source_name = post.image.name
+    # Имя файла зависит от картинки, чтобы браузеры не держали старую.
+    suffix = hashlib.md5(source_name.encode()).hexdigest()[:8]
+    source = _source(post.image)
+    if source is None:
+        # Повтор не поможет: задача завершается без миниатюр.
+        logger.warning(
+            'Картинка поста %s не читается: %s', post_id, source_name,
+        )
+        return
+    thumbnails = []
+    for size, rendition in settings.THUMBNAIL_RENDITIONS.items():
+        base_width, base_height = rendition['size']
+        for width in widths(rendition, source.width):
+            height = round(width * base_height / base_width)
+            image = ImageOps.fit(source, (width, height), Image.LANCZOS)
+            for name in formats():
+                thumbnail = Thumbnail(
+                    post=post, size=size, format=name,
+                    width=width, height=height,
+                )
+                thumbnail.image.save(
+                    f'{post.id}-{size}-{width}-{suffix}.'
+                    f'{EXTENSIONS.get(name, name)}',
+                    _encode(image, name),
+                    save=False,
+                )
+                thumbnails.append(thumbnail)
+    with transaction.atomic():
+        # Пока рисовали, картинку могли заменить - тогда результат устарел.
+        if not Post.objects.select_for_update().filter(
+            pk=post_id, image=source_name,
+        ).exists():
+            for thumbnail in thumbnails:
+                thumbnail.image.delete(save=False)
+            return
+        discard(post_id)
+        Thumbnail.objects.bulk_create(thumbnails)
+    generations.posts_changed(post.author_id, post.group_id)
+
+
+def discard(post_id):
+    """Удаляет миниатюры поста вместе с файлами."""
+    for thumbnail in Thumbnail.objects.filter(post_id=post_id):
+        thumbnail.image.delete(save=False)
+        thumbnail.delete()
+
+
+def generate(post_id):
+    """Задача очереди: рендеринг миниатюр поста."""
+    # Задачу выполняет воркер: замер должен дойти до веб-процесса.
+    with metrics.timer('thumbnail_seconds', shared=True):
+        render(post_id)
+
+
+def _run(post_id):
+    """Рендеринг, ошибки которого не останавливают обход постов."""
+    try:
+        generate(post_id)
+    except Exception:
+        logger.exception('Не удалось нарисовать миниатюры поста %s', post_id)
+
+
+def enqueue(post_id):
+    """Ставит рендеринг в очередь вместе с транзакцией сохранения поста."""
+    jobs.enqueue(generate, post_id)
+
+
+def missing(batch_size=100):
+    """Дорисовывает миниатюры постов с картинкой, но без миниатюр.
+
+    Отдаёт число обработанных постов после каждой пачки.
+    """
+    last_pk = 0
+    while True:
+        batch = list(
+            Post.objects.exclude(image='').filter(
+                pk__gt=last_pk, thumbnails__isnull=True,
+            ).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not batch:
+            break
+        for post_id in batch:
+            _run(post_id)
+        yield len(batch)
+        last_pk = batch[-1]
+
+
+def generate_missing():
+    """Периодическая задача: дорисовывает миниатюры, которых нет."""
+    for _ in missing():
+        pass
@@ -0,0 +1,173 @@
+"""Материализованная лента подписок (fan-out on write).
+
+При публикации пост раскладывается по лентам всех подписчиков автора,
+поэтому чтение страницы «Избранные авторы» - это выборка по индексу
+(user, pub_date) из TimelineEntry. Посты «знаменитостей» (подписчиков
+больше TIMELINE_CELEBRITY_FOLLOWERS) не раскладываются: такие ленты
+дочитываются при чтении (fan-out on read).
+
+Подписка и выход автора из знаменитостей дописывают ленты задачами
+очереди (core.jobs), а не в запросе: вставок бывает до
+TIMELINE_CELEBRITY_FOLLOWERS × TIMELINE_BACKFILL_POSTS. Задача сдвигает
+поколение пользователя, поэтому ETag ленты меняется, когда записи готовы.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, F, Q
+
+from core import jobs
+from . import generations
+from .models import Follow, Post, TimelineEntry
+
+CACHE = 'counters'
+CELEBRITIES_CACHE_KEY = 'posts:timeline:celebrities'
+BATCH_SIZE = 500
+
+
+def celebrity_ids():
+    cache = caches[CACHE]
+    celebrities = cache.get(CELEBRITIES_CACHE_KEY)
+    if celebrities is None:
+        celebrities = set(
+            Follow.objects.values('author').annotate(
+                followers=Count('id'),
+            ).filter(
+                followers__gt=settings.TIMELINE_CELEBRITY_FOLLOWERS,
+            ).values_list('author', flat=True)
+        )
+        cache.set(CELEBRITIES_CACHE_KEY, celebrities)
+    return celebrities
+
+
+def is_celebrity(author_id):
+    return author_id in celebrity_ids()
+
+
+def _entries(user_ids, posts):
+    for user_id in user_ids:
+        for post_id, author_id, pub_date in posts:
+            yield TimelineEntry(
+                user_id=user_id,
+                post_id=post_id,
+                author_id=author_id,
+                pub_date=pub_date,
+            )
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    if is_celebrity(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id,
+    ).values_list('user_id', flat=True).iterator()
+    TimelineEntry.objects.bulk_create(
+        _entries(followers, [(post.id, post.author_id, post.pub_date)]),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    """Задача очереди: последние посты автора в ленту после подписки."""
+    if is_celebrity(author_id) or not Follow.objects.filter(
+        user_id=user_id, author_id=author_id,
+    ).exists():
+        # Пока задача ждала, автор стал знаменитостью или от него отписались.
+        return
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date'
+    ).values_list(
+        'id', 'author_id', 'pub_date'
+    )[:settings.TIMELINE_BACKFILL_POSTS]
+    TimelineEntry.objects.bulk_create(
+        _entries([user_id], posts),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    generations.users_changed(user_id)
+
+
+def backfill_followers(author_id):
+    """Задача очереди: посты бывшей знаменитости в ленты подписчиков."""
+    if is_celebrity(author_id):
+        return
+    TimelineEntry.objects.bulk_create(
+        author_entries(author_id),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    generations.users_changed(*Follow.objects.filter(
+        author_id=author_id,
+    ).values_list('user_id', flat=True))
+
+
+def author_entries(author_id):
+    """Записи лент всех подписчиков с последними постами автора."""
+    posts = list(Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date'
+    ).values_list(
+        'id', 'author_id', 'pub_date'
+    )[:settings.TIMELINE_BACKFILL_POSTS])
+    followers = Follow.objects.filter(
+        author_id=author_id,
+    ).values_list('user_id', flat=True).iterator()
+    return _entries(followers, posts)
+
+
+def trim(user_id, author_id):
+    """Убирает из ленты посты автора после отписки."""
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def rebuild(user_id):
+    """Пересобирает ленту пользователя по его подпискам."""
+    TimelineEntry.objects.filter(user_id=user_id).delete()
+    followees = Follow.objects.filter(user_id=user_id).values_list(
+        'author_id', flat=True
+    )
+    for author_id in followees:
+        backfill(user_id, author_id)
+
+
+def followers_changed(author_id, followed):
+    """Следит за переходом автора через порог знаменитости.
+
+    Вызывается после подписки (followed=True) или отписки. Когда автор
+    перестаёт быть знаменитостью, его посты раскладываются по лентам
+    подписчиков задачей очереди.
+    """
+    followers = Follow.objects.filter(author_id=author_id).count()
+    threshold = settings.TIMELINE_CELEBRITY_FOLLOWERS
+    if followed and followers == threshold + 1:
+        caches[CACHE].delete(CELEBRITIES_CACHE_KEY)
+    elif not followed and followers == threshold:
+        caches[CACHE].delete(CELEBRITIES_CACHE_KEY)
+        jobs.enqueue(backfill_followers, author_id)
+
+
+def feed(user):
+    """Посты ленты подписок пользователя.
+
+    Без знаменитостей лента сортируется по копиям pub_date и id поста в
+    TimelineEntry и читается по индексу (user, pub_date, post) без
+    сортировки. Посты знаменитостей приходится сливать с лентой, и тогда
+    она сортируется по полям самого поста.
+    """
+    celebrities = celebrity_ids()
+    followed = celebrities and list(
+        Follow.objects.filter(
+            user=user, author__in=celebrities,
+        ).values_list('author_id', flat=True)
+    )
+    if followed:
+        return Post.objects.filter(
+            Q(pk__in=TimelineEntry.objects.filter(user=user).values('post'))
+            | Q(author__in=followed)
+        )
+    # Аннотации, а не пути через timeline_entries: фильтр курсора по ним
+    # не добавляет второго join'а к многозначной связи.
+    return Post.objects.filter(timeline_entries__user=user).annotate(
+        timeline_date=F('timeline_entries__pub_date'),
+        timeline_post=F('timeline_entries__post_id'),
+    ).order_by('-timeline_date', '-timeline_post')
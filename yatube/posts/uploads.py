@@ -0,0 +1,157 @@
+"""Приём картинок постов без буферизации в памяти.
+
+StreamingUploadHandler пишет загрузку кусками во временный файл, по
+пути считая размер и sha256, а на лимите размера обрывает приём тела
+запроса; files() подставляет вместо такого файла пустую заглушку, и
+форма сообщает о размере. Дальше форма (PostForm) проверяет только
+заголовок картинки - формат и число пикселей - до того, как Pillow
+начнёт её декодировать, а затем за один проход поворачивает картинку по
+EXIF и выбрасывает метаданные. Файл сохраняется под именем хэша
+содержимого, поэтому одинаковые картинки лежат на диске один раз.
+"""
+import hashlib
+import tempfile
+import warnings
+
+from django import conf
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import (
+    StopUpload, TemporaryFileUploadHandler,
+)
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+from . import settings
+from .models import Post
+
+CHUNK_SIZE = 64 * 2 ** 10
+
+
+class StreamingUploadHandler(TemporaryFileUploadHandler):
+    """Всегда пишет на диск и обрывает загрузку на лимите размера."""
+
+    chunk_size = CHUNK_SIZE
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > conf.settings.IMAGE_UPLOAD_MAX_SIZE:
+            # Остаток тела не читаем: воркер не ждёт, пока клиент
+            # догрузит файл, который всё равно будет отклонён.
+            oversized = getattr(self.request, 'oversized_uploads', {})
+            oversized[self.field_name] = self.file_name
+            self.request.oversized_uploads = oversized
+            raise StopUpload(connection_reset=True)
+        self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.content_hash = self.digest.hexdigest()
+        return file
+
+
+def files(request):
+    """request.FILES для формы, с заглушками вместо оборванных загрузок.
+
+    Как и request.FILES or None, отдаёт None, если файлов нет.
+    """
+    oversized = getattr(request, 'oversized_uploads', {})
+    if not oversized:
+        return request.FILES or None
+    result = request.FILES.copy()
+    for field_name, file_name in oversized.items():
+        placeholder = SimpleUploadedFile(file_name, b'')
+        placeholder.oversized = True
+        result[field_name] = placeholder
+    return result
+
+
+def check(file):
+    """Проверяет размер и заголовок картинки, не декодируя пиксели."""
+    limit = conf.settings.IMAGE_UPLOAD_MAX_SIZE
+    if getattr(file, 'oversized', False) or file.size > limit:
+        raise ValidationError(
+            'Картинка больше %(limit)s.',
+            code='file_too_large',
+            params={'limit': filesizeformat(limit)},
+        )
+    file.seek(0)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', Image.DecompressionBombWarning)
+            with Image.open(file) as image:
+                image_format, (width, height) = _format(image), image.size
+    except (Image.DecompressionBombError, Image.DecompressionBombWarning):
+        image_format, width, height = None, float('inf'), 1
+    except OSError:
+        # Не картинка - такой файл отклонит сам ImageField.
+        return
+    finally:
+        file.seek(0)
+    if width * height > conf.settings.IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'В картинке слишком много пикселей.', code='too_many_pixels',
+        )
+    if image_format not in settings.IMAGE_FORMATS:
+        raise ValidationError(
+            'Поддерживаются только форматы %(formats)s.',
+            code='invalid_format',
+            params={'formats': ', '.join(settings.IMAGE_FORMATS)},
+        )
+
+
+def _digest(file):
+    file.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def _format(image):
+    return settings.IMAGE_FORMAT_ALIASES.get(image.format, image.format)
+
+
+def _strip(image):
+    """Поворачивает картинку по EXIF и пересохраняет без метаданных."""
+    output = tempfile.TemporaryFile()
+    options = {'exif': b''}
+    image_format = _format(image)
+    if image_format == 'JPEG':
+        options['quality'] = settings.IMAGE_JPEG_QUALITY
+    ImageOps.exif_transpose(image).save(output, image_format, **options)
+    return File(output)
+
+
+def store(file):
+    """Нормализует загруженную картинку и возвращает её для ImageField.
+
+    Если картинка с тем же содержимым уже сохранена, возвращается имя
+    существующего файла, и повторно ничего не пишется.
+    """
+    file.seek(0)
+    with Image.open(file) as image:
+        extension = settings.IMAGE_FORMATS[_format(image)]
+        # Анимацию не пересохраняем, а у MPO оставляем только основной кадр.
+        if image.getexif() and (
+            getattr(image, 'n_frames', 1) == 1 or image.format == 'MPO'
+        ):
+            content, digest = _strip(image), None
+        else:
+            content = file
+            digest = getattr(file, 'content_hash', None)
+    digest = digest or _digest(content)
+    name = Post._meta.get_field('image').generate_filename(
+        None, f'{digest}.{extension}',
+    )
+    if default_storage.exists(name):
+        return name
+    content.name = name.rsplit('/', 1)[-1]
+    return content
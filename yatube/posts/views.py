@@ -1,58 +1,173 @@
+from django import conf
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
 from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import condition
 
-from posts import settings
-from posts.models import Follow, Group, Post, User
+from posts import (
+    etags, follows, generations, live, pagecache, search, settings,
+    timeline, uploads,
+)
+from posts.models import Comment, Group, Post, User
 from .forms import CommentForm, PostForm
+from .paginator import CursorPaginator
 
 
 def pagination_page(queryset, request):
+    view_name = request.resolver_match.view_name
+    if view_name in conf.settings.CURSOR_PAGINATION_VIEWS:
+        return CursorPaginator(
+            queryset, settings.NUMBER_POST_PAGINATION
+        ).get_page(request.GET.get('after'), request.GET.get('before'))
     return Paginator(
         queryset, settings.NUMBER_POST_PAGINATION
     ).get_page(request.GET.get('page'))
 
 
+def comments_page(post_id, request):
+    """Страница комментариев поста, от новых к старым, по курсору after."""
+    return CursorPaginator(
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        settings.NUMBER_COMMENT_PAGINATION,
+        keys=('created', 'id'),
+    ).get_page(request.GET.get('after'))
+
+
+@condition(etag_func=etags.index)
 def index(request):
+    pagecache.tag(request, generations.ALL)
     return render(request, 'posts/index.html', {
-        'page_obj': pagination_page(Post.objects.all(), request),
+        'page_obj': pagination_page(Post.objects.for_listing(), request),
+        **generations.fragment_context(request, 'index', generations.ALL),
     })
 
 
+@condition(etag_func=etags.group)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
+    pagecache.tag(request, generations.group(group.id))
     return render(request, 'posts/group_list.html', {
         'group': group,
-        'page_obj': pagination_page(group.posts.all(), request),
+        'page_obj': pagination_page(
+            Post.objects.for_listing().filter(group=group), request,
+        ),
+        **generations.fragment_context(
+            request, 'group', generations.group(group.id),
+        ),
     })
 
 
+@condition(etag_func=etags.profile)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('counters'), username=username,
+    )
+    pagecache.tag(
+        request, generations.author(author.id), generations.GROUPS,
+        generations.user(author.id),
+    )
     following = (
         request.user != author and request.user.is_authenticated
-        and Follow.objects.filter(author=author).filter(
-            user=request.user,
-        ).exists()
+        and follows.is_following(request.user.id, author.id)
     )
     return render(request, 'posts/profile.html', {
         'author': author,
-        'page_obj': pagination_page(author.posts.all(), request),
+        'page_obj': pagination_page(
+            Post.objects.for_listing().filter(author=author), request,
+        ),
         'following': following,
+        **generations.fragment_context(
+            request, 'profile', generations.author(author.id),
+            generations.GROUPS,
+        ),
     })
 
 
+@condition(etag_func=etags.post_detail)
 def post_detail(request, post_id):
+    post = get_object_or_404(
+        Post.objects.select_related(
+            'author__counters', 'group',
+        ).prefetch_related('thumbnails'),
+        pk=post_id,
+    )
+    # Комментарии сдвигают поколение автора поста.
+    pagecache.tag(
+        request, generations.author(post.author_id), generations.GROUPS,
+    )
     return render(request, 'posts/post_detail.html', {
-        'post': get_object_or_404(Post, pk=post_id),
+        'post': post,
+        'comments': comments_page(post_id, request),
         'form': CommentForm(),
     })
 
 
+def post_comments(request, post_id):
+    """Следующая страница комментариев для «Показать ещё».
+
+    По умолчанию отдаёт HTML-фрагмент (комментарии и новую кнопку), при
+    Accept: application/json - те же данные в JSON.
+    """
+    post = get_object_or_404(Post.objects.only('id'), pk=post_id)
+    page = comments_page(post.id, request)
+    if 'application/json' in request.META.get('HTTP_ACCEPT', ''):
+        return JsonResponse({
+            'comments': [
+                {
+                    'id': comment.id,
+                    'author': comment.author.username,
+                    'text': comment.text,
+                    'created': comment.created.isoformat(),
+                }
+                for comment in page
+            ],
+            'next': page.next_cursor,
+        })
+    return render(request, 'posts/includes/comment_list.html', {
+        'post': post,
+        'comments': page,
+    })
+
+
+def live_feed(request):
+    """Новые посты как server-sent events: ?feed=all, group или follow."""
+    if not conf.settings.LIVE_UPDATES:
+        raise Http404
+    feed = request.GET.get('feed')
+    if feed == 'group':
+        group = get_object_or_404(Group, slug=request.GET.get('group'))
+        events = live.stream(group=group.slug)
+    elif feed == 'follow':
+        if not request.user.is_authenticated:
+            raise PermissionDenied
+        events = live.stream(follower_id=request.user.id)
+    else:
+        events = live.stream()
+    response = StreamingHttpResponse(
+        events, content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # nginx не должен копить поток в буфере.
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def post_search(request):
+    query = request.GET.get('q', '').strip()
+    paginator = search.paginator(query, settings.NUMBER_POST_PAGINATION)
+    return render(request, 'posts/search.html', {
+        'query': query,
+        'page_obj': paginator and paginator.get_page(
+            request.GET.get('after'), request.GET.get('before'),
+        ),
+    })
+
+
 @login_required
 def post_create(request):
-    form = PostForm(
-        request.POST or None, files=request.FILES or None)
+    form = PostForm(request.POST or None, files=uploads.files(request))
     if not form.is_valid():
         return render(request, 'posts/create_post.html', {'form': form})
     post = form.save(commit=False)
@@ -68,7 +183,7 @@ def post_edit(request, post_id):
         return redirect('posts:post_detail', post_id=post_id)
     form = PostForm(
         request.POST or None,
-        files=request.FILES or None,
+        files=uploads.files(request),
         instance=post,
     )
     if form.is_valid():
@@ -94,28 +209,25 @@ def add_comment(request, post_id):
 
 
 @login_required
+@condition(etag_func=etags.follow_index)
 def follow_index(request):
     return render(request, 'posts/follow.html', {
         'page_obj': pagination_page(
-            Post.objects.filter(author__following__user=request.user),
-            request,
+            timeline.feed(request.user).for_listing(), request,
         ),
     })
 
 
 @login_required
 def profile_follow(request, username):
-    user = request.user
     author = get_object_or_404(User, username=username)
-    is_follower = Follow.objects.filter(user=user, author=author)
-    if user != author and not is_follower.exists():
-        Follow.objects.create(user=user, author=author)
+    follows.follow(request.user.id, [author.id])
     return redirect('posts:profile', username=author)
 
 
 @login_required
 def profile_unfollow(request, username):
-    get_object_or_404(
-        Follow, user=request.user, author__username=username
-    ).delete()
+    author = get_object_or_404(User, username=username)
+    if not follows.unfollow(request.user.id, [author.id]):
+        raise Http404
     return redirect('posts:profile', username=username)
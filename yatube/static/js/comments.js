@@ -0,0 +1,12 @@
+// «Показать ещё» под комментариями: без JS ссылка открывает следующую
+// страницу комментариев целиком, с JS - подгружает фрагмент на место кнопки.
+document.addEventListener('click', function (event) {
+  var link = event.target.closest('a[data-comments]');
+  if (!link) {
+    return;
+  }
+  event.preventDefault();
+  fetch(link.dataset.comments)
+    .then(function (response) { return response.text(); })
+    .then(function (html) { link.outerHTML = html; });
+});
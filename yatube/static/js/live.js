@@ -0,0 +1,11 @@
+// Живая лента: вместо перезагрузки страницы ради новых постов держим одно
+// соединение server-sent events и показываем, сколько постов появилось.
+document.querySelectorAll('[data-live]').forEach(function (banner) {
+  var source = new EventSource(banner.dataset.live);
+  var count = 0;
+  source.addEventListener('post', function () {
+    count += 1;
+    banner.querySelector('[data-live-count]').textContent = count;
+    banner.hidden = false;
+  });
+});
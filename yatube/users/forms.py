@@ -1,6 +1,9 @@
+from django.contrib.auth import forms as auth_forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth import get_user_model
+from django.template import loader
 
+from core import jobs
 
 User = get_user_model()
 
@@ -9,3 +12,22 @@ class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class PasswordResetForm(auth_forms.PasswordResetForm):
+    """Письмо со ссылкой сброса уходит фоновой задачей (core.jobs)."""
+
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        subject = ''.join(
+            loader.render_to_string(subject_template_name, context)
+            .splitlines()
+        )
+        body = loader.render_to_string(email_template_name, context)
+        html = html_email_template_name and loader.render_to_string(
+            html_email_template_name, context,
+        )
+        jobs.enqueue(
+            jobs.send_email, subject, body, from_email, [to_email], html,
+        )
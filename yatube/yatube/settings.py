@@ -28,16 +28,21 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
-    'sorl.thumbnail',
+    'api.apps.ApiConfig',
     'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.nplusone.QueryPatternMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.routers.ReplicaRoutingMiddleware',
+    'posts.pagecache.PageCacheMiddleware',
+    'core.limiter.LoadSheddingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
@@ -49,7 +54,7 @@ TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.metrics.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -59,6 +64,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.live.live',
             ],
         },
     },
@@ -66,13 +72,47 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# SQLite в режиме WAL с общей очередью писателей (core.backends.sqlite3).
+# Соединения живут DB_CONN_MAX_AGE секунд и переиспользуются запросами
+# одного воркера; писатель ждёт своей очереди не дольше
+# DB_WRITE_TIMEOUT секунд.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 600)),
+        'OPTIONS': {
+            'timeout': int(os.getenv('DB_BUSY_TIMEOUT', 20)),
+            'write_timeout': int(os.getenv('DB_WRITE_TIMEOUT', 20)),
+        },
     }
 }
 
+# Реплики для чтения лент: DB_REPLICAS - файлы SQLite через запятую
+# (локальная замена репликации, обновляется командой sync_replicas).
+# GET-запросы к REPLICA_VIEWS читают со случайной реплики; после записи
+# клиент REPLICA_STICKY_SECONDS секунд читает только с default.
+DATABASE_REPLICAS = []
+for _number, _name in enumerate(
+    filter(None, os.getenv('DB_REPLICAS', '').split(',')), 1,
+):
+    DATABASES[f'replica_{_number}'] = {
+        **DATABASES['default'],
+        'NAME': _name,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{_number}')
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+REPLICA_VIEWS = (
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'posts:post_comments',
+    'posts:follow_index',
+)
+REPLICA_STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', 10))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',  # noqa
@@ -112,10 +152,176 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+# Загрузки всегда пишутся на диск кусками (posts.uploads), память на
+# запрос не растёт с размером файла. Картинки крупнее
+# IMAGE_UPLOAD_MAX_SIZE байт или больше IMAGE_MAX_PIXELS пикселей
+# отклоняются до декодирования.
+FILE_UPLOAD_HANDLERS = ['posts.uploads.StreamingUploadHandler']
+IMAGE_UPLOAD_MAX_SIZE = int(os.getenv('IMAGE_UPLOAD_MAX_SIZE', 10 * 2 ** 20))
+IMAGE_MAX_PIXELS = int(os.getenv('IMAGE_MAX_PIXELS', 40_000_000))
+
+# Ленты, которые листаются курсором (?after=/?before=) вместо ?page=.
+# Например: ('posts:index', 'posts:group_list', 'posts:profile',
+# 'posts:follow_index').
+CURSOR_PAGINATION_VIEWS = ()
+
+# Лента подписок: посты авторов раскладываются по лентам подписчиков при
+# публикации. Авторов, у которых подписчиков больше порога, не раскладываем,
+# а дочитываем их посты при чтении ленты.
+TIMELINE_CELEBRITY_FOLLOWERS = 1000
+# Сколько последних постов автора попадает в ленту при подписке на него.
+TIMELINE_BACKFILL_POSTS = 1000
+
+# Бэкенд кэша выбирается переменной окружения CACHE_BACKEND. Каждое
+# пространство имён (фрагменты лент, счётчики, сессии) - отдельный алиас
+# со своим TTL. locmem живёт внутри процесса; sqlite, memcached и redis
+# общие для всех воркеров, поэтому сброс поколений виден сразу везде.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+CACHE_BACKENDS = {
+    'locmem': (
+        'django.core.cache.backends.locmem.LocMemCache',
+        '{namespace}',
+    ),
+    'file': (
+        'django.core.cache.backends.filebased.FileBasedCache',
+        os.path.join(BASE_DIR, 'cache', '{namespace}'),
+    ),
+    'sqlite': (
+        'core.cache.SQLiteCache',
+        os.path.join(BASE_DIR, 'cache', 'cache.sqlite3'),
+    ),
+    'memcached': (
+        'django.core.cache.backends.memcached.MemcachedCache',
+        '127.0.0.1:11211',
+    ),
+    # Требует пакет django-redis.
+    'redis': (
+        'django_redis.cache.RedisCache',
+        'redis://127.0.0.1:6379/1',
+    ),
+}
+CACHE_TTL = {
+    'default': int(os.getenv('CACHE_TTL_DEFAULT', 60 * 5)),
+    'fragments': int(os.getenv('CACHE_TTL_FRAGMENTS', 60 * 60 * 6)),
+    'counters': int(os.getenv('CACHE_TTL_COUNTERS', 60 * 10)),
+    'pages': int(os.getenv('CACHE_TTL_PAGES', 60 * 60)),
+    'sessions': int(os.getenv('CACHE_TTL_SESSIONS', 60 * 60 * 24 * 14)),
+}
+# Сколько записей держит пространство имён в бэкендах, которые вытесняют
+# записи сами (locmem, file, sqlite - у sqlite у каждого пространства своя
+# таблица). memcached и redis ограничиваются своей памятью.
+CACHE_MAX_ENTRIES = {
+    'default': int(os.getenv('CACHE_MAX_ENTRIES_DEFAULT', 10000)),
+    'fragments': int(os.getenv('CACHE_MAX_ENTRIES_FRAGMENTS', 20000)),
+    'counters': int(os.getenv('CACHE_MAX_ENTRIES_COUNTERS', 100000)),
+    'pages': int(os.getenv('CACHE_MAX_ENTRIES_PAGES', 2000)),
+    'sessions': int(os.getenv('CACHE_MAX_ENTRIES_SESSIONS', 50000)),
+}
+_cache_backend, _cache_location = CACHE_BACKENDS[CACHE_BACKEND]
 CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    namespace: {
+        'BACKEND': _cache_backend,
+        'LOCATION': os.getenv('CACHE_LOCATION', _cache_location).format(
+            namespace=namespace,
+        ),
+        'TIMEOUT': timeout,
+        'KEY_PREFIX': namespace,
+        # Клиент memcached получает OPTIONS как аргументы и не знает их.
+        'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES[namespace]}
+        if CACHE_BACKEND in ('locmem', 'file', 'sqlite') else {},
     }
+    for namespace, timeout in CACHE_TTL.items()
+}
+
+# Сколько секунд CDN и браузеры могут хранить анонимную страницу ленты
+# (posts.pagecache); в своём кэше страницы живут до изменения данных.
+PAGE_CACHE_MAX_AGE = int(os.getenv('PAGE_CACHE_MAX_AGE', 60))
+
+# Живая лента новых постов (posts.live): хаб событий - LocalHub в памяти
+# процесса или CacheHub через общий кэш для нескольких процессов и узлов.
+# Каждая открытая лента держит поток воркера до LIVE_MAX_SECONDS, поэтому
+# лента выключена, пока сервер не запущен с gthread- или gevent-воркерами.
+LIVE_UPDATES = os.getenv('LIVE_UPDATES', '0') == '1'
+LIVE_HUB = os.getenv('LIVE_HUB', 'posts.live.LocalHub')
+LIVE_KEEPALIVE_SECONDS = int(os.getenv('LIVE_KEEPALIVE_SECONDS', 15))
+LIVE_MAX_SECONDS = int(os.getenv('LIVE_MAX_SECONDS', 60 * 5))
+
+# Адаптивные лимиты одновременных запросов по классам (core.limiter):
+# начальный, минимальный и максимальный лимит на процесс и целевая
+# задержка в секундах. Сверх лимита анонимы получают сохранённую
+# страницу, остальные - 503 с Retry-After.
+LOAD_LIMITS = {
+    'anonymous': {'initial': 32, 'minimum': 4, 'maximum': 256, 'target': 0.2},
+    'authenticated': {
+        'initial': 16, 'minimum': 4, 'maximum': 128, 'target': 0.5,
+    },
+    'write': {'initial': 8, 'minimum': 2, 'maximum': 32, 'target': 1},
+    'admin': {'initial': 4, 'minimum': 2, 'maximum': 8, 'target': 2},
+}
+LOAD_RETRY_AFTER = int(os.getenv('LOAD_RETRY_AFTER', 2))
+LOAD_STALE_RESPONSE = 'posts.pagecache.stale'
+
+# Метрики запросов (core.metrics) на /status/metrics/: доступны персоналу и
+# по заголовку "Authorization: Bearer <METRICS_TOKEN>". Запросы дольше
+# METRICS_SLOW_SECONDS с вероятностью METRICS_SLOW_SAMPLE пишутся в лог
+# core.metrics с самыми медленными SQL.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+METRICS_SLOW_SECONDS = float(os.getenv('METRICS_SLOW_SECONDS', 1))
+METRICS_SLOW_SAMPLE = float(os.getenv('METRICS_SLOW_SAMPLE', 1))
+
+# Поиск N+1 (core.nplusone): SQL одной формы из одной строки шаблона или
+# кода, повторённый больше NPLUSONE_THRESHOLD раз за запрос. Проверяется
+# доля NPLUSONE_SAMPLE запросов с предупреждением в лог; тесты
+# (core.testing.DiscoverRunner, tests/conftest.py) включают NPLUSONE_RAISE
+# и падают на каждом таком запросе.
+NPLUSONE_THRESHOLD = int(os.getenv('NPLUSONE_THRESHOLD', 5))
+NPLUSONE_SAMPLE = float(os.getenv('NPLUSONE_SAMPLE', 0.01))
+NPLUSONE_RAISE = False
+TEST_RUNNER = 'core.testing.DiscoverRunner'
+
+# Порог регрессий производительности (core.regression): замеры страниц
+# сравниваются с baseline в PERF_BASELINE. queries - сколько SQL на запрос
+# можно добавить, memory и latency - допустимый рост памяти и p50 в долях,
+# latency_floor_ms - рост задержки в мс, который считается шумом.
+# Задержки проверяются, только пока калибровка отличается от baseline не
+# больше чем в calibration раз. Тест замеров запускается с PERF_TESTS=1.
+PERF_BASELINE = os.path.join(
+    BASE_DIR, 'posts', 'tests', 'performance_baseline.json',
+)
+PERF_THRESHOLDS = {
+    'queries': int(os.getenv('PERF_QUERIES_THRESHOLD', 0)),
+    'memory': float(os.getenv('PERF_MEMORY_THRESHOLD', 0.25)),
+    'latency': float(os.getenv('PERF_LATENCY_THRESHOLD', 0.5)),
+    'latency_floor_ms': float(os.getenv('PERF_LATENCY_FLOOR_MS', 10)),
+    'calibration': float(os.getenv('PERF_CALIBRATION_LIMIT', 2)),
+}
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+
+# Фоновые задачи (core.jobs) в таблице core_job основной БД, их выполняет
+# команда run_workers в JOBS_CONCURRENCY процессах. JOBS_EAGER=1 выполняет
+# задачи сразу при постановке, с исключениями в вызывающий код; его
+# включают тесты (core.testing.DiscoverRunner, tests/conftest.py).
+# Задача, которую воркер держит дольше JOBS_TIMEOUT секунд, считается
+# потерянной и забирается снова. Неудачные попытки повторяются через
+# JOBS_RETRY_DELAY, 2 * JOBS_RETRY_DELAY... (не больше
+# JOBS_RETRY_MAX_DELAY) секунд. Завершённые задачи (и их ключи
+# идемпотентности) хранятся JOBS_KEEP_SECONDS. JOBS_SCHEDULE -
+# периодические задачи: путь к функции и интервал в секундах.
+JOBS_EAGER = os.getenv('JOBS_EAGER', '0') == '1'
+JOBS_CONCURRENCY = int(os.getenv('JOBS_CONCURRENCY', 4))
+JOBS_POLL_SECONDS = float(os.getenv('JOBS_POLL_SECONDS', 1))
+JOBS_CLAIM_BATCH = 10
+JOBS_TIMEOUT = int(os.getenv('JOBS_TIMEOUT', 60 * 10))
+JOBS_MAX_ATTEMPTS = int(os.getenv('JOBS_MAX_ATTEMPTS', 5))
+JOBS_RETRY_DELAY = int(os.getenv('JOBS_RETRY_DELAY', 10))
+JOBS_RETRY_MAX_DELAY = int(os.getenv('JOBS_RETRY_MAX_DELAY', 60 * 60))
+JOBS_KEEP_SECONDS = int(os.getenv('JOBS_KEEP_SECONDS', 60 * 60 * 24 * 7))
+JOBS_SCHEDULE = {
+    'core.jobs.purge': 60 * 60,
+    'posts.thumbnails.generate_missing': 60 * 60,
+    'posts.counters.recount': 60 * 60 * 24,
 }
 
 '''